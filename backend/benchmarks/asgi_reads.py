@@ -0,0 +1,167 @@
+"""
+Benchmark of the recipe read endpoints under ASGI, served by the sync DRF
+views and by the async read views (ASYNC_READ_VIEWS).
+
+Concurrent connections repeatedly GET the recipe list and a recipe of their
+own user straight through the ASGI application, on a SQLite file seeded
+with a few tagged recipes per user. Run from the backend directory:
+
+    python -m benchmarks.asgi_reads --connections 32 --recipes 20 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def seed(args):
+    """Create a user with a token and tagged recipes per connection."""
+    from django.core.management import call_command
+    from rest_framework.authtoken.models import Token
+
+    from src.recipe.models import Tag
+    from src.recipe.tests.services import create_recipe, create_tag, create_user
+
+    call_command("migrate", verbosity=0)
+    users = []
+    for index in range(args.connections):
+        user = create_user(email=f"bench{index}@example.com")
+        tags = [create_tag(user=user, name=f"tag{tag}") for tag in range(3)]
+        recipes = [create_recipe(user=user) for _ in range(args.recipes)]
+        for recipe in recipes:
+            recipe.tags.add(*tags)
+        users.append((Token.objects.create(user=user).key, recipes[0].id))
+    Tag.objects.recount()
+    return users
+
+
+async def get(application, path, token):
+    """Send a GET request through the ASGI application, return its status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"authorization", f"Token {token}".encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await application(scope, receive, send)
+    return status
+
+
+async def connect(application, token, recipe_id, stop, latencies):
+    """Alternate list and detail reads until stopped, return the error count."""
+    errors = 0
+    paths = ["/api/recipes/", f"/api/recipes/{recipe_id}/"]
+    while not stop.is_set():
+        for path in paths:
+            started = time.perf_counter()
+            if await get(application, path, token) != 200:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+    return errors
+
+
+async def run_connections(application, users, seconds):
+    stop = asyncio.Event()
+    latencies = []
+    tasks = [
+        asyncio.create_task(connect(application, token, recipe_id, stop, latencies))
+        for token, recipe_id in users
+    ]
+    await asyncio.sleep(seconds)
+    stop.set()
+    errors = sum(await asyncio.gather(*tasks))
+    return latencies, errors
+
+
+def run_workload(args):
+    """Run the connections for `args.seconds` and print results as JSON."""
+    from config.asgi import application
+
+    from django.db import connections
+
+    users = seed(args)
+    connections.close_all()
+    latencies, errors = asyncio.run(run_connections(application, users, args.seconds))
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "requests": len(latencies),
+                "errors": errors,
+                "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0,
+                "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000
+                if latencies
+                else 0,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--recipes", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    if args.run:
+        return run_workload(args)
+
+    print(f"{'views':<8} {'req/s':>10} {'errors':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for async_reads in ("0", "1"):
+        with tempfile.TemporaryDirectory() as db_dir:
+            env = {
+                **os.environ,
+                "DB_ENGINE": "django.db.backends.sqlite3",
+                "DB_NAME": os.path.join(db_dir, "bench.sqlite3"),
+                "ASYNC_READ_VIEWS": async_reads,
+                # Unthrottled, or the clients would measure the throttles.
+                "THROTTLE_READS": "",
+                "THROTTLE_WRITES": "",
+            }
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.asgi_reads", "--run"]
+                + sys.argv[1:],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(
+            f"{'async' if async_reads == '1' else 'sync':<8} "
+            f"{result['requests'] / args.seconds:>10.1f} "
+            f"{result['errors']:>8} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
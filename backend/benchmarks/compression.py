@@ -0,0 +1,94 @@
+"""
+Benchmark of response compression: CPU time against bytes saved, for recipe
+lists of several sizes, with the compressors of CompressionMiddleware: gzip
+at several levels and brotli at several qualities when it's installed.
+
+Run from the backend directory:
+
+    python -m benchmarks.compression --recipes 10 100 1000
+"""
+import argparse
+import os
+import random
+import time
+
+
+WORDS = (
+    "salt pepper onion garlic butter flour sugar egg milk cream tomato basil "
+    "simmer stir bake roast chop slice whisk fold season serve"
+).split()
+
+
+def recipe_list(count):
+    """Render a recipe list like GET /api/recipes/?ids= returns."""
+    from rest_framework.renderers import JSONRenderer
+
+    rng = random.Random(count)
+    recipes = [
+        {
+            "id": id,
+            "title": " ".join(rng.choices(WORDS, k=4)).capitalize(),
+            "time_minutes": rng.randint(5, 120),
+            "price": f"{rng.uniform(1, 100):.2f}",
+            "link": f"https://example.com/recipes/{id}",
+            "tags": [
+                {"id": tag, "name": WORDS[tag], "recipe_count": rng.randint(1, 500)}
+                for tag in rng.sample(range(len(WORDS)), 3)
+            ],
+            "description": " ".join(rng.choices(WORDS, k=60)),
+        }
+        for id in range(1, count + 1)
+    ]
+    return JSONRenderer().render({"results": recipes, "not_found": []})
+
+
+def compressors():
+    """Yield the name, compressor class and settings of each variant."""
+    from src.core.middleware import BrotliCompressor, GzipCompressor, brotli
+
+    for level in (1, 6, 9):
+        yield f"gzip-{level}", GzipCompressor, {"COMPRESSION_GZIP_LEVEL": level}
+    if brotli is not None:
+        for quality in (1, 4, 11):
+            yield f"br-{quality}", BrotliCompressor, {
+                "COMPRESSION_BROTLI_QUALITY": quality
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    import django
+
+    django.setup()
+    from django.test import override_settings
+
+    from src.core.middleware import brotli
+
+    if brotli is None:
+        print("brotli isn't installed, only gzip is measured.")
+    print(f"{'recipes':>8} {'codec':<8} {'bytes':>10} {'saved':>7} {'ms':>8}")
+    for count in args.recipes:
+        data = recipe_list(count)
+        print(f"{count:>8} {'none':<8} {len(data):>10} {'':>7} {'':>8}")
+        for name, compressor_class, options in compressors():
+            with override_settings(**options):
+                started = time.process_time()
+                for _ in range(args.repeat):
+                    compressor = compressor_class()
+                    compressed = compressor.compress(data) + compressor.finish()
+                elapsed = (time.process_time() - started) / args.repeat
+            saved = 1 - len(compressed) / len(data)
+            print(
+                f"{count:>8} {name:<8} {len(compressed):>10} {saved:>7.1%} "
+                f"{elapsed * 1000:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
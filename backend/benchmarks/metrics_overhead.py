@@ -0,0 +1,87 @@
+"""
+Benchmark of recording metrics (src.core.metrics) from concurrent threads,
+against a shared dict guarded by a lock, and of rendering /metrics.
+
+Each thread increments a counter and observes a histogram --calls times.
+Run from the backend directory:
+
+    python -m benchmarks.metrics_overhead --threads 1 4 16 --calls 100000
+"""
+import argparse
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+class LockedCounters:
+    """The straightforward alternative: one dict, one lock."""
+
+    def __init__(self, buckets):
+        self.values = {}
+        self.lock = threading.Lock()
+        self.buckets = buckets
+
+    def inc(self, *labels):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + 1
+
+    def observe(self, value, *labels):
+        key = labels + (bisect_left(self.buckets, value),)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + 1
+            self.values[labels] = self.values.get(labels, 0) + value
+
+
+def run(threads, calls, inc, observe):
+    """Return the nanoseconds per recorded call across all threads."""
+
+    def worker():
+        for index in range(calls):
+            inc("recipe:recipe-list", "GET", "200")
+            observe(index % 100 / 1000, "recipe:recipe-list", "200")
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return (time.perf_counter() - started) / (threads * calls * 2) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    import django
+
+    django.setup()
+    from src.core.metrics import LATENCY_BUCKETS, Counter, Histogram, Registry
+
+    print(f"{'threads':>8} {'sharded ns':>11} {'locked ns':>10} {'render ms':>10}")
+    for threads in args.threads:
+        registry = Registry()
+        counter = Counter(
+            "requests_total", "", ["view", "method", "status"], registry=registry
+        )
+        histogram = Histogram(
+            "duration_seconds", "", ["view", "status"], registry=registry
+        )
+        sharded = run(threads, args.calls, counter.inc, histogram.observe)
+        locked_counters = LockedCounters(LATENCY_BUCKETS)
+        locked = run(
+            threads, args.calls, locked_counters.inc, locked_counters.observe
+        )
+        started = time.perf_counter()
+        registry.render()
+        rendered = (time.perf_counter() - started) * 1000
+        print(f"{threads:>8} {sharded:>11.0f} {locked:>10.0f} {rendered:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmark of signups and logins with passwords hashed inline, in the
+thread pool and in the process pool (PASSWORD_POOL, src.user.passwords).
+
+At each concurrency level, threaded clients sign up new users, then log
+them in, for --seconds each. They call the sync views, as WSGI workers do,
+and so wait for their hash whether it runs inline or in a pool: these
+columns measure what the pool's bound does to throughput, p99 latency and
+503s, not threads freed. The last column measures what async callers gain:
+the worst lag of the event loop while that many acheck_password calls run,
+inline (blocking it) or awaited from the pool. Run from the backend directory:
+
+    python -m benchmarks.password_pool --concurrency 1 4 16 64 --seconds 3
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def run_phase(clients, seconds, request):
+    """Call `request(client, index)` from every client, return the counts."""
+    stop = threading.Event()
+    results = {"ok": 0, "busy": 0, "errors": 0, "latencies": []}
+    lock = threading.Lock()
+    numbers = itertools.count()
+
+    def worker(client):
+        ok, busy, errors, latencies = 0, 0, 0, []
+        while not stop.is_set():
+            started = time.perf_counter()
+            status = request(client, next(numbers)).status_code
+            latencies.append(time.perf_counter() - started)
+            if status == 503:
+                busy += 1
+            elif status >= 400:
+                errors += 1
+            else:
+                ok += 1
+        from django.db import connections
+
+        connections.close_all()
+        with lock:
+            results["ok"] += ok
+            results["busy"] += busy
+            results["errors"] += errors
+            results["latencies"].extend(latencies)
+
+    threads = [threading.Thread(target=worker, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies = sorted(results.pop("latencies"))
+    results["p99_ms"] = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    return results
+
+
+async def loop_lag(concurrency, password, encoded):
+    """
+    Return the worst lag in ms of a 1 ms timer on the event loop while
+    `concurrency` acheck_password calls run, and how many were refused.
+    """
+    from src.user.passwords import acheck_password
+
+    lags = []
+    checking = True
+
+    async def timer():
+        while checking:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    task = asyncio.create_task(timer())
+    await asyncio.sleep(0.01)
+    results = await asyncio.gather(
+        *(acheck_password(password, encoded) for _ in range(concurrency)),
+        return_exceptions=True,
+    )
+    checking = False
+    await task
+    busy = sum(isinstance(result, Exception) for result in results)
+    return max(lags) * 1000, busy
+
+
+def run_workload(args):
+    """Run signups then logins at each concurrency, print results as JSON."""
+    import django
+
+    django.setup()
+
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+
+    call_command("migrate", verbosity=0)
+    connection.close()
+    password = "benchPass123"
+    results = {}
+    for concurrency in args.concurrency:
+        clients = [Client(raise_request_exception=False) for _ in range(concurrency)]
+        prefix = f"c{concurrency}-"
+        signups = run_phase(
+            clients,
+            args.seconds,
+            lambda client, index: client.post(
+                "/api/users/create/",
+                {
+                    "email": f"{prefix}{index}@example.com",
+                    "name": "bench",
+                    "password": password,
+                },
+                content_type="application/json",
+            ),
+        )
+        created = max(signups["ok"], 1)
+        logins = run_phase(
+            clients,
+            args.seconds,
+            lambda client, index: client.post(
+                "/api/users/token/",
+                {
+                    "email": f"{prefix}{index % created}@example.com",
+                    "password": password,
+                },
+                content_type="application/json",
+            ),
+        )
+        lag, busy = asyncio.run(
+            loop_lag(concurrency, password, make_password(password))
+        )
+        results[concurrency] = {
+            "signups": signups,
+            "logins": logins,
+            "loop_lag_ms": lag,
+            "async_busy": busy,
+        }
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    if args.run:
+        return run_workload(args)
+
+    print(
+        f"{'mode':<8} {'conc':>5} {'signups/s':>10} {'logins/s':>10} "
+        f"{'503s':>6} {'p99 ms':>8} {'loop lag ms':>12}"
+    )
+    for mode, pool, workers in (
+        ("inline", "thread", "0"),
+        ("thread", "thread", str(os.cpu_count() or 1)),
+        ("process", "process", str(os.cpu_count() or 1)),
+    ):
+        with tempfile.TemporaryDirectory() as db_dir:
+            env = {
+                **os.environ,
+                "DB_ENGINE": "django.db.backends.sqlite3",
+                "DB_NAME": os.path.join(db_dir, "bench.sqlite3"),
+                "DB_SQLITE_TUNING": "1",
+                "PASSWORD_POOL": pool,
+                "PASSWORD_POOL_WORKERS": workers,
+                # Unthrottled, or the clients would measure AuthThrottle.
+                "THROTTLE_AUTH": "",
+            }
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.password_pool", "--run"]
+                + sys.argv[1:],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        for concurrency, result in json.loads(output.splitlines()[-1]).items():
+            signups, logins = result["signups"], result["logins"]
+            print(
+                f"{mode:<8} {concurrency:>5} "
+                f"{signups['ok'] / args.seconds:>10.1f} "
+                f"{logins['ok'] / args.seconds:>10.1f} "
+                f"{signups['busy'] + logins['busy'] + result['async_busy']:>6} "
+                f"{max(signups['p99_ms'], logins['p99_ms']):>8.1f} "
+                f"{result['loop_lag_ms']:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Concurrency benchmark of the recipe endpoints on SQLite, with and without
+the SQLite performance mode (DB_SQLITE_TUNING).
+
+Threaded readers list recipes while threaded writers create tagged recipes,
+all against one database file. Run from the backend directory:
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 4 --seconds 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def run_workload(args):
+    """Run readers and writers for `args.seconds` and print counts as JSON."""
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+
+    from src.recipe.tests.services import RECIPE_DEFAULTS, create_user
+
+    call_command("migrate", verbosity=0)
+    tokens = [
+        Token.objects.create(user=create_user(email=f"bench{i}@example.com")).key
+        for i in range(args.readers + args.writers)
+    ]
+    connection.close()
+
+    stop = threading.Event()
+    results = {"reads": 0, "writes": 0, "errors": 0, "latencies": []}
+    lock = threading.Lock()
+
+    def worker(token, is_writer):
+        client = Client(raise_request_exception=False)
+        headers = {"HTTP_AUTHORIZATION": f"Token {token}"}
+        payload = {
+            **RECIPE_DEFAULTS,
+            "price": str(RECIPE_DEFAULTS["price"]),
+            "tags": [{"name": "bench"}, {"name": "tag"}],
+        }
+        counted, errors, latencies = 0, 0, []
+        while not stop.is_set():
+            started = time.perf_counter()
+            if is_writer:
+                response = client.post(
+                    "/api/recipes/", payload, content_type="application/json", **headers
+                )
+            else:
+                response = client.get("/api/recipes/", **headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 500:
+                errors += 1
+            else:
+                counted += 1
+        from django.db import connections
+
+        connections.close_all()
+        with lock:
+            results["writes" if is_writer else "reads"] += counted
+            results["errors"] += errors
+            results["latencies"].extend(latencies)
+
+    threads = [
+        threading.Thread(target=worker, args=(token, index < args.writers))
+        for index, token in enumerate(tokens)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(results.pop("latencies"))
+    results["p99_ms"] = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    if args.run:
+        return run_workload(args)
+
+    print(f"{'mode':<10} {'reads/s':>10} {'writes/s':>10} {'errors':>8} {'p99 ms':>8}")
+    for tuning in ("0", "1"):
+        with tempfile.TemporaryDirectory() as db_dir:
+            env = {
+                **os.environ,
+                "DB_ENGINE": "django.db.backends.sqlite3",
+                "DB_NAME": os.path.join(db_dir, "bench.sqlite3"),
+                "DB_SQLITE_TUNING": tuning,
+                # Unthrottled, or the clients would measure the throttles.
+                "THROTTLE_READS": "",
+                "THROTTLE_WRITES": "",
+            }
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.sqlite_concurrency", "--run"]
+                + sys.argv[1:],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(
+            f"{'tuned' if tuning == '1' else 'default':<10} "
+            f"{result['reads'] / args.seconds:>10.1f} "
+            f"{result['writes'] / args.seconds:>10.1f} "
+            f"{result['errors']:>8} {result['p99_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of the cost of a throttle check, with the token bucket
+throttle in each store against DRF's UserRateThrottle (request history in
+the cache), on the default (local memory) cache.
+
+Each check is for one of --users users, at a rate that never throttles.
+Run from the backend directory:
+
+    python -m benchmarks.throttle_overhead --checks 200000 --users 1000
+"""
+import argparse
+import os
+import timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from rest_framework.throttling import UserRateThrottle
+
+    from src.core.throttling import ReadWriteThrottle
+
+    factory = APIRequestFactory()
+    requests = []
+    for user_id in range(1, args.users + 1):
+        request = factory.get("/api/recipes/")
+        force_authenticate(request, get_user_model()(id=user_id))
+        requests.append(Request(request))
+
+    class UserThrottle(UserRateThrottle):
+        rate = f"{args.checks}/s"
+
+    candidates = [
+        ("none", None, lambda: None),
+        ("bucket local", "local", ReadWriteThrottle),
+        ("bucket cache", "cache", ReadWriteThrottle),
+        ("drf user", "local", UserThrottle),
+    ]
+    rates = {"reads": f"{args.checks}/s", "writes": f"{args.checks}/s"}
+    print(f"{'throttle':<14} {'us/check':>10}")
+    for name, store, throttle_class in candidates:
+        with override_settings(
+            THROTTLE_STORE=store or "local",
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": rates,
+            },
+        ):
+            checks = iter(range(args.checks))
+
+            def check():
+                request = requests[next(checks) % len(requests)]
+                throttle = throttle_class()
+                if throttle is not None:
+                    assert throttle.allow_request(request, None)
+
+            seconds = timeit.timeit(check, number=args.checks)
+        print(f"{name:<14} {seconds / args.checks * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
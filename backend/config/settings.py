@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,13 +49,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "src.core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "src.core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "src.core.middleware.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -92,6 +96,109 @@ DATABASES = {
     }
 }
 
+# Opt-in tuning for single-node SQLite deployments: WAL journal, relaxed
+# fsync, bigger page cache and memory map, waiting on locks instead of
+# failing, and write transactions that take the lock up front.
+SQLITE_TUNING = bool(int(os.environ.get("DB_SQLITE_TUNING", default=0)))
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # KiB
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,  # ms
+}
+if SQLITE_TUNING and DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"]["ENGINE"] = "src.core.backends.sqlite3"
+
+# Extra databases are given as space separated locations: a host for server
+# databases, a file path for SQLite. Each inherits the default settings.
+DB_LOCATION_KEY = "NAME" if DATABASES["default"]["ENGINE"].endswith("sqlite3") else "HOST"
+
+# Read replicas (DB_REPLICAS), mirroring the default database under test.
+DATABASE_REPLICAS = []
+for index, location in enumerate(os.environ.get("DB_REPLICAS", "").split(), 1):
+    alias = f"replica{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        DB_LOCATION_KEY: location,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+# Default cache. The local memory one is private to each worker process, so
+# features sharing state between workers (replica pins, cached tokens and
+# throttle buckets in the cache) need a shared one, see src.core.checks.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+# Seconds a user's reads stay on the primary after one of their writes, kept
+# in the cache so that every worker sees them.
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get("DB_REPLICA_PIN_SECONDS", 5))
+
+# Shards (DB_SHARDS) holding the data of SHARDED_APPS, split by user id.
+# Without any, everything stays on the default database.
+SHARDED_APPS = ["recipe"]
+DATABASE_SHARDS = []
+for index, location in enumerate(os.environ.get("DB_SHARDS", "").split(), 1):
+    alias = f"shard{index}"
+    DATABASES[alias] = {**DATABASES["default"], DB_LOCATION_KEY: location}
+    DATABASE_SHARDS.append(alias)
+DATABASE_SHARDS = DATABASE_SHARDS or ["default"]
+
+DATABASE_ROUTERS = [
+    "src.core.routers.ShardRouter",
+    "src.core.routers.ReplicaRouter",
+]
+
+# Maximum number of recipes fetched at once with GET /api/recipes/?ids=.
+RECIPE_MULTI_GET_MAX = int(os.environ.get("RECIPE_MULTI_GET_MAX", 100))
+
+# How far before a client's cursor sync looks again for changes, to catch
+# rows saved by transactions that committed after the cursor was issued.
+# Writes to synced rows taking longer are rolled back (src.recipe.sync).
+SYNC_CURSOR_OVERLAP_SECONDS = int(os.environ.get("SYNC_CURSOR_OVERLAP_SECONDS", 2))
+# Days tombstones of deleted recipes and tags are kept (see the
+# prune_tombstones command). Clients with older cursors sync everything again.
+SYNC_TOMBSTONE_DAYS = int(os.environ.get("SYNC_TOMBSTONE_DAYS", 30))
+
+# Maximum number of sub-requests in a POST /api/batch/, and of writes among them.
+BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", 20))
+BATCH_MAX_WRITES = int(os.environ.get("BATCH_MAX_WRITES", 5))
+
+# Serve plain recipe and tag reads from async views (set by config/asgi.py),
+# sparing them the hop to the single thread sync views run in under ASGI.
+ASYNC_READ_VIEWS = bool(int(os.environ.get("ASYNC_READ_VIEWS", default=0)))
+
+# Background jobs (src.core.jobs): attempts before a job fails, base delay of
+# the exponential backoff between attempts, and how long a running job may
+# go without a heartbeat before workers presume its worker dead and requeue it.
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_BACKOFF_SECONDS = int(os.environ.get("JOB_RETRY_BACKOFF_SECONDS", 30))
+JOB_TIMEOUT_SECONDS = int(os.environ.get("JOB_TIMEOUT_SECONDS", 3600))
+
+# Password hashing pool (src.user.passwords): "thread" or "process" workers,
+# their number (0 hashes inline) and how many calls may wait for one before
+# requests get a 503.
+PASSWORD_POOL = os.environ.get("PASSWORD_POOL", "thread")
+PASSWORD_POOL_WORKERS = int(
+    os.environ.get("PASSWORD_POOL_WORKERS", os.cpu_count() or 1)
+)
+PASSWORD_POOL_QUEUE = int(os.environ.get("PASSWORD_POOL_QUEUE", 16))
+
+# Rows validated, hashed and inserted together by bulk user provisioning.
+USER_PROVISION_CHUNK_SIZE = int(os.environ.get("USER_PROVISION_CHUNK_SIZE", 500))
+
+# Seconds safe-method requests may authenticate with a cached token's user,
+# e.g. polling GET /api/users/me/ without a query (0 disables the cache).
+# Needs a shared cache, so that revoking a token reaches every worker.
+AUTH_TOKEN_CACHE_SECONDS = int(os.environ.get("AUTH_TOKEN_CACHE_SECONDS", 0))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -137,5 +244,44 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "user.User"
 
 REST_FRAMEWORK = {
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_SCHEMA_CLASS": "src.core.lazy.LazyAutoSchema",
+    "EXCEPTION_HANDLER": "src.core.exceptions.exception_handler",
+    "DEFAULT_THROTTLE_CLASSES": ["src.core.throttling.ReadWriteThrottle"],
+    # Token bucket rates, "num/period": bursts of num, refilled over period.
+    "DEFAULT_THROTTLE_RATES": {
+        "reads": os.environ.get("THROTTLE_READS", "600/min"),
+        "writes": os.environ.get("THROTTLE_WRITES", "120/min"),
+        "auth": os.environ.get("THROTTLE_AUTH", "30/min"),
+    },
 }
+
+# Where throttle buckets live, see src.core.throttling: "local" to the
+# process or "cache" to share them between workers through the (shared) cache.
+THROTTLE_STORE = os.environ.get("THROTTLE_STORE", "local")
+
+# Response compression (src.core.middleware): smallest response compressed,
+# in bytes, and the gzip level and brotli quality (if brotli is installed).
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 4))
+
+# Directory where each worker process writes its metrics for /metrics to sum
+# them (src.core.metrics), for servers running several processes. Empty it
+# before the server starts. Unset, /metrics reports the process answering.
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+# Most seconds between writes of a process' metrics to METRICS_DIR.
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 1))
+# Who may read /metrics: clients from METRICS_ALLOWED_IPS (addresses or
+# networks, space separated; loopback only by default), and with the
+# METRICS_TOKEN bearer token, if set, any client presenting it.
+METRICS_ALLOWED_IPS = os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1 ::1").split()
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Request profiling (src.core.profiling): the fraction of all requests
+# profiled besides those staff ask for, where their reports are stored and
+# how many of the newest are kept.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "recipe-book-profiles")
+)
+PROFILE_MAX_STORED = int(os.environ.get("PROFILE_MAX_STORED", 200))
@@ -15,16 +15,26 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from src.core.lazy import lazy_view
+
+# drf_spectacular pulls in yaml, uritemplate and the whole schema machinery,
+# so its views are only imported once the schema URLs are actually hit.
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("api/schema/", SpectacularAPIView.as_view(), name="api-schema"),
+    path(
+        "api/schema/",
+        lazy_view("drf_spectacular.views.SpectacularAPIView"),
+        name="api-schema",
+    ),
     path(
         "api/docs/",
-        SpectacularSwaggerView.as_view(url_name="api-schema"),
+        lazy_view(
+            "drf_spectacular.views.SpectacularSwaggerView", url_name="api-schema"
+        ),
         name="api-docs",
     ),
+    path("", include("src.core.urls")),
     path("api/users/", include("src.user.urls")),
     path("api/", include("src.recipe.urls")),
 ]
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "src.core"
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+
+        # Register the background jobs of every app.
+        autodiscover_modules("jobs")
@@ -0,0 +1,71 @@
+"""
+Async read views in front of the sync DRF views.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    Throttled,
+)
+from rest_framework.renderers import JSONRenderer
+
+from .authentication import AsyncTokenAuthentication
+from .routers import ais_pinned_to_primary, replica_reads
+
+
+def async_reads(read, sync_view):
+    """
+    Return an async view serving plain GET requests (no query parameters,
+    no browsable API) with `read(request, user, **kwargs)`, which returns
+    the data to render, and everything else with the DRF view `sync_view`.
+    Reads are token authenticated and throttled like the sync view's (with
+    the throttles' aallow_request), and may use a replica, as in
+    ReplicaReadMixin.
+    """
+    authentication = AsyncTokenAuthentication()
+    throttle_classes = sync_view.cls.throttle_classes
+    renderer = JSONRenderer()
+    sync_dispatch = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if (
+            request.method != "GET"
+            or request.GET
+            or "text/html" in request.headers.get("Accept", "")
+        ):
+            return await sync_dispatch(request, *args, **kwargs)
+        try:
+            user_auth = await authentication.aauthenticate(request)
+            if user_auth is None:
+                raise NotAuthenticated()
+            request.user = user = user_auth[0]
+            for throttle in (throttle_class() for throttle_class in throttle_classes):
+                if not await throttle.aallow_request(request, None):
+                    raise Throttled(throttle.wait())
+            with replica_reads(not await ais_pinned_to_primary(user)):
+                data = await read(request, user, *args, **kwargs)
+            response = HttpResponse(
+                renderer.render(data), content_type=renderer.media_type
+            )
+        except APIException as exc:
+            response = HttpResponse(
+                renderer.render({"detail": exc.detail}),
+                content_type=renderer.media_type,
+                status=exc.status_code,
+            )
+            if getattr(exc, "wait", None):
+                response["Retry-After"] = "%d" % exc.wait
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                response["WWW-Authenticate"] = authentication.authenticate_header(
+                    request
+                )
+        response["Vary"] = "Accept"
+        return response
+
+    # The sync view already handles CSRF (see APIView.as_view), and callers
+    # such as the batch view can dispatch to it directly.
+    view.csrf_exempt = True
+    view.sync_view = sync_view
+    return view
@@ -0,0 +1,99 @@
+"""Token authentication variants."""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+
+from .metrics import auth_token_cache
+
+
+TOKEN_CACHE_KEY = "auth-token:{}"
+
+
+class AsyncTokenAuthentication(TokenAuthentication):
+    """Token authentication with async counterparts of its methods."""
+
+    async def aauthenticate(self, request):
+        """Async `authenticate`."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise AuthenticationFailed(
+                _("Invalid token header. No credentials provided.")
+            )
+        if len(auth) > 2:
+            raise AuthenticationFailed(
+                _("Invalid token header. Token string should not contain spaces.")
+            )
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed(
+                _(
+                    "Invalid token header. "
+                    "Token string should not contain invalid characters."
+                )
+            )
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        """Async `authenticate_credentials`."""
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related("user").aget(key=key)
+        except model.DoesNotExist:
+            raise AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        return token.user, token
+
+
+class BatchAuthentication(BaseAuthentication):
+    """
+    Authentication of the sub-requests of a batch with the user and auth
+    the batch was authenticated with, see src.core.batch.
+    """
+
+    def authenticate(self, request):
+        return getattr(request, "batch_user_auth", None)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication keeping the token's user in the cache for
+    AUTH_TOKEN_CACHE_SECONDS (0 disables it), for safe-method requests
+    only, so that writes always act on a fresh user. Entries are dropped
+    when the user or token changes, see src.core.signals, which needs a
+    cache shared by all workers (checked by src.core.checks).
+    """
+
+    def authenticate(self, request):
+        self.use_cache = (
+            settings.AUTH_TOKEN_CACHE_SECONDS and request.method in SAFE_METHODS
+        )
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        if not self.use_cache:
+            return super().authenticate_credentials(key)
+        cache_key = TOKEN_CACHE_KEY.format(key)
+        user_auth = cache.get(cache_key)
+        if user_auth is not None:
+            auth_token_cache.inc("hit")
+            return user_auth
+        auth_token_cache.inc("miss")
+        user_auth = super().authenticate_credentials(key)
+        cache.set(cache_key, user_auth, settings.AUTH_TOKEN_CACHE_SECONDS)
+        return user_auth
+
+
+def forget_tokens(keys):
+    """Drop the cached users of the tokens `keys`."""
+    cache.delete_many([TOKEN_CACHE_KEY.format(key) for key in keys])
@@ -0,0 +1,15 @@
+"""
+SQLite backend which takes the write lock when a transaction starts.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        """
+        Start transactions with BEGIN IMMEDIATE. A deferred transaction that
+        reads and then writes has to upgrade its lock, and SQLite fails that
+        upgrade at once with "database is locked" instead of waiting for
+        busy_timeout when another writer is active.
+        """
+        self.cursor().execute("BEGIN IMMEDIATE")
@@ -0,0 +1,55 @@
+"""
+System checks of the core app.
+
+Some state must be seen by every worker process, which the default local
+memory cache isn't: these checks fail `migrate`, `runserver` and `check`
+when a feature relying on it is enabled without a shared CACHES backend.
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+# Cache backends holding their entries in the process.
+LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def cache_is_shared():
+    """Return whether the default cache is shared between processes."""
+    return settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS
+
+
+def _shared_cache_error(feature, id):
+    return Error(
+        f"{feature} needs a cache shared by all workers, but the default cache "
+        "is local to each process.",
+        hint="Set CACHE_BACKEND (and CACHE_LOCATION), e.g. to "
+        "django.core.cache.backends.redis.RedisCache.",
+        id=id,
+    )
+
+
+@register()
+def check_replica_pins(app_configs, **kwargs):
+    """Read-your-writes pins to the primary must be seen by all workers."""
+    if settings.DATABASE_REPLICAS and not cache_is_shared():
+        return [_shared_cache_error("DB_REPLICAS", "core.E001")]
+    return []
+
+
+@register()
+def check_token_cache(app_configs, **kwargs):
+    """Dropping a cached token must reach all workers, or it stays usable."""
+    if settings.AUTH_TOKEN_CACHE_SECONDS and not cache_is_shared():
+        return [_shared_cache_error("AUTH_TOKEN_CACHE_SECONDS", "core.E002")]
+    return []
+
+
+@register()
+def check_throttle_store(app_configs, **kwargs):
+    """Throttle buckets in the cache must be shared to hold across workers."""
+    if settings.THROTTLE_STORE == "cache" and not cache_is_shared():
+        return [_shared_cache_error('THROTTLE_STORE="cache"', "core.E003")]
+    return []
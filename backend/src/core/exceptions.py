@@ -0,0 +1,24 @@
+"""Errors raised below the API views, and how the API answers them."""
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler as drf_exception_handler
+
+
+class ServiceUnavailable(Exception):
+    """The request can't be served now, but may be when retried."""
+
+    default_detail = "Service temporarily unavailable, try again later."
+    default_code = "service_unavailable"
+
+    def __init__(self, detail=None):
+        super().__init__(detail or self.default_detail)
+
+
+class ServiceUnavailableError(APIException):
+    status_code = 503
+
+
+def exception_handler(exc, context):
+    """DRF's exception handler, also answering ServiceUnavailable with a 503."""
+    if isinstance(exc, ServiceUnavailable):
+        exc = ServiceUnavailableError(str(exc), exc.default_code)
+    return drf_exception_handler(exc, context)
@@ -0,0 +1,14 @@
+"""
+Cheap probes of the service's dependencies.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def ping_database(alias=DEFAULT_DB_ALIAS):
+    """
+    Run `SELECT 1` on the `alias` database.
+    Raises the driver's OperationalError when it can't be reached.
+    """
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
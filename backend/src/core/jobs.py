@@ -0,0 +1,85 @@
+"""
+Background jobs: functions registered by name, queued as Job rows and run
+by the run_worker command. Apps register their jobs in a `jobs` module:
+
+    @register("recipe.recount_tags")
+    def recount_tags(database=None):
+        ...
+
+    Job.objects.enqueue("recipe.recount_tags", {"database": "shard1"})
+
+A job is called with its payload as keyword arguments and its return
+value, which must be JSON serializable, is stored as the job's result.
+When it raises, it's retried with exponential backoff until it runs out
+of attempts. A job whose worker stops sending heartbeats is requeued (see
+Job.requeue_lost), and the outcome of a run overtaken that way is dropped.
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Job
+
+
+registry = {}
+
+
+def register(name):
+    """Register the decorated function as the job `name`."""
+
+    def decorator(func):
+        registry[name] = func
+        return func
+
+    return decorator
+
+
+def retry_delay(attempts):
+    """Return the seconds to wait before retrying a job failed `attempts` times."""
+    return settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+
+
+def run_job(job_id):
+    """
+    Run a claimed job and record its result, or its error and next try.
+    Return the job's new status, or None if the job was requeued meanwhile
+    and the outcome of this run dropped.
+    """
+    close_old_connections()
+    try:
+        job = Job.objects.get(id=job_id)
+        try:
+            if job.name not in registry:
+                raise LookupError(f"Unknown job {job.name!r}.")
+            job.result = registry[job.name](**job.payload)
+        except Exception:
+            job.error = traceback.format_exc()
+            if job.attempts < job.max_attempts:
+                job.status = Job.Status.QUEUED
+                job.run_at = timezone.now() + timedelta(
+                    seconds=retry_delay(job.attempts)
+                )
+            else:
+                job.status = Job.Status.FAILED
+                job.finished_at = timezone.now()
+        else:
+            job.status = Job.Status.SUCCEEDED
+            job.error = ""
+            job.finished_at = timezone.now()
+        # Only if this run still is the job's current attempt.
+        if not Job.objects.filter(
+            id=job.id, status=Job.Status.RUNNING, attempts=job.attempts
+        ).update(
+            status=job.status,
+            result=job.result,
+            error=job.error,
+            run_at=job.run_at,
+            finished_at=job.finished_at,
+        ):
+            return None
+        return job.status
+    finally:
+        close_old_connections()
@@ -0,0 +1,64 @@
+"""
+Helpers for deferring expensive imports until they are first needed.
+"""
+import sys
+from functools import lru_cache
+
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.schemas.inspectors import ViewInspector
+
+
+SPECTACULAR_OPENAPI = "drf_spectacular.openapi"
+SPECTACULAR_AUTO_SCHEMA = f"{SPECTACULAR_OPENAPI}.AutoSchema"
+
+
+def lazy_view(view_path, **initkwargs):
+    """
+    Return a view which imports the class-based view at `view_path`
+    and builds it with `initkwargs` on the first request only.
+    """
+    view = None
+
+    @csrf_exempt
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(view_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    wrapper.view_path = view_path
+    return wrapper
+
+
+class LazyAutoSchema(ViewInspector):
+    """
+    Stand-in for drf_spectacular's AutoSchema as DEFAULT_SCHEMA_CLASS.
+
+    DRF resolves and instantiates DEFAULT_SCHEMA_CLASS while building the
+    URLconf (the router inspects every viewset attribute), which would load
+    the whole drf_spectacular stack on every boot. Every schema generation
+    path imports drf_spectacular.openapi first, so until then a bare
+    placeholder is built, and afterwards an instance of `with_auto_schema`.
+    """
+
+    resolved = False
+
+    def __new__(cls, *args, **kwargs):
+        if SPECTACULAR_OPENAPI in sys.modules and not cls.resolved:
+            cls = with_auto_schema(cls)
+        return object.__new__(cls)
+
+
+@lru_cache(maxsize=None)
+def with_auto_schema(schema_class):
+    """
+    Return a subclass of `schema_class` (LazyAutoSchema or a subclass of it,
+    e.g. made by `extend_schema`) and of the real AutoSchema, so that its
+    overrides come first.
+    """
+    return type(
+        schema_class.__name__,
+        (schema_class, import_string(SPECTACULAR_AUTO_SCHEMA)),
+        {"__module__": schema_class.__module__, "resolved": True},
+    )
@@ -0,0 +1,56 @@
+"""
+Django command to list and view stored request profiles.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...profiling import format_report, load, stored_ids
+
+
+class Command(BaseCommand):
+    """Django command to read the request profiles in PROFILE_DIR."""
+
+    help = (
+        "List the stored request profiles, newest first, or show the call "
+        "tree and SQL statements of the one given by id."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("id", nargs="?", help="Profile to show.")
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Number of profiles to list (0 for all).",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options["id"]:
+            try:
+                report = load(options["id"])
+            except FileNotFoundError:
+                raise CommandError(
+                    f"No profile {options['id']} in {settings.PROFILE_DIR}."
+                )
+            self.stdout.write(format_report(report), ending="")
+            return
+
+        ids = stored_ids()
+        if options["limit"] > 0:
+            ids = ids[: options["limit"]]
+        self.stdout.write(
+            f"{'id':<29} {'status':>6} {'ms':>9} {'sql':>5} {'sql ms':>8}  request"
+        )
+        for id in ids:
+            try:
+                report = load(id)
+            except FileNotFoundError:  # Dropped for a newer one meanwhile.
+                continue
+            queries = report["queries"]
+            sampled = " (sampled)" if report["sampled"] else ""
+            self.stdout.write(
+                f"{id:<29} {report['status']:>6} {report['ms']:>9.1f} "
+                f"{len(queries):>5} {sum(query['ms'] for query in queries):>8.1f}  "
+                f"{report['method']} {report['path']}{sampled}"
+            )
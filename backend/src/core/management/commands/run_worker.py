@@ -0,0 +1,131 @@
+"""
+Django command to run queued background jobs.
+"""
+import multiprocessing
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...jobs import run_job
+from ...metrics import registry
+from ...models import Job
+
+
+class Command(BaseCommand):
+    """Django command to run background jobs from the Job queue."""
+
+    help = (
+        "Claim due jobs and run them in a pool of --concurrency threads or "
+        "processes, polling the queue every --poll seconds when it's empty. "
+        "Running jobs get a heartbeat every --heartbeat-every seconds, and "
+        "every --requeue-every seconds, jobs without one for longer than "
+        "JOB_TIMEOUT_SECONDS are presumed lost with their worker and requeued."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Number of jobs run at once.",
+        )
+        parser.add_argument(
+            "--pool",
+            choices=["thread", "process"],
+            default="thread",
+            help="Run jobs in threads, or in processes for CPU-bound jobs.",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before looking for jobs again when none is due.",
+        )
+        parser.add_argument(
+            "--requeue-every",
+            type=float,
+            default=60.0,
+            help="Seconds between looks for lost jobs to requeue.",
+        )
+        parser.add_argument(
+            "--heartbeat-every",
+            type=float,
+            default=60.0,
+            help=(
+                "Seconds between heartbeats of the running jobs, to keep well "
+                "under JOB_TIMEOUT_SECONDS."
+            ),
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for more.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        concurrency = options["concurrency"]
+        running = {}
+        next_requeue = next_heartbeat = 0
+        with self.executor(options["pool"], concurrency) as executor:
+            while True:
+                registry.maybe_flush()
+                if time.monotonic() >= next_requeue:
+                    self.requeue_lost()
+                    next_requeue = time.monotonic() + options["requeue_every"]
+                if running and time.monotonic() >= next_heartbeat:
+                    Job.objects.heartbeat(list(running.values()))
+                    next_heartbeat = time.monotonic() + options["heartbeat_every"]
+                free = concurrency - len(running)
+                ids = Job.objects.claim(free) if free else []
+                for id in ids:
+                    running[executor.submit(run_job, id)] = id
+                if not running:
+                    if options["once"]:
+                        return
+                    time.sleep(options["poll"])
+                    continue
+                # Claimed as many as there was room for, so either the pool
+                # is full or nothing else is due yet.
+                done, _ = wait(
+                    running, timeout=options["poll"], return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    self.report(running.pop(future), future)
+
+    def requeue_lost(self):
+        """Requeue the jobs of workers presumed dead, see Job.requeue_lost."""
+        requeued, failed = Job.objects.requeue_lost(settings.JOB_TIMEOUT_SECONDS)
+        if requeued or failed:
+            self.stdout.write(f"Requeued {requeued} and failed {failed} lost jobs.")
+
+    def executor(self, pool, concurrency):
+        if pool == "thread":
+            return ThreadPoolExecutor(concurrency, thread_name_prefix="job")
+        # Forked children would share the parent's database connections.
+        return ProcessPoolExecutor(
+            concurrency,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        )
+
+    def report(self, id, future):
+        """Write how the job went."""
+        if future.exception() is not None:
+            self.stderr.write(f"Job {id} crashed the worker: {future.exception()!r}")
+        elif future.result() is None:
+            self.stderr.write(f"Job {id} was requeued as lost, this run is dropped.")
+        elif future.result() == Job.Status.SUCCEEDED:
+            self.stdout.write(self.style.SUCCESS(f"Job {id} succeeded."))
+        elif future.result() == Job.Status.QUEUED:
+            self.stderr.write(f"Job {id} failed, it will be retried.")
+        else:
+            self.stderr.write(f"Job {id} failed.")
@@ -0,0 +1,132 @@
+"""
+Django command to report the import cost of booting the project, per app.
+"""
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)$")
+
+TARGETS = {
+    "setup": "import django; django.setup()",
+    "urls": (
+        "import django; django.setup(); "
+        "from django.urls import get_resolver; get_resolver().url_patterns"
+    ),
+    "wsgi": (
+        "import config.wsgi; "
+        "from django.urls import get_resolver; get_resolver().url_patterns"
+    ),
+}
+
+
+def parse_importtime(output):
+    """Return (module, self_us, cumulative_us) tuples from `-X importtime`."""
+    modules = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, module = match.groups()
+            modules.append((module, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def app_for_module(module, app_names):
+    """Return the installed app owning `module`, or its top-level package."""
+    for name in app_names:
+        if module == name or module.startswith(name + "."):
+            return name
+    package = module.split(".")[0]
+    if package.lstrip("_") in sys.stdlib_module_names:
+        return "(stdlib)"
+    return package
+
+
+def aggregate_by_app(modules, app_names):
+    """Sum the self import time of `modules` per owning app."""
+    app_names = sorted(app_names, key=len, reverse=True)
+    totals = defaultdict(lambda: [0, 0])
+    for module, self_us, _ in modules:
+        entry = totals[app_for_module(module, app_names)]
+        entry[0] += 1
+        entry[1] += self_us
+    return sorted(
+        ((app, count, self_us) for app, (count, self_us) in totals.items()),
+        key=lambda row: row[2],
+        reverse=True,
+    )
+
+
+class Command(BaseCommand):
+    """Django command to profile the imports done on startup."""
+
+    help = "Report per-app import cost of a cold start, like `python -X importtime`."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            choices=sorted(TARGETS),
+            default="urls",
+            help="What to boot: django.setup() only, setup plus the URLconf "
+            "(default), or the WSGI application plus the URLconf.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=15,
+            help="Number of slowest individual modules to list (0 to skip).",
+        )
+
+    def run_importtime(self, target):
+        """Boot `target` in a fresh interpreter and return its importtime log."""
+        env = os.environ.copy()
+        env.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", TARGETS[target]],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Profiling '{target}' failed:\n{result.stderr}")
+        return result.stderr
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        modules = parse_importtime(self.run_importtime(options["target"]))
+        if not modules:
+            raise CommandError("No import timings were reported.")
+
+        app_names = [app_config.name for app_config in apps.get_app_configs()]
+        rows = aggregate_by_app(modules, app_names)
+        total_us = sum(self_us for _, _, self_us in rows)
+
+        self.stdout.write(f"{'app':<40} {'modules':>8} {'self ms':>10} {'share':>7}")
+        for app, count, self_us in rows:
+            share = self_us / total_us * 100 if total_us else 0
+            self.stdout.write(
+                f"{app:<40} {count:>8} {self_us / 1000:>10.1f} {share:>6.1f}%"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'total':<40} {len(modules):>8} {total_us / 1000:>10.1f}"
+            )
+        )
+
+        if options["limit"] > 0:
+            self.stdout.write("")
+            self.stdout.write(f"{'slowest modules':<50} {'self ms':>10} {'cum ms':>10}")
+            slowest = sorted(modules, key=lambda row: row[1], reverse=True)
+            for module, self_us, cumulative_us in slowest[: options["limit"]]:
+                self.stdout.write(
+                    f"{module:<50} {self_us / 1000:>10.1f} "
+                    f"{cumulative_us / 1000:>10.1f}"
+                )
@@ -1,27 +1,62 @@
 """
 Django command to wait for the database to be available.
 """
+import random
 import time
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.db import DEFAULT_DB_ALIAS
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+from src.core.health import ping_database
+
+
+INITIAL_DELAY = 0.05
+MAX_DELAY = 1.0
 
 
 class Command(BaseCommand):
     """Django command to wait for database."""
 
+    help = "Wait until the database accepts connections, with backoff and deadline."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60.0,
+            help="Seconds to wait before giving up with a non-zero exit.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database alias to wait for.",
+        )
+
     def handle(self, *args, **options):
         """Entrypoint for command."""
         self.stdout.write("Waiting for database...")
-        db_up = False
-        while db_up is False:
+        deadline = time.monotonic() + options["timeout"]
+        delay = INITIAL_DELAY
+        while True:
             try:
-                self.check(databases=["default"])
-                db_up = True
+                ping_database(options["database"])
+                break
             except (Psycopg2OpError, OperationalError):
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after {options['timeout']:g} seconds."
+                    )
+                # Equal jitter: keep half the delay, randomize the other half so
+                # replicas starting together don't retry in lockstep.
+                pause = min(delay / 2 + random.uniform(0, delay / 2), remaining)
+                self.stdout.write(
+                    f"Database unavailable, waiting {pause:.2f} seconds..."
+                )
+                time.sleep(pause)
+                delay = min(delay * 2, MAX_DELAY)
 
         self.stdout.write(self.style.SUCCESS("Database available!"))
@@ -0,0 +1,443 @@
+"""
+Prometheus metrics, served by /metrics.
+
+Recording takes no lock: each thread adds to a dict of its own, and the
+dicts are only summed when the metrics are exported. With METRICS_DIR set,
+each process also writes its values to a file there, at most every
+METRICS_FLUSH_SECONDS after a request and when it exits, and /metrics sums
+the files of all processes, so whichever worker answers the scrape reports
+them all. Gauges are per process: they get a "pid" label and are left out
+once their process is gone. The counters and histograms of processes gone
+are merged into one file of the dead ones and their own files removed, so
+the directory doesn't grow with restarts nor a reused pid take over a file.
+"""
+import atexit
+import contextvars
+import fcntl
+import gc
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Any other method is reported as "other", clients choose them.
+METHODS = {"GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"}
+
+
+def _add(values, other):
+    for key, value in other.items():
+        values[key] = values.get(key, 0) + value
+
+
+def _number(value):
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    """
+    The metrics of the process and the values its threads recorded, keyed
+    by metric name, label values and part: "" for counters and gauges, the
+    bucket index or "sum" for histograms.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self.metrics = {}
+        self.reset()
+
+    def reset(self):
+        """Forget the values, e.g. those a forked child got from its parent."""
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.shards = []
+        self.retired = {}
+        self.next_flush = 0
+        self.flushed = False
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def shard(self):
+        """Return the values of the current thread."""
+        try:
+            return self.local.values
+        except AttributeError:
+            values = self.local.values = {}
+            with self.lock:
+                self.retire()
+                self.shards.append((threading.current_thread(), values))
+            return values
+
+    def retire(self):
+        """Fold the values of finished threads together, holding the lock."""
+        live = []
+        for thread, values in self.shards:
+            if thread.is_alive():
+                live.append((thread, values))
+            else:
+                _add(self.retired, values)
+        self.shards = live
+
+    def snapshot(self):
+        """Return the values of the process, summed over its threads."""
+        with self.lock:
+            self.retire()
+            values = dict(self.retired)
+            shards = [shard for _, shard in self.shards]
+        for shard in shards:
+            # Copying a dict doesn't let its thread in halfway.
+            _add(values, shard.copy())
+        for metric in self.metrics.values():
+            if metric.collect:
+                for labels, value in metric.collect():
+                    values[(metric.name, labels, "")] = value
+        return values
+
+    def path(self, pid):
+        return os.path.join(settings.METRICS_DIR, f"metrics-{pid}.json")
+
+    def read(self, path):
+        """Return the values in the file at `path`, empty if it's unreadable."""
+        try:
+            with open(path) as file:
+                rows = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return {
+            (name, tuple(labels), part): value for name, labels, part, value in rows
+        }
+
+    def write(self, path, values):
+        """Replace the file at `path` with `values`."""
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(
+                [
+                    [name, labels, part, value]
+                    for (name, labels, part), value in values.items()
+                ],
+                file,
+            )
+        os.replace(temporary, path)
+
+    def locked(self):
+        """Return the lock of the files of METRICS_DIR, held until it's closed."""
+        file = open(os.path.join(settings.METRICS_DIR, "metrics.lock"), "a")
+        fcntl.flock(file, fcntl.LOCK_EX)
+        return file
+
+    def bury(self, pid):
+        """
+        Merge the counters and histograms of the process `pid`, gone, into
+        the file of dead processes and remove its own file. Hold `locked`.
+        """
+        path = self.path(pid)
+        values = self.read(path)
+        if values:
+            dead = self.read(self.path("dead"))
+            for (name, labels, part), value in values.items():
+                metric = self.metrics.get(name)
+                if metric is None or metric.type != "gauge":
+                    key = (name, labels, part)
+                    dead[key] = dead.get(key, 0) + value
+            self.write(self.path("dead"), dead)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def flush(self):
+        """Write the values of the process to its file in METRICS_DIR."""
+        self.next_flush = time.monotonic() + settings.METRICS_FLUSH_SECONDS
+        path = self.path(os.getpid())
+        if not self.flushed:
+            self.flushed = True
+            # Left by a process gone that had the same pid.
+            if os.path.exists(path):
+                with self.locked():
+                    self.bury(os.getpid())
+        self.write(path, self.snapshot())
+
+    def maybe_flush(self):
+        """Flush if METRICS_DIR is set and the last flush is old enough."""
+        if settings.METRICS_DIR and time.monotonic() >= self.next_flush:
+            self.flush()
+
+    def collect(self):
+        """
+        Return the values of each process by pid, with those of the dead
+        ones under "dead", or of this one by None.
+        """
+        if not settings.METRICS_DIR:
+            return {None: self.snapshot()}
+        self.flush()
+        with self.locked():
+            for pid in self.pids():
+                if pid != "dead" and not _alive(pid):
+                    self.bury(pid)
+            return {pid: self.read(self.path(pid)) for pid in self.pids()}
+
+    def pids(self):
+        """Return the pids of the files in METRICS_DIR, and "dead" if it's there."""
+        pids = []
+        for name in os.listdir(settings.METRICS_DIR):
+            if name.startswith("metrics-") and name.endswith(".json"):
+                pid = name[8:-5]
+                pids.append(pid if pid == "dead" else int(pid))
+        return pids
+
+    def render(self):
+        """Return the metrics of all processes in the Prometheus text format."""
+        samples = {name: {} for name in self.metrics}
+        for pid, values in self.collect().items():
+            for (name, labels, part), value in values.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                if metric.type == "gauge" and pid is not None:
+                    labels += (str(pid),)
+                key = (labels, part)
+                samples[name][key] = samples[name].get(key, 0) + value
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            labelnames = metric.labelnames
+            if metric.type == "gauge" and settings.METRICS_DIR:
+                labelnames += ("pid",)
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            lines.extend(metric.render(samples[name], labelnames))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+os.register_at_fork(after_in_child=registry.reset)
+
+
+@atexit.register
+def _flush_at_exit():
+    if settings.configured and settings.METRICS_DIR:
+        registry.flush()
+
+
+class Metric:
+    """
+    A metric with label names, recorded by calling its methods or, when
+    `collect` is given, read by calling it, returning (labels, value) pairs.
+    """
+
+    type = None
+
+    def __init__(
+        self, name, documentation, labelnames=(), collect=None, registry=registry
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self.registry = registry
+        registry.register(self)
+
+    def render(self, samples, labelnames):
+        return [
+            f"{self.name}{_labels(labelnames, labels)} {_number(value)}"
+            for (labels, _), value in sorted(samples.items())
+        ]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        values = self.registry.shard()
+        key = (self.name, labels, "")
+        values[key] = values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, **kwargs
+    ):
+        super().__init__(name, documentation, labelnames, **kwargs)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        values = self.registry.shard()
+        key = (self.name, labels, bisect_left(self.buckets, value))
+        values[key] = values.get(key, 0) + 1
+        key = (self.name, labels, "sum")
+        values[key] = values.get(key, 0) + value
+
+    def render(self, samples, labelnames):
+        parts = {}
+        for (labels, part), value in samples.items():
+            parts.setdefault(labels, {})[part] = value
+        lines = []
+        for labels, values in sorted(parts.items()):
+            count = 0
+            for index, bound in enumerate(self.buckets + (math.inf,)):
+                count += values.get(index, 0)
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{_labels(labelnames + ('le',), labels + (_number(bound),))} "
+                    f"{_number(count)}"
+                )
+            labels = _labels(labelnames, labels)
+            lines.append(f"{self.name}_sum{labels} {_number(values.get('sum', 0))}")
+            lines.append(f"{self.name}_count{labels} {_number(count)}")
+        return lines
+
+
+def _resident_memory():
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+    except OSError:  # Only known on Linux.
+        return []
+    return [((), pages * os.sysconf("SC_PAGE_SIZE"))]
+
+
+def _cpu_seconds():
+    times = os.times()
+    return [((), times.user + times.system)]
+
+
+def _gc_stats(stat):
+    return lambda: [
+        ((str(generation),), stats[stat])
+        for generation, stats in enumerate(gc.get_stats())
+    ]
+
+
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP requests by URL name, method and status.",
+    ["view", "method", "status"],
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time to respond to HTTP requests.",
+    ["view", "status"],
+)
+http_request_queries = Histogram(
+    "http_request_db_queries",
+    "Database queries per HTTP request.",
+    ["view"],
+    buckets=COUNT_BUCKETS,
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Time of database queries, in and out of requests.",
+    ["alias"],
+    buckets=QUERY_BUCKETS,
+)
+auth_token_cache = Counter(
+    "auth_token_cache_total",
+    "Token authentications looked up in the cache, by result.",
+    ["result"],
+)
+Gauge(
+    "process_resident_memory_bytes",
+    "Resident memory size in bytes.",
+    collect=_resident_memory,
+)
+Counter(
+    "process_cpu_seconds_total",
+    "User and system CPU time in seconds.",
+    collect=_cpu_seconds,
+)
+Counter(
+    "python_gc_collections_total",
+    "Garbage collections by generation.",
+    ["generation"],
+    collect=_gc_stats("collections"),
+)
+Counter(
+    "python_gc_objects_collected_total",
+    "Objects collected by the garbage collector, by generation.",
+    ["generation"],
+    collect=_gc_stats("collected"),
+)
+Counter(
+    "python_gc_objects_uncollectable_total",
+    "Uncollectable objects found by the garbage collector, by generation.",
+    ["generation"],
+    collect=_gc_stats("uncollectable"),
+)
+
+
+_current_request = contextvars.ContextVar("current_request", default=None)
+
+
+class RequestMetrics:
+    """The measures of a request, from its creation until `finish`."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.token = _current_request.set(self)
+
+    def finish(self, request, response):
+        """Record the request answered by `response`."""
+        duration = time.perf_counter() - self.started
+        _current_request.reset(self.token)
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        method = request.method if request.method in METHODS else "other"
+        status = str(response.status_code)
+        http_requests.inc(view, method, status)
+        http_request_duration.observe(duration, view, status)
+        http_request_queries.observe(self.queries, view)
+        registry.maybe_flush()
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper timing queries, installed by src.core.signals."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        db_query_duration.observe(
+            time.perf_counter() - started, context["connection"].alias
+        )
+        current = _current_request.get()
+        if current is not None:
+            current.queries += 1
@@ -0,0 +1,208 @@
+"""
+Middleware of the core app.
+"""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .metrics import RequestMetrics
+from .profiling import STAFF_MODES, is_staff, profiling, requested_mode
+
+try:
+    import brotli
+except ImportError:  # Optional, responses are only gzipped without it.
+    brotli = None
+
+
+# Content types whose payloads are compressed already.
+COMPRESSED_TYPES = (
+    "image/",
+    "audio/",
+    "video/",
+    "font/woff",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/x-bzip2",
+    "application/x-7z-compressed",
+    "application/x-xz",
+    "application/zstd",
+)
+
+
+class GzipCompressor:
+    name = "gzip"
+
+    def __init__(self):
+        # wbits 16 + MAX_WBITS writes a gzip header and trailer.
+        self.compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    name = "br"
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+# In order of preference between equally accepted encodings.
+COMPRESSORS = [GzipCompressor] if brotli is None else [BrotliCompressor, GzipCompressor]
+
+
+def negotiate_compressor(accept_encoding):
+    """Return the compressor class the Accept-Encoding header prefers, or None."""
+    accepted = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        quality = 1.0
+        key, _, value = params.strip().partition("=")
+        if key.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0
+        accepted[name.strip().lower()] = quality
+    anything = accepted.get("*", 0)
+    # max() keeps the first of equally accepted compressors.
+    quality, compressor = max(
+        (
+            (accepted.get(compressor.name, anything), compressor)
+            for compressor in COMPRESSORS
+        ),
+        key=lambda accepted_compressor: accepted_compressor[0],
+    )
+    return compressor if quality > 0 else None
+
+
+def compress_stream(compressor, chunks):
+    """
+    Compress the chunks of a streaming response, flushing after each one so
+    that the client gets it without waiting for the compressor's block to fill.
+    """
+    for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses of at least COMPRESSION_MIN_SIZE bytes, and streaming
+    ones, with brotli (when installed) or gzip, as the client accepts.
+    Responses already encoded or of compressed content types are left be.
+    """
+
+    def process_response(self, request, response):
+        if not self.compressible(response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressor_class = negotiate_compressor(
+            request.headers.get("Accept-Encoding", "")
+        )
+        if compressor_class is None:
+            return response
+        compressor = compressor_class()
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                compressor, response.streaming_content
+            )
+            del response.headers["Content-Length"]
+        else:
+            content = compressor.compress(response.content) + compressor.finish()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        # The compressed bytes differ, but the representation is the same.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = compressor.name
+        return response
+
+    def compressible(self, response):
+        if response.has_header("Content-Encoding"):
+            return False
+        if response.get("Content-Type", "").startswith(COMPRESSED_TYPES):
+            return False
+        return (
+            response.streaming
+            or len(response.content) >= settings.COMPRESSION_MIN_SIZE
+        )
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Record the count and latency of requests by URL name and status, and
+    their database queries, see src.core.metrics. Put first, to time the
+    other middleware too.
+    """
+
+    def __call__(self, request):
+        if self._is_coroutine:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        response = self.get_response(request)
+        metrics.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        response = await self.get_response(request)
+        metrics.finish(request, response)
+        return response
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """
+    Profile the requests staff ask for and sampled ones, see
+    src.core.profiling. Not under ASGI: the profiler would only see the
+    event loop thread, with whatever other requests it runs meanwhile, and
+    not the thread running the view or its SQL. Asking for a profile there
+    gets an X-Profile-Skipped header saying so instead.
+    """
+
+    def __call__(self, request):
+        if self._is_coroutine:
+            return self.__acall__(request)
+        mode = requested_mode(request)
+        if mode in STAFF_MODES and not is_staff(request):
+            mode = None
+        with profiling(mode) as profiler:
+            if profiler is None:
+                return self.get_response(request)
+            with profiler.running():
+                response = self.get_response(request)
+        return profiler.respond(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if requested_mode(request) in STAFF_MODES:
+            response.headers["X-Profile-Skipped"] = "Not supported under ASGI."
+        return response
@@ -0,0 +1,27 @@
+# Generated by Django 4.1.4 on 2026-10-19 04:19
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_heartbeats(apps, schema_editor):
+    Job = apps.get_model("core", "Job")
+    Job.objects.using(schema_editor.connection.alias).filter(
+        status="running"
+    ).update(heartbeat_at=F("started_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+"""Reusable view mixins."""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from .routers import (
+    allow_replica_reads,
+    is_pinned_to_primary,
+    pin_to_primary,
+    replica_reads,
+)
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe-method requests from a read replica once the user is
+    authenticated, unless they wrote recently (read-your-writes).
+    Authentication itself always reads from the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads(False):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned_to_primary(request.user):
+            allow_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SparseFieldsetMixin:
+    """
+    Let safe-method requests trim the serializer to `?fields=a,b`, plus the
+    relations in `?expand=` (left out of sparse responses otherwise), and
+    load only those columns and relations. The serializer must take a
+    `fields` argument, see src.core.serializers.SparseFieldsetSerializerMixin.
+    """
+
+    # Relations that can be expanded; they're prefetched when serialized.
+    expandable_fields = []
+
+    def get_sparse_fields(self):
+        """Return the names of the requested fields, or None for all of them."""
+        if self.request.method not in SAFE_METHODS:
+            return None
+        params = self.request.query_params
+        expand = self._split_names(params.get("expand"))
+        unknown = expand - set(self.expandable_fields)
+        if "fields" not in params:
+            fields = None
+        else:
+            fields = self._split_names(params["fields"]) | expand
+            unknown |= fields - set(self.get_serializer_class().Meta.fields)
+        if unknown:
+            raise ValidationError(
+                {"fields": [f"Unknown fields: {', '.join(sorted(unknown))}."]}
+            )
+        return fields
+
+    def _split_names(self, value):
+        return {name for name in (value or "").split(",") if name}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            model = queryset.model
+            columns = {field.name for field in model._meta.concrete_fields} & fields
+            queryset = queryset.only(model._meta.pk.name, *columns)
+        relations = [
+            name for name in self.expandable_fields if fields is None or name in fields
+        ]
+        return queryset.prefetch_related(*relations)
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
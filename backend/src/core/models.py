@@ -0,0 +1,146 @@
+"""
+Database models.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    CASCADE,
+    CharField,
+    DateTimeField,
+    F,
+    ForeignKey,
+    Index,
+    JSONField,
+    Model,
+    OneToOneField,
+    PositiveIntegerField,
+    Q,
+    QuerySet,
+    TextField,
+    TextChoices,
+)
+from django.utils import timezone
+
+
+class UserShard(Model):
+    """Shard holding a user's data, when it isn't the one given by the hash."""
+
+    user = OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=CASCADE,
+        primary_key=True,
+        related_name="shard",
+    )
+    alias = CharField(max_length=64)
+
+    def __str__(self):
+        return f"user.id={self.user_id}, alias={self.alias}"
+
+
+class JobQuerySet(QuerySet):
+    def enqueue(self, name, payload=None, user=None, delay=0):
+        """Queue the job registered as `name` to run with `payload`."""
+        return self.create(
+            name=name,
+            payload=payload or {},
+            user=user,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+    def claim(self, limit):
+        """
+        Mark up to `limit` due jobs as running and return their ids. Rows
+        locked by other workers are skipped where the database can lock
+        rows (not on SQLite, which locks the whole database on write).
+        """
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            ids = list(
+                self.select_for_update(skip_locked=True)
+                .filter(status=Job.Status.QUEUED, run_at__lte=now)
+                .order_by("run_at")
+                .values_list("id", flat=True)[:limit]
+            )
+            # Re-checking the status keeps each claim exclusive without row
+            # locks: a job claimed meanwhile no longer matches.
+            return [
+                id
+                for id in ids
+                if self.filter(id=id, status=Job.Status.QUEUED).update(
+                    status=Job.Status.RUNNING,
+                    attempts=F("attempts") + 1,
+                    started_at=now,
+                    heartbeat_at=now,
+                )
+            ]
+
+    def heartbeat(self, ids):
+        """Record that the running jobs `ids` still have a live worker."""
+        return self.filter(id__in=ids, status=Job.Status.RUNNING).update(
+            heartbeat_at=timezone.now()
+        )
+
+    def requeue_lost(self, timeout):
+        """
+        Requeue the running jobs without a heartbeat for more than `timeout`
+        seconds, whose worker is presumed dead, or fail them if out of
+        attempts. Return the numbers of jobs requeued and failed.
+        """
+        now = timezone.now()
+        lost = self.filter(
+            status=Job.Status.RUNNING,
+            heartbeat_at__lt=now - timedelta(seconds=timeout),
+        )
+        requeued = lost.filter(attempts__lt=F("max_attempts")).update(
+            status=Job.Status.QUEUED, run_at=now, error="Worker lost."
+        )
+        failed = lost.update(
+            status=Job.Status.FAILED, finished_at=now, error="Worker lost."
+        )
+        return requeued, failed
+
+
+def default_max_attempts():
+    return settings.JOB_MAX_ATTEMPTS
+
+
+class Job(Model):
+    """Background job, queued until a worker (run_worker command) runs it."""
+
+    class Status(TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    name = CharField(max_length=255)
+    payload = JSONField(default=dict)
+    user = ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, null=True)
+    status = CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    attempts = PositiveIntegerField(default=0)
+    max_attempts = PositiveIntegerField(default=default_max_attempts)
+    run_at = DateTimeField(default=timezone.now)
+    created_at = DateTimeField(auto_now_add=True)
+    started_at = DateTimeField(null=True)
+    # Refreshed by the worker while the job runs, see JobQuerySet.heartbeat.
+    heartbeat_at = DateTimeField(null=True)
+    finished_at = DateTimeField(null=True)
+    result = JSONField(null=True)
+    error = TextField(blank=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Due jobs in claim order; finished jobs stay out of the index.
+            Index(
+                fields=["run_at"],
+                name="core_job_queued_idx",
+                condition=Q(status="queued"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name}#{self.id} ({self.status})"
@@ -0,0 +1,289 @@
+"""
+Per-request profiling.
+
+A profiled request runs under cProfile with every SQL statement it sends
+timed, and its report (a call tree and the statements) is stored in
+PROFILE_DIR, of which only the newest PROFILE_MAX_STORED are kept. Staff
+opt in with an "X-Profile: 1" header or "?profile=1" flag ("true" works
+too, other values are ignored), getting the id of the stored report in the
+X-Profile-Id header, or its text instead of the response with "inline";
+and PROFILE_SAMPLE_RATE of all requests are profiled as well. Statements
+are stored without their parameters. See the `profiles` command to read
+the stored reports. Requests served under ASGI aren't profiled, see
+ProfilingMiddleware.
+"""
+import cProfile
+import json
+import os
+import pstats
+import random
+import secrets
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+
+# Calls taking less of the request than this are left out of the tree.
+MIN_FRACTION = 0.01
+MAX_DEPTH = 60
+
+# Only one profile at a time: from Python 3.12 cProfile can't run in two
+# threads at once, and it bounds the cost of profiling.
+_running = threading.Lock()
+
+
+# Modes staff ask for, see requested_mode.
+STAFF_MODES = {"inline", "store"}
+# Values of the X-Profile header or profile flag asking for each of them.
+FLAGS = {"1": "store", "true": "store", "inline": "inline"}
+
+
+def requested_mode(request):
+    """
+    Return how to profile the request: "inline" or "store" when asked for
+    (which only staff may do, see is_staff), "sample" when picked by
+    PROFILE_SAMPLE_RATE, or None.
+    """
+    flag = request.headers.get("X-Profile") or request.GET.get("profile") or ""
+    if flag.lower() in FLAGS:
+        return FLAGS[flag.lower()]
+    if random.random() < settings.PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+def is_staff(request):
+    """Return whether the request authenticates a staff user, before DRF does."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        user_auth = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return bool(user_auth) and user_auth[0].is_staff
+
+
+class RequestProfiler:
+    """Profile of the code and SQL statements run inside `running`."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.profile = cProfile.Profile()
+        self.queries = []
+
+    def capture(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "many": many,
+                    "ms": (time.perf_counter() - started) * 1000,
+                }
+            )
+
+    @contextmanager
+    def running(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self.capture))
+            started = time.perf_counter()
+            self.profile.enable()
+            try:
+                yield
+            finally:
+                self.profile.disable()
+                self.duration = time.perf_counter() - started
+
+    def report(self, request, response):
+        """Return the report of the request answered by `response`."""
+        match = request.resolver_match
+        user = getattr(request, "user", None)
+        return {
+            "id": "{:%Y%m%dT%H%M%S%f}-{}".format(
+                datetime.now(timezone.utc), secrets.token_hex(3)
+            ),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "user": user.pk if user is not None and user.is_authenticated else None,
+            "sampled": self.mode == "sample",
+            "ms": self.duration * 1000,
+            "queries": self.queries,
+            "tree": call_tree(self.profile, self.duration),
+        }
+
+    def respond(self, request, response):
+        """Store the report and return the response to send with it."""
+        report = self.report(request, response)
+        try:
+            store(report)
+        except OSError:
+            stored = False
+        else:
+            stored = True
+        if self.mode == "inline":
+            response = HttpResponse(
+                format_report(report), content_type="text/plain; charset=utf-8"
+            )
+        if stored and self.mode != "sample":
+            response.headers["X-Profile-Id"] = report["id"]
+        return response
+
+
+# Prefixes left out of file names, longest first.
+PATH_PREFIXES = (
+    f"site-packages{os.sep}",
+    f"{os.path.dirname(os.__file__)}{os.sep}",
+)
+
+
+def _function(func):
+    filename, line, name = func
+    if filename == "~":
+        return name
+    for prefix in (f"{settings.BASE_DIR}{os.sep}",) + PATH_PREFIXES:
+        if prefix in filename:
+            filename = filename.split(prefix, 1)[1]
+            break
+    return f"{filename}:{line}({name})"
+
+
+def call_tree(profile, duration):
+    """
+    Return the calls of `profile` as a tree of {"function", "calls", "ms",
+    "own_ms", "children"} nodes, leaving out calls under MIN_FRACTION of
+    `duration`. cProfile only keeps totals per caller and callee, so below
+    a function called from several places, each place gets the share of its
+    callees in proportion to the time spent in it from there.
+    """
+    stats = pstats.Stats(profile).stats
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge
+    least = duration * MIN_FRACTION
+
+    def node(func, calls, own, cumulative, seen):
+        children = []
+        total = stats[func][3]
+        if len(seen) < MAX_DEPTH and total:
+            share = min(1, cumulative / total)
+            edges = sorted(callees[func].items(), key=lambda item: -item[1][3])
+            children = [
+                node(
+                    callee,
+                    max(1, round(nc * share)),
+                    tt * share,
+                    ct * share,
+                    seen | {callee},
+                )
+                for callee, (_, nc, tt, ct) in edges
+                if ct * share >= least and callee not in seen
+            ]
+        return {
+            "function": _function(func),
+            "calls": calls,
+            "ms": cumulative * 1000,
+            "own_ms": own * 1000,
+            "children": children,
+        }
+
+    # The functions called right where profiling started have no callers.
+    roots = sorted(
+        (func for func, row in stats.items() if not row[4] and row[3] >= least),
+        key=lambda func: -stats[func][3],
+    )
+    return [node(func, *stats[func][1:4], {func}) for func in roots]
+
+
+def format_report(report):
+    """Return the report as text: a summary, the call tree and the SQL."""
+    lines = [
+        f"{report['method']} {report['path']} -> {report['status']} "
+        f"in {report['ms']:.1f} ms ({report['view'] or 'no view'})",
+        f"profile {report['id']}, {report['created']}"
+        + (", sampled" if report["sampled"] else ""),
+        "",
+        f"{'ms':>9} {'own ms':>9} {'calls':>7}  function",
+    ]
+
+    def walk(nodes, depth):
+        for node in nodes:
+            lines.append(
+                f"{node['ms']:>9.1f} {node['own_ms']:>9.1f} {node['calls']:>7}  "
+                f"{'  ' * depth}{node['function']}"
+            )
+            walk(node["children"], depth + 1)
+
+    walk(report["tree"], 0)
+    queries = report["queries"]
+    total = sum(query["ms"] for query in queries)
+    lines += ["", f"{len(queries)} SQL statements in {total:.1f} ms", ""]
+    for query in queries:
+        many = " (many)" if query["many"] else ""
+        lines.append(f"{query['ms']:>9.1f}  [{query['alias']}]{many} {query['sql']}")
+    return "\n".join(lines) + "\n"
+
+
+def store(report):
+    """Write the report to PROFILE_DIR and drop the oldest beyond the limit."""
+    directory = settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{report['id']}.json")
+    with open(path + ".tmp", "w") as file:
+        json.dump(report, file)
+    os.replace(path + ".tmp", path)
+    for id in stored_ids()[settings.PROFILE_MAX_STORED:]:
+        try:
+            os.remove(os.path.join(directory, f"{id}.json"))
+        except FileNotFoundError:  # Removed by another process meanwhile.
+            pass
+
+
+def stored_ids():
+    """Return the ids of the stored profiles, newest first."""
+    try:
+        names = os.listdir(settings.PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (name[:-5] for name in names if name.endswith(".json")), reverse=True
+    )
+
+
+def load(id):
+    """Return the stored report `id`, raising FileNotFoundError if it's gone."""
+    if os.sep in id or id.startswith("."):
+        raise FileNotFoundError(id)
+    with open(os.path.join(settings.PROFILE_DIR, f"{id}.json")) as file:
+        return json.load(file)
+
+
+@contextmanager
+def profiling(mode):
+    """
+    Yield a RequestProfiler for `mode` to run the request in, or None if
+    there's no mode or another profile is running.
+    """
+    if mode is None or not _running.acquire(blocking=False):
+        yield None
+        return
+    try:
+        yield RequestProfiler(mode)
+    finally:
+        _running.release()
@@ -0,0 +1,128 @@
+"""
+Database routers.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .sharding import is_sharded, shard_for_user, sharding_enabled
+
+
+PIN_CACHE_KEY = "db-primary-pin:{}"
+
+_read_from_replica = ContextVar("read_from_replica", default=False)
+
+
+def reading_from_replica():
+    """Return whether reads in the current context may go to a replica."""
+    return _read_from_replica.get()
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Allow (or forbid) reads from a replica inside the block."""
+    token = _read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+def allow_replica_reads():
+    """Let the rest of the enclosing `replica_reads` block use a replica."""
+    _read_from_replica.set(True)
+
+
+def pin_to_primary(user):
+    """
+    Send the user's reads to the primary until replicas have caught up.
+    Pins live in the cache, which must be shared by all workers for reads
+    on one to see writes on another (checked by src.core.checks). Without
+    replicas, there's nothing to pin.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return
+    cache.set(
+        PIN_CACHE_KEY.format(user.pk), True, settings.DATABASE_REPLICA_PIN_SECONDS
+    )
+
+
+def is_pinned_to_primary(user):
+    """Return whether the user wrote recently enough to read from the primary."""
+    if not settings.DATABASE_REPLICAS:
+        return False
+    return bool(cache.get(PIN_CACHE_KEY.format(user.pk)))
+
+
+async def ais_pinned_to_primary(user):
+    """Async `is_pinned_to_primary`."""
+    if not settings.DATABASE_REPLICAS:
+        return False
+    return bool(await cache.aget(PIN_CACHE_KEY.format(user.pk)))
+
+
+def _location(settings_dict):
+    return tuple(settings_dict[key] for key in ("ENGINE", "HOST", "PORT", "NAME"))
+
+
+def available_replicas():
+    """
+    Return the configured replica aliases, skipping any that point at the
+    primary database itself, as test mirrors do.
+    """
+    primary = _location(connections[DEFAULT_DB_ALIAS].settings_dict)
+    return [
+        alias
+        for alias in settings.DATABASE_REPLICAS
+        if _location(connections[alias].settings_dict) != primary
+    ]
+
+
+class ReplicaRouter:
+    """
+    Send reads to a random read replica when the current context allows it
+    (see `replica_reads`), and everything else to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and reading_from_replica():
+            replicas = available_replicas()
+            if replicas:
+                return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Replicas hold the same data as the primary."""
+        return True
+
+
+class ShardRouter:
+    """
+    Keep rows of the sharded apps on their user's shard, and lookups of
+    everything else (e.g. `recipe.user`) off the shards.
+    """
+
+    def _db_for_model(self, model, instance=None, **hints):
+        if not sharding_enabled():
+            return None
+        instance_db = instance._state.db if instance is not None else None
+        if not is_sharded(model):
+            if instance_db in settings.DATABASE_SHARDS:
+                return DEFAULT_DB_ALIAS
+            return None
+        if instance_db:
+            return instance_db
+        user_id = getattr(instance, "user_id", None)
+        if user_id is not None:
+            return shard_for_user(user_id)
+        return None
+
+    db_for_read = _db_for_model
+    db_for_write = _db_for_model
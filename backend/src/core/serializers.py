@@ -0,0 +1,82 @@
+"""Reusable serializer mixins and serializers of the core views."""
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .batch import resolve_batch_path
+from .models import Job
+
+
+class SparseFieldsetSerializerMixin:
+    """Take a `fields` argument naming the only fields to serialize."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """Serializer for one sub-request of a batch."""
+
+    method = serializers.ChoiceField(["GET", "POST", "PUT", "PATCH", "DELETE"])
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False, write_only=True)
+
+    def validate(self, attrs):
+        """Resolve the path to a view batches may call."""
+        attrs["match"] = resolve_batch_path(attrs["path"])
+        if attrs["match"] is None:
+            raise serializers.ValidationError({"path": "This path can't be batched."})
+        return attrs
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    """Serializer for the response to one sub-request of a batch."""
+
+    status = serializers.IntegerField()
+    body = serializers.JSONField(allow_null=True)
+
+
+class BatchSerializer(serializers.Serializer):
+    """Serializer for a batch of sub-requests."""
+
+    requests = BatchRequestSerializer(many=True, write_only=True, allow_empty=False)
+    responses = BatchResponseSerializer(many=True, read_only=True)
+
+    def validate_requests(self, value):
+        """Cap the number of sub-requests and of writes among them."""
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"Ensure this field has no more than "
+                f"{settings.BATCH_MAX_REQUESTS} requests."
+            )
+        writes = sum(item["method"] not in SAFE_METHODS for item in value)
+        if writes > settings.BATCH_MAX_WRITES:
+            raise serializers.ValidationError(
+                f"Ensure this field has no more than "
+                f"{settings.BATCH_MAX_WRITES} write requests."
+            )
+        return value
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer for background jobs."""
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "name",
+            "status",
+            "attempts",
+            "max_attempts",
+            "run_at",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "result",
+            "error",
+        ]
+        read_only_fields = fields
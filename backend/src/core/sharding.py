@@ -0,0 +1,59 @@
+"""
+Placement of the sharded apps' data (settings.SHARDED_APPS) by user id.
+
+A user's rows live on `settings.DATABASE_SHARDS[crc32(user_id) % N]`,
+unless a UserShard row says otherwise (see the rebalance_user command).
+Queries on sharded models should be made with `.using(shard_for_user(...))`;
+ShardRouter only covers queries carrying an instance hint.
+"""
+import zlib
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import UserShard
+
+
+def is_sharded(model):
+    """Return whether rows of `model` are split across shards."""
+    return model._meta.app_label in settings.SHARDED_APPS
+
+
+def sharding_enabled():
+    """Return whether more than one shard is configured."""
+    return len(settings.DATABASE_SHARDS) > 1
+
+
+def hashed_shard(user_id):
+    """Return the shard a user's data lives on unless moved elsewhere."""
+    shards = settings.DATABASE_SHARDS
+    return shards[zlib.crc32(str(user_id).encode()) % len(shards)]
+
+
+def shard_for_user(user_id):
+    """
+    Return the alias of the shard holding the user's data, or None when
+    sharding is disabled so that the other routers (replicas) can decide.
+    """
+    if not sharding_enabled():
+        return None
+    alias = (
+        UserShard.objects.using(DEFAULT_DB_ALIAS)
+        .filter(user_id=user_id)
+        .values_list("alias", flat=True)
+        .first()
+    )
+    return alias or hashed_shard(user_id)
+
+
+async def ashard_for_user(user_id):
+    """Async `shard_for_user`."""
+    if not sharding_enabled():
+        return None
+    alias = await (
+        UserShard.objects.using(DEFAULT_DB_ALIAS)
+        .filter(user_id=user_id)
+        .values_list("alias", flat=True)
+        .afirst()
+    )
+    return alias or hashed_shard(user_id)
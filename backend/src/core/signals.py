@@ -0,0 +1,41 @@
+"""Signal handlers for the core app."""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import forget_tokens
+from .metrics import record_query
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to new SQLite connections when enabled."""
+    if connection.vendor != "sqlite" or not settings.SQLITE_TUNING:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    """Record the queries of new connections in the metrics."""
+    # The same connection object reconnects, keeping its wrappers.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_user_tokens(sender, instance, **kwargs):
+    """Drop the cached copies of a changed user, see CachedTokenAuthentication."""
+    if settings.AUTH_TOKEN_CACHE_SECONDS:
+        forget_tokens(Token.objects.filter(user=instance).values_list("key", flat=True))
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    """Drop the cached user of a deleted token."""
+    if settings.AUTH_TOKEN_CACHE_SECONDS:
+        forget_tokens([instance.key])
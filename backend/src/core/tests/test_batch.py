@@ -0,0 +1,112 @@
+"""
+Tests for the batch API.
+"""
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from src.recipe.models import Recipe
+from src.recipe.tests.services import (
+    RECIPE_LIST_URL,
+    TAG_LIST_URL,
+    create_recipe,
+    create_recipe_detail_url,
+    create_user,
+)
+
+
+BATCH_URL = reverse("core:batch")
+ME_URL = reverse("user:me")
+
+
+class BatchTest(APITestCase, APIClient):
+    """Tests POST a batch of requests."""
+
+    def setUp(self):
+        """Creates client authenticated with a token, user with a recipe."""
+        self.client = APIClient()
+        self.user = create_user()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.recipe = create_recipe(user=self.user)
+
+    def batch(self, *requests):
+        return self.client.post(BATCH_URL, {"requests": requests}, format="json")
+
+    def test_batch_reads(self):
+        """Test sub-requests run in order, authenticated as the batch."""
+        # The token lookup, then one query per sub-request but the first.
+        with self.assertNumQueries(4):
+            response = self.batch(
+                {"method": "GET", "path": ME_URL},
+                {"method": "GET", "path": TAG_LIST_URL},
+                {"method": "GET", "path": f"{RECIPE_LIST_URL}?fields=id,title"},
+                {"method": "GET", "path": create_recipe_detail_url(0)},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        responses = response.data["responses"]
+        self.assertEqual(
+            [item["status"] for item in responses], [200, 200, 200, 404]
+        )
+        self.assertEqual(responses[0]["body"]["email"], self.user.email)
+        self.assertEqual(responses[1]["body"], [])
+        self.assertEqual(
+            responses[2]["body"], [{"id": self.recipe.id, "title": self.recipe.title}]
+        )
+
+    def test_batch_authenticated_once(self):
+        """Test the token is looked up once, however many sub-requests."""
+        for count in (1, 5):
+            with self.assertNumQueries(1):
+                response = self.batch(*[{"method": "GET", "path": ME_URL}] * count)
+            self.assertEqual(
+                [item["status"] for item in response.data["responses"]],
+                [200] * count,
+            )
+
+    def test_batch_writes(self):
+        """Test writes apply and later sub-requests see them."""
+        response = self.batch(
+            {
+                "method": "PATCH",
+                "path": create_recipe_detail_url(self.recipe.id),
+                "body": {"title": "New"},
+            },
+            {"method": "DELETE", "path": create_recipe_detail_url(self.recipe.id)},
+            {"method": "GET", "path": RECIPE_LIST_URL},
+        )
+
+        responses = response.data["responses"]
+        self.assertEqual([item["status"] for item in responses], [200, 204, 200])
+        self.assertEqual(responses[0]["body"]["title"], "New")
+        self.assertEqual(responses[2]["body"], [])
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(BATCH_MAX_REQUESTS=2, BATCH_MAX_WRITES=1)
+    def test_batch_limits(self):
+        """Test too many requests or writes reject the whole batch."""
+        delete = {"method": "DELETE", "path": create_recipe_detail_url(self.recipe.id)}
+        get = {"method": "GET", "path": RECIPE_LIST_URL}
+
+        for requests in ([], [get, get, get], [delete, delete]):
+            response = self.batch(*requests)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Recipe.objects.exists())
+
+    def test_batch_path_not_allowed(self):
+        """Test only the recipe, tag and user routes can be batched."""
+        for path in (BATCH_URL, reverse("user:token"), "/nowhere/"):
+            response = self.batch({"method": "GET", "path": path})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_auth_required(self):
+        """Test auth is required."""
+        self.client.credentials()
+
+        response = self.batch({"method": "GET", "path": ME_URL})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,60 @@
+"""
+Tests for the system checks of the core app.
+"""
+from django.test import SimpleTestCase, override_settings
+
+from src.core import checks
+
+
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+SHARED_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "cache",
+    }
+}
+
+
+class SharedCacheChecksTests(SimpleTestCase):
+    """Test features sharing state between workers require a shared cache."""
+
+    @override_settings(DATABASE_REPLICAS=["replica1"], CACHES=LOCAL_CACHE)
+    def test_replicas_local_cache(self):
+        """Test replicas with a per-process cache are an error."""
+        errors = checks.check_replica_pins(None)
+
+        self.assertEqual([error.id for error in errors], ["core.E001"])
+
+    @override_settings(DATABASE_REPLICAS=["replica1"], CACHES=SHARED_CACHE)
+    def test_replicas_shared_cache(self):
+        """Test replicas with a shared cache pass."""
+        self.assertEqual(checks.check_replica_pins(None), [])
+
+    @override_settings(DATABASE_REPLICAS=[], CACHES=LOCAL_CACHE)
+    def test_no_replicas(self):
+        """Test the local cache is fine without replicas."""
+        self.assertEqual(checks.check_replica_pins(None), [])
+
+    @override_settings(AUTH_TOKEN_CACHE_SECONDS=60, CACHES=LOCAL_CACHE)
+    def test_token_cache_local_cache(self):
+        """Test caching tokens in a per-process cache is an error."""
+        errors = checks.check_token_cache(None)
+
+        self.assertEqual([error.id for error in errors], ["core.E002"])
+
+    @override_settings(AUTH_TOKEN_CACHE_SECONDS=60, CACHES=SHARED_CACHE)
+    def test_token_cache_shared_cache(self):
+        """Test caching tokens in a shared cache passes."""
+        self.assertEqual(checks.check_token_cache(None), [])
+
+    @override_settings(THROTTLE_STORE="cache", CACHES=LOCAL_CACHE)
+    def test_throttle_store_local_cache(self):
+        """Test throttle buckets in a per-process cache are an error."""
+        errors = checks.check_throttle_store(None)
+
+        self.assertEqual([error.id for error in errors], ["core.E003"])
+
+    @override_settings(THROTTLE_STORE="cache", CACHES=SHARED_CACHE)
+    def test_throttle_store_shared_cache(self):
+        """Test throttle buckets in a shared cache pass."""
+        self.assertEqual(checks.check_throttle_store(None), [])
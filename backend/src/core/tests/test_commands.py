@@ -1,35 +1,107 @@
 """
 Test custom Django management commands.
 """
+from io import StringIO
+from itertools import count
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import SimpleTestCase
 
+from src.core.management.commands.startup_profile import (
+    aggregate_by_app,
+    parse_importtime,
+)
 
-@patch("src.core.management.commands.wait_for_db.Command.check")
+
+@patch("src.core.management.commands.wait_for_db.ping_database")
 class CommandTests(SimpleTestCase):
     """Test commands."""
 
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_ping):
         """Test waiting for database if database ready."""
-        patched_check.return_value = True
+        patched_ping.return_value = None
 
         call_command("wait_for_db")
 
-        patched_check.assert_called_once_with(databases=["default"])
+        patched_ping.assert_called_once_with("default")
 
     @patch("time.sleep")
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(self, patched_sleep, patched_ping):
         """Test waiting for database when getting OperationalError."""
-        patched_check.side_effect = (
-            [Psycopg2OpError] * 2 + [OperationalError] * 3 + [True]
+        patched_ping.side_effect = (
+            [Psycopg2OpError] * 2 + [OperationalError] * 3 + [None]
         )
 
         call_command("wait_for_db")
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=["default"])
+        self.assertEqual(patched_ping.call_count, 6)
+        patched_ping.assert_called_with("default")
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertEqual(len(delays), 5)
+        self.assertTrue(all(delay < 1 for delay in delays))
+        self.assertLess(delays[0], delays[-1])
+
+    @patch("time.sleep")
+    @patch("time.monotonic")
+    def test_wait_for_db_timeout(self, patched_monotonic, patched_sleep, patched_ping):
+        """Test waiting for database gives up once the deadline has passed."""
+        patched_monotonic.side_effect = count(0, 2)
+        patched_ping.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command("wait_for_db", timeout=5)
+
+        self.assertEqual(patched_ping.call_count, 3)
+
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       300 |        300 |     django.utils.crypto
+import time:       200 |        500 |   django.contrib.auth.models
+import time:       100 |        600 | src.recipe.models
+import time:        50 |         50 | json
+import time:       400 |        400 | yaml
+"""
+
+
+class StartupProfileTests(SimpleTestCase):
+    """Test the startup_profile command."""
+
+    def test_parse_and_aggregate_by_app(self):
+        """Test import times are summed per installed app."""
+        modules = parse_importtime(IMPORTTIME_OUTPUT)
+        self.assertEqual(len(modules), 5)
+        self.assertEqual(modules[1], ("django.contrib.auth.models", 200, 500))
+
+        rows = aggregate_by_app(modules, ["django.contrib.auth", "src.recipe"])
+
+        self.assertEqual(
+            rows,
+            [
+                ("yaml", 1, 400),
+                ("django", 1, 300),
+                ("django.contrib.auth", 1, 200),
+                ("src.recipe", 1, 100),
+                ("(stdlib)", 1, 50),
+            ],
+        )
+
+    @patch(
+        "src.core.management.commands.startup_profile.Command.run_importtime",
+        return_value=IMPORTTIME_OUTPUT,
+    )
+    def test_startup_profile_report(self, patched_run):
+        """Test the command prints a per-app report."""
+        out = StringIO()
+
+        call_command("startup_profile", target="setup", limit=2, stdout=out)
+
+        patched_run.assert_called_once_with("setup")
+        report = out.getvalue()
+        self.assertIn("src.recipe", report)
+        self.assertIn("total", report)
+        self.assertIn("django.utils.crypto", report)
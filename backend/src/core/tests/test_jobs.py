@@ -0,0 +1,267 @@
+"""
+Tests for background jobs.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from src.core.jobs import register, run_job
+from src.core.models import Job
+from src.recipe.models import Tag
+from src.recipe.tests.services import create_recipe, create_tag, create_user
+
+
+JOBS_URL = reverse("core:job-list")
+
+calls = []
+
+
+@register("test.add")
+def add(a, b):
+    calls.append((a, b))
+    return a + b
+
+
+@register("test.fail")
+def fail():
+    raise ValueError("Boom.")
+
+
+@register("test.lose")
+def lose(job_id):
+    """Make the job look like one left running by a dead worker."""
+    Job.objects.filter(id=job_id).update(
+        status=Job.Status.RUNNING, heartbeat_at=timezone.now() - timedelta(days=1)
+    )
+
+
+@register("test.overtaken")
+def overtaken(job_id):
+    """Have the running job requeued as lost, and claimed again."""
+    lose(job_id)
+    Job.objects.requeue_lost(60)
+    Job.objects.claim(1)
+    return "stale"
+
+
+def create_job_detail_url(job_id):
+    return reverse("core:job-detail", args=(job_id,))
+
+
+class JobQueueTests(TestCase):
+    """Test queueing and running jobs."""
+
+    def test_claim(self):
+        """Test due jobs are claimed once, in order."""
+        first = Job.objects.enqueue("test.add", {"a": 1, "b": 2})
+        second = Job.objects.enqueue("test.add", {"a": 3, "b": 4})
+        Job.objects.enqueue("test.add", {"a": 5, "b": 6}, delay=60)
+
+        self.assertEqual(Job.objects.claim(1), [first.id])
+        self.assertEqual(Job.objects.claim(10), [second.id])
+        self.assertEqual(Job.objects.claim(10), [])
+        first.refresh_from_db()
+        self.assertEqual(first.status, Job.Status.RUNNING)
+        self.assertEqual(first.attempts, 1)
+
+    def test_run_job(self):
+        """Test a job is called with its payload and its result stored."""
+        job = Job.objects.enqueue("test.add", {"a": 1, "b": 2})
+        Job.objects.claim(1)
+
+        self.assertEqual(run_job(job.id), Job.Status.SUCCEEDED)
+
+        job.refresh_from_db()
+        self.assertEqual(job.result, 3)
+        self.assertIsNotNone(job.finished_at)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_BACKOFF_SECONDS=10)
+    def test_run_job_retries(self):
+        """Test a failing job is retried with backoff until out of attempts."""
+        job = Job.objects.enqueue("test.fail")
+        Job.objects.claim(1)
+
+        self.assertEqual(run_job(job.id), Job.Status.QUEUED)
+        job.refresh_from_db()
+        self.assertIn("ValueError: Boom.", job.error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=9))
+        self.assertEqual(Job.objects.claim(1), [])
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        Job.objects.claim(1)
+        self.assertEqual(run_job(job.id), Job.Status.FAILED)
+
+    def test_run_unknown_job(self):
+        """Test a job nobody registered fails."""
+        job = Job.objects.create(name="test.unknown", max_attempts=1)
+        Job.objects.claim(1)
+
+        self.assertEqual(run_job(job.id), Job.Status.FAILED)
+        job.refresh_from_db()
+        self.assertIn("Unknown job 'test.unknown'.", job.error)
+
+    def test_requeue_lost(self):
+        """Test jobs without a recent heartbeat are requeued or failed."""
+        long_ago = timezone.now() - timedelta(seconds=61)
+        for attempts in (1, 3):
+            Job.objects.create(
+                name="test.add",
+                status=Job.Status.RUNNING,
+                attempts=attempts,
+                max_attempts=3,
+                started_at=long_ago,
+                heartbeat_at=long_ago,
+            )
+        alive = Job.objects.create(
+            name="test.add",
+            status=Job.Status.RUNNING,
+            started_at=long_ago,
+            heartbeat_at=long_ago,
+        )
+        self.assertEqual(Job.objects.heartbeat([alive.id]), 1)
+
+        self.assertEqual(Job.objects.requeue_lost(60), (1, 1))
+        self.assertEqual(
+            sorted(Job.objects.values_list("status", flat=True)),
+            [Job.Status.FAILED, Job.Status.QUEUED, Job.Status.RUNNING],
+        )
+        alive.refresh_from_db()
+        self.assertEqual(alive.status, Job.Status.RUNNING)
+
+    def test_overtaken_run_dropped(self):
+        """Test a run requeued as lost doesn't overwrite the next attempt."""
+        job = Job.objects.enqueue("test.overtaken")
+        Job.objects.claim(1)
+        Job.objects.filter(id=job.id).update(payload={"job_id": job.id})
+
+        self.assertIsNone(run_job(job.id))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.RUNNING)
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNone(job.result)
+
+
+class RunWorkerTests(TransactionTestCase):
+    """Test the run_worker command."""
+
+    def run_worker(self, *args):
+        """
+        Run the worker until no job is due, return its output. Jobs run one
+        at a time, as concurrent writes to SQLite's in-memory test database
+        fail instead of waiting for each other.
+        """
+        out = StringIO()
+        call_command("run_worker", "--once", "--concurrency", "1", *args, stdout=out)
+        return out.getvalue()
+
+    def test_run_worker_once(self):
+        """Test the worker runs every due job, then exits."""
+        calls.clear()
+        jobs = [Job.objects.enqueue("test.add", {"a": i, "b": 1}) for i in range(5)]
+        Job.objects.enqueue("test.fail", delay=60)
+
+        out = self.run_worker()
+
+        self.assertEqual(sorted(calls), [(i, 1) for i in range(5)])
+        for job in jobs:
+            self.assertIn(f"Job {job.id} succeeded.", out)
+        self.assertEqual(Job.objects.filter(status=Job.Status.QUEUED).count(), 1)
+
+    def test_run_worker_requeues_lost(self):
+        """Test the worker keeps requeuing jobs lost while it runs."""
+        calls.clear()
+        job = Job.objects.enqueue("test.add", {"a": 1, "b": 2}, delay=60)
+        Job.objects.enqueue("test.lose", {"job_id": job.id})
+
+        out = self.run_worker("--requeue-every", "0")
+
+        self.assertIn("Requeued 1 and failed 0 lost jobs.", out)
+        self.assertEqual(calls, [(1, 2)])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+
+    def test_run_worker_drops_overtaken_run(self):
+        """Test the worker reports a run whose job was requeued meanwhile."""
+        job = Job.objects.enqueue("test.overtaken")
+        Job.objects.filter(id=job.id).update(payload={"job_id": job.id})
+
+        out = StringIO()
+        call_command(
+            "run_worker", "--once", "--concurrency", "1", stdout=out, stderr=out
+        )
+
+        self.assertIn(f"Job {job.id} was requeued as lost", out.getvalue())
+        job.refresh_from_db()
+        self.assertIsNone(job.result)
+
+    def test_recount_tags_job(self):
+        """Test the recipe app's jobs are registered."""
+        user = create_user()
+        tag = create_tag(user=user)
+        create_recipe(user=user).tags.add(tag)
+        job = Job.objects.enqueue("recipe.recount_tags")
+
+        self.run_worker()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertIn("fixed 1", job.result)
+        self.assertEqual(Tag.objects.get().recipe_count, 1)
+
+
+class JobApiTests(APITestCase, APIClient):
+    """Test the job status endpoints."""
+
+    def setUp(self):
+        """Creates client, user with a job and another user's job."""
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.job = Job.objects.enqueue("test.add", {"a": 1, "b": 2}, user=self.user)
+        self.other = Job.objects.enqueue(
+            "test.add", user=create_user(email="test2@example.com")
+        )
+
+    def test_list_jobs(self):
+        """Test users see their own jobs only."""
+        response = self.client.get(JOBS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([job["id"] for job in response.data], [self.job.id])
+        self.assertEqual(response.data[0]["status"], Job.Status.QUEUED)
+
+    def test_get_job(self):
+        """Test getting a job's status, not another user's."""
+        response = self.client.get(create_job_detail_url(self.job.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "test.add")
+
+        response = self.client.get(create_job_detail_url(self.other.id))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_staff_see_all_jobs(self):
+        """Test staff see every job."""
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.get(JOBS_URL)
+
+        self.assertEqual(
+            [job["id"] for job in response.data], [self.other.id, self.job.id]
+        )
+
+    def test_auth_required(self):
+        """Test auth is required."""
+        self.client.force_authenticate(None)
+
+        response = self.client.get(JOBS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,66 @@
+"""
+Test deferred imports.
+"""
+import sys
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.views import APIView
+
+from src.core.lazy import lazy_view, LazyAutoSchema
+
+
+class LazyViewTests(SimpleTestCase):
+    """Test lazily imported views."""
+
+    def test_view_imported_on_first_call_only(self):
+        """Test the view class is imported and built once, when first called."""
+        with patch("src.core.lazy.import_string") as patched_import:
+            view = lazy_view("some.module.View", url_name="x")
+            patched_import.assert_not_called()
+
+            view("request")
+            view("request")
+
+        patched_import.assert_called_once_with("some.module.View")
+        patched_import.return_value.as_view.assert_called_once_with(url_name="x")
+        self.assertTrue(view.csrf_exempt)
+
+    def test_schema_endpoint(self):
+        """Test the lazily loaded schema view still renders the schema."""
+        response = self.client.get(reverse("api-schema"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"/api/recipes/", response.content)
+
+
+class LazyAutoSchemaTests(SimpleTestCase):
+    """Test the deferred drf_spectacular AutoSchema."""
+
+    def test_placeholder_until_openapi_imported(self):
+        """Test a placeholder is built until drf_spectacular.openapi is loaded."""
+        with patch.dict(sys.modules):
+            sys.modules.pop("drf_spectacular.openapi", None)
+            self.assertIsInstance(LazyAutoSchema(), LazyAutoSchema)
+
+    def test_real_schema_once_openapi_imported(self):
+        """Test the real AutoSchema is built once drf_spectacular is loaded."""
+        from drf_spectacular.openapi import AutoSchema
+
+        self.assertIsInstance(APIView().schema, AutoSchema)
+
+    def test_subclass_built_as_auto_schema(self):
+        """Test subclasses (as made by extend_schema) keep their overrides."""
+        from drf_spectacular.openapi import AutoSchema
+
+        class CustomSchema(LazyAutoSchema):
+            def get_tags(self):
+                return ["custom"]
+
+        schema = CustomSchema()
+
+        self.assertIsInstance(schema, AutoSchema)
+        self.assertIsInstance(schema, CustomSchema)
+        self.assertEqual(schema.get_tags(), ["custom"])
+        self.assertEqual(CustomSchema.__bases__, (LazyAutoSchema,))
@@ -0,0 +1,221 @@
+"""
+Tests for the Prometheus metrics.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from src.core.metrics import Counter, Gauge, Histogram, Registry, registry
+from src.recipe.tests.services import RECIPE_LIST_URL, create_recipe, create_user
+
+
+METRICS_URL = reverse("core:metrics")
+
+
+def sample(text, name):
+    """Return the value of the sample `name` (with its labels), or 0."""
+    match = re.search(rf"^{re.escape(name)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0
+
+
+class RegistryTests(SimpleTestCase):
+    """Test recording and exporting metrics."""
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_summed_over_threads(self):
+        """Test counts of running and finished threads are all reported."""
+        counter = Counter("jobs_total", "Jobs.", ["kind"], registry=self.registry)
+        counter.inc("a")
+        threads = [
+            threading.Thread(target=lambda: [counter.inc("a") for _ in range(100)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc("b", amount=2)
+
+        text = self.registry.render()
+
+        self.assertIn("# TYPE jobs_total counter\n", text)
+        self.assertEqual(sample(text, 'jobs_total{kind="a"}'), 401)
+        self.assertEqual(sample(text, 'jobs_total{kind="b"}'), 2)
+
+    def test_histogram(self):
+        """Test histogram buckets are cumulative with a sum and count."""
+        histogram = Histogram(
+            "wait_seconds", "Waits.", buckets=(0.1, 1), registry=self.registry
+        )
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+
+        text = self.registry.render()
+
+        self.assertEqual(sample(text, 'wait_seconds_bucket{le="0.1"}'), 2)
+        self.assertEqual(sample(text, 'wait_seconds_bucket{le="1.0"}'), 3)
+        self.assertEqual(sample(text, 'wait_seconds_bucket{le="+Inf"}'), 4)
+        self.assertEqual(sample(text, "wait_seconds_sum"), 3.65)
+        self.assertEqual(sample(text, "wait_seconds_count"), 4)
+
+    def test_label_values_escaped(self):
+        """Test quotes, backslashes and newlines in label values are escaped."""
+        counter = Counter("odd_total", "Odd.", ["name"], registry=self.registry)
+        counter.inc('a"b\\c\nd')
+
+        self.assertIn(
+            'odd_total{name="a\\"b\\\\c\\nd"} 1.0', self.registry.render()
+        )
+
+    def test_processes_aggregated(self):
+        """Test METRICS_DIR sums counters of all processes, gauges of live ones."""
+        counter = Counter("jobs_total", "Jobs.", ["kind"], registry=self.registry)
+        Gauge(
+            "memory_bytes",
+            "Memory.",
+            collect=lambda: [((), 100)],
+            registry=self.registry,
+        )
+        counter.inc("a")
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS_DIR=directory
+        ):
+            # A live process (the test runner's parent) and one gone since.
+            for pid, memory in ((os.getppid(), 200), (2**22 + 1, 300)):
+                with open(self.registry.path(pid), "w") as file:
+                    json.dump(
+                        [
+                            ["jobs_total", ["a"], "", 2],
+                            ["memory_bytes", [], "", memory],
+                        ],
+                        file,
+                    )
+
+            text = self.registry.render()
+
+            self.assertTrue(os.path.exists(self.registry.path(os.getpid())))
+            self.assertFalse(os.path.exists(self.registry.path(2**22 + 1)))
+            with open(self.registry.path("dead")) as file:
+                self.assertEqual(json.load(file), [["jobs_total", ["a"], "", 2]])
+            self.assertEqual(self.registry.render(), text)
+        self.assertEqual(sample(text, 'jobs_total{kind="a"}'), 5)
+        self.assertEqual(sample(text, f'memory_bytes{{pid="{os.getpid()}"}}'), 100)
+        self.assertEqual(sample(text, f'memory_bytes{{pid="{os.getppid()}"}}'), 200)
+        self.assertNotIn(f'pid="{2**22 + 1}"', text)
+
+    def test_reused_pid(self):
+        """Test a file left with the pid of the process is kept as a dead one's."""
+        counter = Counter("jobs_total", "Jobs.", registry=self.registry)
+        counter.inc()
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS_DIR=directory
+        ):
+            with open(self.registry.path(os.getpid()), "w") as file:
+                json.dump([["jobs_total", [], "", 2]], file)
+
+            self.registry.flush()
+            text = self.registry.render()
+
+        self.assertEqual(sample(text, "jobs_total"), 3)
+
+
+class MetricsViewTests(APITestCase, APIClient):
+    """Test the /metrics endpoint and the request metrics."""
+
+    def setUp(self):
+        """Creates client authenticated with a token."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_requests_counted(self):
+        """Test requests are counted and timed by URL name and status."""
+        before = self.client.get(METRICS_URL).content.decode()
+        self.client.get(reverse("core:healthz"))
+        self.client.get(reverse("core:healthz"))
+        self.client.get("/not-found/")
+
+        response = self.client.get(METRICS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], registry.content_type)
+        text = response.content.decode()
+        for name, count in (
+            ('http_requests_total{view="core:healthz",method="GET",status="200"}', 2),
+            ('http_requests_total{view="unmatched",method="GET",status="404"}', 1),
+            (
+                "http_request_duration_seconds_count"
+                '{view="core:healthz",status="200"}',
+                2,
+            ),
+        ):
+            self.assertEqual(sample(text, name) - sample(before, name), count)
+        self.assertIn("process_resident_memory_bytes", text)
+        self.assertIn('python_gc_collections_total{generation="0"}', text)
+
+    def test_queries_counted(self):
+        """Test database queries are counted per request and timed."""
+        create_recipe(user=self.user)
+        before = self.client.get(METRICS_URL).content.decode()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(RECIPE_LIST_URL)
+        count = len(queries)
+        text = self.client.get(METRICS_URL).content.decode()
+
+        self.assertGreater(count, 0)
+        for name in (
+            'http_request_db_queries_sum{view="recipe:recipe-list"}',
+            'db_query_duration_seconds_count{alias="default"}',
+        ):
+            self.assertEqual(sample(text, name) - sample(before, name), count)
+
+    def test_metrics_allowed_addresses(self):
+        """Test only clients from the allowed addresses read the metrics."""
+        with override_settings(METRICS_ALLOWED_IPS=["10.0.0.0/8"]):
+            allowed = self.client.get(METRICS_URL, REMOTE_ADDR="10.1.2.3")
+            denied = self.client.get(METRICS_URL)
+
+        self.assertEqual(allowed.status_code, status.HTTP_200_OK)
+        self.assertEqual(denied.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        """Test clients presenting METRICS_TOKEN read the metrics."""
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer secret")
+        allowed = self.client.get(METRICS_URL)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer wrong")
+        denied = self.client.get(METRICS_URL)
+
+        self.assertEqual(allowed.status_code, status.HTTP_200_OK)
+        self.assertEqual(denied.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(AUTH_TOKEN_CACHE_SECONDS=60)
+    def test_token_cache_counted(self):
+        """Test token authentications count cache hits and misses."""
+        before = self.client.get(METRICS_URL).content.decode()
+
+        self.client.get(reverse("user:me"))
+        self.client.get(reverse("user:me"))
+        text = self.client.get(METRICS_URL).content.decode()
+
+        for result in ("hit", "miss"):
+            name = f'auth_token_cache_total{{result="{result}"}}'
+            self.assertEqual(sample(text, name) - sample(before, name), 1)
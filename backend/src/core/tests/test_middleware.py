@@ -0,0 +1,126 @@
+"""
+Tests for the compression middleware.
+"""
+import gzip
+import zlib
+from unittest.mock import patch
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from src.core.middleware import (
+    BrotliCompressor,
+    CompressionMiddleware,
+    GzipCompressor,
+    negotiate_compressor,
+)
+
+
+CONTENT = b'{"title": "Recipe", "tags": [{"id": 1, "name": "tag"}]}' * 50
+
+
+class FakeBrotli:
+    """Stands in for the optional brotli module, deflating instead."""
+
+    class Compressor:
+        def __init__(self, quality):
+            self.compressor = zlib.compressobj()
+
+        def process(self, data):
+            return self.compressor.compress(data)
+
+        def flush(self):
+            return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        def finish(self):
+            return self.compressor.flush()
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test compressing responses."""
+
+    def respond(self, response, accept_encoding="gzip, deflate"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_compress(self):
+        """Test large responses are gzipped, with a weak ETag."""
+        response = HttpResponse(CONTENT, content_type="application/json")
+        response["ETag"] = '"abc"'
+
+        response = self.respond(response)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), CONTENT)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["ETag"], 'W/"abc"')
+
+    def test_compress_stream(self):
+        """Test streaming responses are gzipped chunk by chunk."""
+        response = StreamingHttpResponse(iter([CONTENT[:10], CONTENT[10:], b""]))
+
+        response = self.respond(response)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), CONTENT)
+
+    def test_compress_stream_flushed(self):
+        """Test each chunk of a stream can be decompressed as it comes."""
+
+        def chunks():
+            yield CONTENT[:10]
+            raise AssertionError("Read past the first chunk.")
+
+        response = self.respond(StreamingHttpResponse(chunks()))
+
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        first = next(iter(response.streaming_content))
+        self.assertEqual(decompressor.decompress(first), CONTENT[:10])
+
+    def test_skip(self):
+        """Test small, encoded and compressed type responses are sent as is."""
+        encoded = HttpResponse(CONTENT)
+        encoded["Content-Encoding"] = "gzip"
+        for response in (
+            HttpResponse(CONTENT[:1023]),
+            encoded,
+            HttpResponse(CONTENT, content_type="image/png"),
+        ):
+            self.assertEqual(self.respond(response).content, response.content)
+            self.assertFalse(response.has_header("Vary"))
+
+    def test_skip_not_accepted(self):
+        """Test responses aren't compressed for clients that don't accept it."""
+        for accept_encoding in ("", "identity", "gzip;q=0"):
+            response = self.respond(HttpResponse(CONTENT), accept_encoding)
+
+            self.assertEqual(response.content, CONTENT)
+            self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    @patch("src.core.middleware.brotli", FakeBrotli)
+    @patch("src.core.middleware.COMPRESSORS", [BrotliCompressor, GzipCompressor])
+    def test_negotiate_brotli(self):
+        """Test brotli is preferred when installed, unless gzip is favored."""
+        cases = {
+            "gzip, deflate, br": BrotliCompressor,
+            "br;q=0.5, gzip": GzipCompressor,
+            "br;q=0": None,
+            "*": BrotliCompressor,
+            "gzip;q=1.0, *;q=0": GzipCompressor,
+            "br;q=x, gzip": GzipCompressor,
+        }
+        for accept_encoding, compressor in cases.items():
+            with self.subTest(accept_encoding):
+                self.assertIs(negotiate_compressor(accept_encoding), compressor)
+
+        response = self.respond(HttpResponse(CONTENT), "br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(zlib.decompress(response.content), CONTENT)
+
+    def test_negotiate_without_brotli(self):
+        """Test only gzip is offered without brotli."""
+        self.assertIsNone(negotiate_compressor("br"))
+        self.assertIs(negotiate_compressor("br, gzip"), GzipCompressor)
@@ -0,0 +1,157 @@
+"""
+Tests for per-request profiling.
+"""
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import AsyncClient, override_settings
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from src.core.profiling import load, stored_ids
+from src.recipe.tests.services import (
+    RECIPE_LIST_URL,
+    create_recipe,
+    create_recipe_detail_url,
+    create_user,
+)
+
+
+def functions(nodes):
+    """Yield the functions of a call tree."""
+    for node in nodes:
+        yield node["function"]
+        yield from functions(node["children"])
+
+
+class ProfilingTests(APITestCase, APIClient):
+    """Test profiling requests on demand and sampled."""
+
+    def setUp(self):
+        """Creates client authenticated as staff and a profile store."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(PROFILE_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            "admin@example.com", "testPass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.recipe = create_recipe(user=self.user)
+
+    def test_profile_stored(self):
+        """Test staff get a stored profile with its call tree and SQL."""
+        response = self.client.patch(
+            create_recipe_detail_url(self.recipe.id),
+            {"tags": [{"name": "Vegan"}]},
+            format="json",
+            HTTP_X_PROFILE="1",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["tags"][0]["name"], "Vegan")
+        report = load(response["X-Profile-Id"])
+        self.assertEqual(report["method"], "PATCH")
+        self.assertEqual(report["view"], "recipe:recipe-detail")
+        self.assertEqual(report["status"], 200)
+        self.assertFalse(report["sampled"])
+        self.assertTrue(
+            any("UPDATE" in query["sql"] for query in report["queries"])
+        )
+        self.assertTrue(
+            any("(partial_update)" in name for name in functions(report["tree"]))
+        )
+
+    def test_profile_inline(self):
+        """Test staff can get the report instead of the response."""
+        response = self.client.get(RECIPE_LIST_URL, {"profile": "inline"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        text = response.content.decode()
+        self.assertIn(f"GET {RECIPE_LIST_URL}?profile=inline -> 200", text)
+        self.assertIn("SQL statements", text)
+        self.assertIn("SELECT", text)
+        self.assertEqual(stored_ids(), [response["X-Profile-Id"]])
+
+    def test_profile_staff_only(self):
+        """Test other users can't profile requests."""
+        user = create_user(email="user@example.com")
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        response = self.client.get(RECIPE_LIST_URL, HTTP_X_PROFILE="inline")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(stored_ids(), [])
+
+    def test_profile_flag_values(self):
+        """Test only explicit flags turn profiling on."""
+        for flag in ("0", "false", "no"):
+            response = self.client.get(RECIPE_LIST_URL, {"profile": flag})
+            self.assertNotIn("X-Profile-Id", response)
+            response = self.client.get(RECIPE_LIST_URL, HTTP_X_PROFILE=flag)
+            self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(stored_ids(), [])
+
+        response = self.client.get(RECIPE_LIST_URL, HTTP_X_PROFILE="true")
+        self.assertEqual(stored_ids(), [response["X-Profile-Id"]])
+
+    def test_sampled(self):
+        """Test sampled requests are stored, keeping the newest only."""
+        with override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_MAX_STORED=2):
+            for _ in range(3):
+                response = self.client.get(RECIPE_LIST_URL)
+                self.assertNotIn("X-Profile-Id", response)
+        with override_settings(PROFILE_SAMPLE_RATE=0):
+            self.client.get(RECIPE_LIST_URL)
+
+        ids = stored_ids()
+        self.assertEqual(len(ids), 2)
+        self.assertTrue(all(load(id)["sampled"] for id in ids))
+
+    async def test_not_profiled_under_asgi(self):
+        """Test profiles asked for under ASGI are refused, saying why."""
+        client = AsyncClient()
+        # ASGI request headers, in Django 4.1's AsyncClient.
+        headers = {"authorization": f"Token {self.token.key}"}
+
+        with override_settings(PROFILE_SAMPLE_RATE=1):
+            sampled = await client.get(RECIPE_LIST_URL, **headers)
+        response = await client.get(RECIPE_LIST_URL, {"profile": "inline"}, **headers)
+
+        self.assertNotIn("X-Profile-Skipped", sampled)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response["X-Profile-Skipped"], "Not supported under ASGI.")
+        self.assertEqual(stored_ids(), [])
+
+    def test_profiles_command(self):
+        """Test listing and showing stored profiles."""
+        first = self.client.get(RECIPE_LIST_URL, HTTP_X_PROFILE="1")["X-Profile-Id"]
+        second = self.client.get(
+            create_recipe_detail_url(self.recipe.id), HTTP_X_PROFILE="1"
+        )["X-Profile-Id"]
+
+        out = StringIO()
+        call_command("profiles", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:]], [second, first])
+
+        out = StringIO()
+        call_command("profiles", first, stdout=out)
+        self.assertIn(f"profile {first}", out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("profiles", "missing")
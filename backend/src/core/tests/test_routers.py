@@ -0,0 +1,126 @@
+"""
+Tests for database routing.
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from rest_framework.test import APIClient, APITestCase
+
+from src.core.routers import (
+    ReplicaRouter,
+    available_replicas,
+    is_pinned_to_primary,
+    reading_from_replica,
+    replica_reads,
+)
+from src.recipe.models import Recipe
+from src.recipe.tests.services import (
+    RECIPE_DEFAULTS,
+    RECIPE_LIST_URL,
+    create_recipe_detail_url,
+    create_recipe,
+    create_user,
+)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+@patch(
+    "src.core.routers.available_replicas", return_value=["replica1", "replica2"]
+)
+class ReplicaRouterTests(SimpleTestCase):
+    """Test the read replica router."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self, patched_replicas):
+        """Test reads go to the default database outside replica blocks."""
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_reads_use_replica_when_allowed(self, patched_replicas):
+        """Test reads go to a replica inside a replica block."""
+        with replica_reads():
+            self.assertIn(self.router.db_for_read(Recipe), ["replica1", "replica2"])
+            with replica_reads(False):
+                self.assertIsNone(self.router.db_for_read(Recipe))
+        self.assertFalse(reading_from_replica())
+
+    def test_reads_use_primary_without_replicas(self, patched_replicas):
+        """Test reads go to the default database when no replica is usable."""
+        patched_replicas.return_value = []
+        with replica_reads():
+            self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_writes_use_primary(self, patched_replicas):
+        """Test writes always go to the default database."""
+        with replica_reads():
+            self.assertIsNone(self.router.db_for_write(Recipe))
+
+
+class AvailableReplicasTests(SimpleTestCase):
+    """Test which configured replicas are used."""
+
+    @override_settings(DATABASE_REPLICAS=["default"])
+    def test_replica_pointing_at_primary_skipped(self):
+        """Test replicas sharing the primary's settings (test mirrors) are skipped."""
+        self.assertEqual(available_replicas(), [])
+
+
+class ReplicaReadMixinTests(APITestCase, APIClient):
+    """Test which requests are allowed to read from a replica."""
+
+    def setUp(self):
+        """Creates client, user and recipe for the tests."""
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+
+    def request_reads(self, method, url, **kwargs):
+        """Return, per routed read, whether it was allowed to use a replica."""
+        reads = []
+
+        def record(router, model, **hints):
+            reads.append(reading_from_replica())
+
+        with patch.object(ReplicaRouter, "db_for_read", autospec=True) as patched:
+            patched.side_effect = record
+            getattr(self.client, method)(url, **kwargs)
+        return reads
+
+    def test_list_and_retrieve_read_from_replica(self):
+        """Test safe requests read from a replica."""
+        for url in (RECIPE_LIST_URL, create_recipe_detail_url(self.recipe.id)):
+            reads = self.request_reads("get", url)
+            self.assertTrue(reads)
+            self.assertTrue(all(reads))
+
+    @override_settings(DATABASE_REPLICAS=["replica1"])
+    def test_write_pins_user_to_primary(self):
+        """Test reads right after a write go to the primary."""
+        response = self.client.post(RECIPE_LIST_URL, RECIPE_DEFAULTS)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(is_pinned_to_primary(self.user))
+
+        reads = self.request_reads("get", RECIPE_LIST_URL)
+
+        self.assertTrue(reads)
+        self.assertFalse(any(reads))
+
+    @override_settings(DATABASE_REPLICAS=["replica1"])
+    def test_failed_write_does_not_pin(self):
+        """Test rejected writes don't pin the user to the primary."""
+        self.client.post(RECIPE_LIST_URL, {})
+
+        self.assertFalse(is_pinned_to_primary(self.user))
+
+    def test_no_pins_without_replicas(self):
+        """Test pins aren't kept in the cache, nor looked up, without replicas."""
+        with patch("src.core.routers.cache") as patched_cache:
+            self.client.post(RECIPE_LIST_URL, RECIPE_DEFAULTS)
+            self.client.get(RECIPE_LIST_URL)
+
+        self.assertFalse(patched_cache.method_calls)
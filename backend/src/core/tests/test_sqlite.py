@@ -0,0 +1,64 @@
+"""
+Tests for the SQLite performance mode.
+"""
+import shutil
+import sqlite3
+import tempfile
+
+from django.db import connections
+from django.db.utils import load_backend
+from django.test import SimpleTestCase, override_settings
+
+
+class SQLiteTuningTests(SimpleTestCase):
+    """Test tuned SQLite connections."""
+
+    def setUp(self):
+        self.db_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.db_dir)
+        self.db_name = f"{self.db_dir}/db.sqlite3"
+
+    def connect(self, engine="src.core.backends.sqlite3"):
+        """Return a new connection of `engine` to a temporary database file."""
+        settings_dict = {
+            **connections["default"].settings_dict,
+            "ENGINE": engine,
+            "NAME": self.db_name,
+        }
+        connection = load_backend(engine).DatabaseWrapper(settings_dict, "tuned")
+        connection.ensure_connection()
+        self.addCleanup(connection.close)
+        return connection
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_TUNING=True)
+    def test_pragmas_applied(self):
+        """Test pragmas are set on new connections when tuning is enabled."""
+        connection = self.connect()
+
+        self.assertEqual(self.pragma(connection, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(connection, "synchronous"), 1)
+        self.assertEqual(self.pragma(connection, "cache_size"), -64000)
+        self.assertEqual(self.pragma(connection, "busy_timeout"), 5000)
+
+    @override_settings(SQLITE_TUNING=False)
+    def test_pragmas_not_applied_by_default(self):
+        """Test connections are left alone when tuning is disabled."""
+        connection = self.connect("django.db.backends.sqlite3")
+
+        self.assertEqual(self.pragma(connection, "journal_mode"), "delete")
+
+    def test_transactions_take_write_lock(self):
+        """Test transactions start with BEGIN IMMEDIATE."""
+        connection = self.connect()
+        connection._start_transaction_under_autocommit()
+        self.addCleanup(connection.rollback)
+
+        other = sqlite3.connect(self.db_name, timeout=0)
+        self.addCleanup(other.close)
+        with self.assertRaisesMessage(sqlite3.OperationalError, "locked"):
+            other.execute("BEGIN IMMEDIATE")
@@ -0,0 +1,155 @@
+"""
+Tests for the token bucket throttles.
+"""
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from src.core.throttling import CacheBucketStore, LocalBucketStore, parse_rate
+from src.recipe.tests.services import RECIPE_LIST_URL, create_user
+
+
+def throttle_rates(**rates):
+    return override_settings(
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates}
+    )
+
+
+@patch("src.core.throttling.time")
+class BucketStoreTests(SimpleTestCase):
+    """Test the token bucket stores."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def assert_bucket(self, take, patched_time):
+        patched_time.monotonic.return_value = patched_time.time.return_value = 100.0
+        capacity, refill = parse_rate("2/s")
+
+        self.assertEqual(take("key", capacity, refill), 0)
+        self.assertEqual(take("key", capacity, refill), 0)
+        self.assertEqual(take("key", capacity, refill), 0.5)
+        self.assertEqual(take("other", capacity, refill), 0)
+
+        patched_time.monotonic.return_value = patched_time.time.return_value = 100.5
+        self.assertEqual(take("key", capacity, refill), 0)
+        self.assertEqual(take("key", capacity, refill), 0.5)
+
+    def test_local_store(self, patched_time):
+        """Test a bucket in the process refills at the rate."""
+        self.assert_bucket(LocalBucketStore().take, patched_time)
+
+    def test_cache_store(self, patched_time):
+        """Test a bucket in the cache refills at the rate."""
+        self.assert_bucket(CacheBucketStore().take, patched_time)
+
+    def test_cache_store_async(self, patched_time):
+        """Test the async path of the cache store takes the same tokens."""
+        self.assert_bucket(async_to_sync(CacheBucketStore().atake), patched_time)
+
+    def test_local_store_prunes_idle_buckets(self, patched_time):
+        """Test full buckets are dropped when there are too many."""
+        store = LocalBucketStore()
+        store.max_buckets = 2
+        patched_time.monotonic.return_value = 100.0
+        store.take("idle", 1, 1)
+        patched_time.monotonic.return_value = 102.0
+        store.take("busy", 1, 1)
+        store.take("new", 1, 1)
+
+        self.assertEqual(set(store.buckets), {"busy", "new"})
+
+    def test_local_store_prunes_at_each_buckets_rate(self, patched_time):
+        """Test buckets of slower rates are kept until they are full again."""
+        store = LocalBucketStore()
+        store.max_buckets = 2
+        patched_time.monotonic.return_value = 100.0
+        store.take("slow", *parse_rate("1/h"))
+        patched_time.monotonic.return_value = 102.0
+        store.take("fast", 1, 1)
+        store.take("new", 1, 1)
+
+        self.assertEqual(set(store.buckets), {"slow", "fast", "new"})
+        self.assertEqual(store.take("slow", *parse_rate("1/h")), 3598)
+
+    def test_cache_store_locked_bucket(self, patched_time):
+        """Test a request is let through while the bucket stays locked."""
+        patched_time.time.return_value = 100.0
+        store = CacheBucketStore()
+        cache.add("throttle:key:lock", "other")
+        capacity, refill = parse_rate("1/s")
+
+        self.assertEqual(store.take("key", capacity, refill), 0)
+        self.assertEqual(patched_time.sleep.call_count, store.lock_attempts - 1)
+        self.assertEqual(cache.get("throttle:key:lock"), "other")
+
+        cache.delete("throttle:key:lock")
+        self.assertEqual(store.take("key", capacity, refill), 0)
+        self.assertEqual(store.take("key", capacity, refill), 1)
+        self.assertIsNone(cache.get("throttle:key:lock"))
+
+    def test_cache_store_keeps_others_lock(self, patched_time):
+        """Test a lock that expired and was taken by another isn't deleted."""
+        patched_time.time.return_value = 100.0
+        store = CacheBucketStore()
+        get = cache.get
+
+        def get_after_expiry(key, *args):
+            if key == "throttle:key":  # Read once the lock was taken.
+                cache.set("throttle:key:lock", "other")
+            return get(key, *args)
+
+        with patch.object(cache, "get", side_effect=get_after_expiry):
+            store.take("key", *parse_rate("1/s"))
+
+        self.assertEqual(cache.get("throttle:key:lock"), "other")
+
+
+@patch("src.core.throttling._stores", {})
+class ThrottleApiTests(APITestCase, APIClient):
+    """Test throttled API requests."""
+
+    def setUp(self):
+        """Creates client and user."""
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    @throttle_rates(reads="2/min", writes="1/min")
+    def test_reads_and_writes_throttled(self):
+        """Test each user has buckets of reads and writes."""
+        for _ in range(2):
+            self.assertEqual(self.client.get(RECIPE_LIST_URL).status_code, 200)
+
+        response = self.client.get(RECIPE_LIST_URL)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "30")
+
+        response = self.client.post(RECIPE_LIST_URL, {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(RECIPE_LIST_URL, {})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.client.force_authenticate(create_user(email="test2@example.com"))
+        self.assertEqual(self.client.get(RECIPE_LIST_URL).status_code, 200)
+
+    @throttle_rates(auth="1/h")
+    def test_auth_throttled(self):
+        """Test logins are throttled by client address."""
+        self.client.force_authenticate(None)
+        url = reverse("user:token")
+        data = {"email": "test@example.com", "password": "wrong"}
+
+        self.assertEqual(self.client.post(url, data).status_code, 400)
+        response = self.client.post(url, data)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "3600")
@@ -0,0 +1,37 @@
+"""
+Tests for the health check views.
+"""
+from unittest.mock import patch
+
+from django.db.utils import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+
+
+class HealthCheckTests(TestCase):
+    """Test liveness and readiness probes."""
+
+    def test_healthz(self):
+        """Test liveness probe doesn't touch the database."""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("core:healthz"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"status": "ok"})
+
+    def test_readyz(self):
+        """Test readiness probe runs a single trivial query."""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("core:readyz"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @patch("src.core.views.ping_database", side_effect=OperationalError)
+    def test_readyz_database_down(self, patched_ping):
+        """Test readiness probe fails when the database is unreachable."""
+        response = self.client.get(reverse("core:readyz"))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.json(), {"status": "unavailable"})
@@ -0,0 +1,208 @@
+"""
+Token bucket throttles.
+
+A bucket holds up to `num` tokens of a "num/period" rate and gets them
+back at num/period per second; each request takes one, and waits for the
+next one when the bucket is empty. Buckets live in THROTTLE_STORE:
+"local", a dict in the process (one node, one process), or "cache", the
+default cache, which must then be shared by every worker (checked by
+src.core.checks).
+"""
+import asyncio
+import secrets
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@lru_cache()
+def parse_rate(rate):
+    """Return the capacity and refill rate per second of a "num/period" rate."""
+    num, period = rate.split("/")
+    return int(num), int(num) / PERIODS[period[0]]
+
+
+class LocalBucketStore:
+    """Buckets in a dict of the process, dropping idle ones when it grows."""
+
+    max_buckets = 10000
+
+    def __init__(self):
+        # Key: (tokens, updated, time it's full again at its own rate).
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, refill):
+        """Take a token from the bucket, return 0 or the seconds to wait."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated, _ = self.buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            wait = 0 if tokens >= 1 else (1 - tokens) / refill
+            if not wait:
+                tokens -= 1
+                if len(self.buckets) >= self.max_buckets:
+                    self.prune(now)
+            self.buckets[key] = (tokens, now, now + (capacity - tokens) / refill)
+            return wait
+
+    async def atake(self, key, capacity, refill):
+        """Async `take`, which doesn't wait on anything but the dict's lock."""
+        return self.take(key, capacity, refill)
+
+    def prune(self, now):
+        """Drop the buckets that are full again by now."""
+        self.buckets = {
+            key: bucket for key, bucket in self.buckets.items() if bucket[2] > now
+        }
+
+
+class CacheBucketStore:
+    """
+    Buckets in the default cache, shared between processes. A bucket is
+    locked while it's updated, with `cache.add` (atomic in Django's cache
+    backends) of a token of the process, and unlocked only while the lock
+    still holds that token. A request that can't get the lock within
+    `lock_attempts` tries is let through without taking a token: the client
+    has other requests in flight, which doesn't make it over its rate.
+    """
+
+    key_prefix = "throttle:"
+    # Seconds before the lock of a crashed worker expires.
+    lock_timeout = 1
+    lock_attempts = 10
+    lock_retry_delay = 0.002
+
+    def take(self, key, capacity, refill):
+        """Take a token from the bucket, return 0 or the seconds to wait."""
+        key = self.key_prefix + key
+        lock = secrets.token_hex(8)
+        for attempt in range(self.lock_attempts):
+            if attempt:
+                time.sleep(self.lock_retry_delay)
+            if cache.add(f"{key}:lock", lock, self.lock_timeout):
+                break
+        else:
+            return 0
+        try:
+            bucket, wait = self.take_token(cache.get(key), capacity, refill)
+            cache.set(key, bucket, self.timeout(capacity, refill))
+            return wait
+        finally:
+            if cache.get(f"{key}:lock") == lock:
+                cache.delete(f"{key}:lock")
+
+    async def atake(self, key, capacity, refill):
+        """Async `take`, with the async cache API."""
+        key = self.key_prefix + key
+        lock = secrets.token_hex(8)
+        for attempt in range(self.lock_attempts):
+            if attempt:
+                await asyncio.sleep(self.lock_retry_delay)
+            if await cache.aadd(f"{key}:lock", lock, self.lock_timeout):
+                break
+        else:
+            return 0
+        try:
+            bucket, wait = self.take_token(await cache.aget(key), capacity, refill)
+            await cache.aset(key, bucket, self.timeout(capacity, refill))
+            return wait
+        finally:
+            if await cache.aget(f"{key}:lock") == lock:
+                await cache.adelete(f"{key}:lock")
+
+    def take_token(self, bucket, capacity, refill):
+        """
+        Return the (tokens, updated) bucket after taking a token from
+        `bucket` (None when new) if it has one, and 0 or the seconds to wait.
+        """
+        now = time.time()
+        tokens, updated = bucket or (capacity, now)
+        tokens = min(capacity, tokens + max(0, now - updated) * refill)
+        wait = 0 if tokens >= 1 else (1 - tokens) / refill
+        if not wait:
+            tokens -= 1
+        return (tokens, now), wait
+
+    def timeout(self, capacity, refill):
+        """Gone once it would have refilled, which is the same as full."""
+        return int(capacity / refill) + 1
+
+
+STORES = {"local": LocalBucketStore, "cache": CacheBucketStore}
+_stores = {}
+
+
+def get_store():
+    """Return the process wide store chosen by THROTTLE_STORE."""
+    name = settings.THROTTLE_STORE
+    if name not in _stores:
+        _stores[name] = STORES[name]()
+    return _stores[name]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle requests of each user (or client address for anonymous ones)
+    to the rate of the scope in REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"].
+    Scopes without a rate aren't throttled.
+    """
+
+    scope = None
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_bucket(self, request, view):
+        """Return the key and rate of the request's bucket, or None."""
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if not rate:
+            return None
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return f"{scope}:{ident}", parse_rate(rate)
+
+    def allow_request(self, request, view):
+        bucket = self.get_bucket(request, view)
+        if bucket is None:
+            return True
+        key, (capacity, refill) = bucket
+        self.retry_after = get_store().take(key, capacity, refill)
+        return not self.retry_after
+
+    async def aallow_request(self, request, view):
+        """Async `allow_request`, for async views."""
+        bucket = self.get_bucket(request, view)
+        if bucket is None:
+            return True
+        key, (capacity, refill) = bucket
+        self.retry_after = await get_store().atake(key, capacity, refill)
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
+
+
+class ReadWriteThrottle(TokenBucketThrottle):
+    """Throttle safe-method requests as "reads" and the others as "writes"."""
+
+    def get_scope(self, request, view):
+        return "reads" if request.method in SAFE_METHODS else "writes"
+
+
+class AuthThrottle(TokenBucketThrottle):
+    """Throttle signups and logins, by client address."""
+
+    scope = "auth"
@@ -0,0 +1,19 @@
+"""URL mappings for the core app."""
+from django.urls import include, path
+from rest_framework.routers import SimpleRouter
+
+from .views import BatchView, JobViewSet, healthz, metrics, readyz
+
+
+app_name = "core"
+
+router = SimpleRouter()
+router.register("api/jobs", JobViewSet)
+
+urlpatterns = [
+    path("healthz", healthz, name="healthz"),
+    path("readyz", readyz, name="readyz"),
+    path("metrics", metrics, name="metrics"),
+    path("api/batch/", BatchView.as_view(), name="batch"),
+    path("", include(router.urls)),
+]
@@ -0,0 +1,104 @@
+"""Views for the core app."""
+import ipaddress
+import secrets
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+from django.db.utils import OperationalError
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.viewsets import ReadOnlyModelViewSet
+
+from .batch import dispatch_subrequest
+from .health import ping_database
+from .metrics import registry
+from .models import Job
+from .serializers import BatchSerializer, JobSerializer
+
+
+@never_cache
+@require_safe
+def healthz(request):
+    """Liveness probe: the process is up and serving requests."""
+    return JsonResponse({"status": "ok"})
+
+
+@never_cache
+@require_safe
+def readyz(request):
+    """Readiness probe: the database answers a trivial query."""
+    try:
+        ping_database()
+    except OperationalError:
+        return JsonResponse({"status": "unavailable"}, status=503)
+    return JsonResponse({"status": "ok"})
+
+
+def metrics_allowed(request):
+    """Return whether the client may read /metrics, see METRICS_ALLOWED_IPS."""
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if secrets.compare_digest(
+            request.headers.get("Authorization", "").encode(), expected.encode()
+        ):
+            return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_IPS
+    )
+
+
+@never_cache
+@require_safe
+def metrics(request):
+    """Metrics of all the worker processes, for Prometheus to scrape."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=registry.content_type)
+
+
+class BatchView(GenericAPIView):
+    """
+    View for running several API requests in one round-trip. Sub-requests
+    run in order, in-process, with the credentials of the batch.
+    """
+
+    serializer_class = BatchSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        responses = []
+        for item in serializer.validated_data["requests"]:
+            response = dispatch_subrequest(
+                request, item["match"], item["method"], item["path"], item.get("body")
+            )
+            body = getattr(response, "data", None)
+            responses.append({"status": response.status_code, "body": body})
+        return Response(self.get_serializer({"responses": responses}).data)
+
+
+class JobViewSet(ReadOnlyModelViewSet):
+    """View for the status of the user's background jobs, or all for staff."""
+
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Retrieve jobs visible to the authenticated user, newest first."""
+        queryset = self.queryset.order_by("-id")
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(user=self.request.user)
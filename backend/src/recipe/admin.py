@@ -1,7 +1,116 @@
+from collections import defaultdict
+
 from django.contrib import admin
+from django.contrib.admin.widgets import ManyToManyRawIdWidget
+from django.core.exceptions import ValidationError
+from django.forms import ModelForm
+from django.utils import timezone
+
+from .models import Recipe, Tag, Tombstone
+from .sync import sync_atomic
+
+
+def record_tombstones(queryset):
+    """Leave tombstones for the rows of `queryset`, before it's deleted."""
+    ids_by_user = defaultdict(list)
+    for user_id, object_id in queryset.values_list("user_id", "id"):
+        if user_id is not None:
+            ids_by_user[user_id].append(object_id)
+    for user_id, ids in ids_by_user.items():
+        Tombstone.objects.record(user_id, queryset.model, ids)
+
+
+class UserTagsRawIdWidget(ManyToManyRawIdWidget):
+    """Raw id widget whose lookup popup only lists one user's tags."""
+
+    def __init__(self, rel, admin_site, user_id, **kwargs):
+        self.user_id = user_id
+        super().__init__(rel, admin_site, **kwargs)
+
+    def base_url_parameters(self):
+        params = super().base_url_parameters()
+        params["user__id__exact"] = str(self.user_id)
+        return params
+
+
+class RecipeAdminForm(ModelForm):
+    def clean(self):
+        """Only allow tags of the recipe's user."""
+        cleaned_data = super().clean()
+        user, tags = cleaned_data.get("user"), cleaned_data.get("tags")
+        if tags and any(tag.user_id != getattr(user, "id", None) for tag in tags):
+            raise ValidationError({"tags": "Tags must belong to the recipe's user."})
+        return cleaned_data
+
+
+@admin.register(Recipe)
+class RecipeAdmin(admin.ModelAdmin):
+    form = RecipeAdminForm
+    list_display = ("id", "title", "user")
+    list_select_related = ("user",)
+    ordering = ("-id",)
+    search_fields = ("user__email__exact",)
+    search_help_text = "Exact user email."
+    show_full_result_count = False
+    autocomplete_fields = ("user",)
+    raw_id_fields = ("tags",)
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        """Scope the tags widget to the edited recipe's user."""
+        object_id = request.resolver_match.kwargs.get("object_id")
+        if db_field.name == "tags" and object_id is not None:
+            user_id = (
+                Recipe.objects.filter(pk=object_id)
+                .values_list("user_id", flat=True)
+                .first()
+            )
+            kwargs["queryset"] = Tag.objects.filter(user_id=user_id)
+            kwargs["widget"] = UserTagsRawIdWidget(
+                db_field.remote_field, self.admin_site, user_id
+            )
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
+    def save_related(self, request, form, formsets, change):
+        """Recount the tags added to or removed from the recipe."""
+        tag_ids = {tag.id for tag in form.initial.get("tags", [])}
+        tag_ids |= {tag.id for tag in form.cleaned_data.get("tags", [])}
+        with sync_atomic():
+            super().save_related(request, form, formsets, change)
+            Tag.objects.filter(id__in=tag_ids).recount()
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Recipe.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        """Delete recipes, recount their tags and leave tombstones."""
+        with sync_atomic():
+            tag_ids = list(
+                Tag.objects.filter(recipe__in=queryset)
+                .values_list("id", flat=True)
+                .distinct()
+            )
+            record_tombstones(queryset)
+            queryset.delete()
+            Tag.objects.filter(id__in=tag_ids).recount()
+
 
-from .models import Recipe, Tag
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "user", "recipe_count")
+    readonly_fields = ("recipe_count",)
+    list_select_related = ("user",)
+    ordering = ("-id",)
+    search_fields = ("user__email__exact",)
+    search_help_text = "Exact user email."
+    show_full_result_count = False
+    autocomplete_fields = ("user",)
 
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Tag.objects.filter(pk=obj.pk))
 
-admin.site.register(Recipe)
-admin.site.register(Tag)
+    def delete_queryset(self, request, queryset):
+        """Delete tags, touch their recipes and leave tombstones."""
+        with sync_atomic():
+            Recipe.objects.filter(tags__in=queryset).update(updated_at=timezone.now())
+            record_tombstones(queryset)
+            queryset.delete()
@@ -0,0 +1,47 @@
+"""
+Async read views for the recipe API, see src.core.asyncviews.async_reads.
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import prefetch_related_objects
+from rest_framework.exceptions import NotFound
+
+from src.core.sharding import ashard_for_user
+
+from .models import Recipe, Tag
+from .serializers import RecipeDetailSerializer, RecipeSerializer, TagDetailSerializer
+
+
+async def _users(model, user):
+    """Return the rows of `model` belonging to user, as the viewsets do."""
+    return model.objects.using(await ashard_for_user(user.id)).filter(user=user)
+
+
+async def _prefetch_tags(recipes):
+    # aiterator() can't prefetch before Django 5.0.
+    await sync_to_async(prefetch_related_objects)(recipes, "tags")
+
+
+async def recipe_list(request, user):
+    """Async read of RecipeViewSet.list."""
+    queryset = (await _users(Recipe, user)).order_by("-id")
+    recipes = [recipe async for recipe in queryset.aiterator()]
+    await _prefetch_tags(recipes)
+    return RecipeSerializer(recipes, many=True).data
+
+
+async def recipe_detail(request, user, pk):
+    """Async read of RecipeViewSet.retrieve."""
+    try:
+        recipe = await (await _users(Recipe, user)).aget(pk=pk)
+    except Recipe.DoesNotExist:
+        raise NotFound()
+    await _prefetch_tags([recipe])
+    return RecipeDetailSerializer(recipe).data
+
+
+async def tag_list(request, user):
+    """Async read of TagViewSet.list."""
+    queryset = (await _users(Tag, user)).order_by("-name")
+    return TagDetailSerializer(
+        [tag async for tag in queryset.aiterator()], many=True
+    ).data
@@ -0,0 +1,31 @@
+"""Background jobs of the recipe app, see src.core.jobs."""
+from io import StringIO
+
+from django.core.management import call_command
+
+from src.core.jobs import register
+
+
+def _call_command(name, **options):
+    """Run a management command, return its output."""
+    stdout = StringIO()
+    call_command(name, stdout=stdout, **options)
+    return stdout.getvalue()
+
+
+@register("recipe.recount_tags")
+def recount_tags(**options):
+    """Repair the recipe counts of tags, see the recount_tags command."""
+    return _call_command("recount_tags", **options)
+
+
+@register("recipe.purge_deleted_users")
+def purge_deleted_users(**options):
+    """Purge deleted users' data, see the purge_deleted_users command."""
+    return _call_command("purge_deleted_users", **options)
+
+
+@register("recipe.prune_tombstones")
+def prune_tombstones(**options):
+    """Delete expired tombstones, see the prune_tombstones command."""
+    return _call_command("prune_tombstones", **options)
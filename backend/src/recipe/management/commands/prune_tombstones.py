@@ -0,0 +1,54 @@
+"""
+Django command to delete the tombstones clients no longer sync from.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...models import Tombstone
+
+
+class Command(BaseCommand):
+    """Django command to delete expired tombstones in batches."""
+
+    help = (
+        "Delete the tombstones of recipes and tags deleted more than "
+        "SYNC_TOMBSTONE_DAYS days ago. Clients syncing from an older cursor "
+        "get everything again instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            action="append",
+            choices=settings.DATABASE_SHARDS,
+            help="Shard to prune, can be repeated (default: all shards).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of tombstones deleted per query.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        expired = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+        for alias in options["database"] or settings.DATABASE_SHARDS:
+            deleted = self.prune(alias, expired, options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"{alias}: deleted {deleted} tombstones.")
+            )
+
+    def prune(self, alias, expired, batch_size):
+        """Delete the tombstones older than `expired`, batch by batch."""
+        tombstones = Tombstone.objects.using(alias)
+        expired_ids = tombstones.filter(deleted_at__lt=expired).order_by("id")
+        deleted = 0
+        while True:
+            ids = list(expired_ids.values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += tombstones.filter(id__in=ids).delete()[0]
@@ -0,0 +1,102 @@
+"""
+Django command to purge the data of users who deleted their account.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from src.core.sharding import shard_for_user
+
+from ...models import Recipe, Tag, Tombstone
+
+
+RecipeTag = Recipe.tags.through
+
+
+class Command(BaseCommand):
+    """Django command to purge deleted users' data in batches."""
+
+    help = (
+        "For each user marked deleted, delete their recipe tags, tags and "
+        "tombstones and orphan their recipes in short transactions of "
+        "--batch-size rows, then delete the user. An interrupted run resumes "
+        "where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows changed per transaction.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to wait between batches, to leave room for traffic.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        users = get_user_model().objects.using(DEFAULT_DB_ALIAS)
+        for user in users.filter(deleted_at__isnull=False).order_by("deleted_at"):
+            user_id = user.id
+            recipe_tags, tags, recipes, _ = self.purge(
+                user_id, options["batch_size"], options["sleep"]
+            )
+            # Nothing is left for the deletion collector to load.
+            user.delete()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Purged user {user_id}: {recipe_tags} recipe tags and "
+                    f"{tags} tags deleted, {recipes} recipes orphaned."
+                )
+            )
+
+    def purge(self, user_id, batch_size, sleep):
+        """Remove the user's rows from their shard, batch by batch."""
+        db = shard_for_user(user_id) or DEFAULT_DB_ALIAS
+        return (
+            self.in_batches(
+                RecipeTag.objects.using(db).filter(tag__user_id=user_id),
+                lambda batch: batch.delete()[0],
+                batch_size,
+                sleep,
+            ),
+            self.in_batches(
+                Tag.objects.using(db).filter(user_id=user_id),
+                lambda batch: batch.delete()[1].get(Tag._meta.label, 0),
+                batch_size,
+                sleep,
+            ),
+            self.in_batches(
+                Recipe.objects.using(db).filter(user_id=user_id),
+                lambda batch: batch.update(user=None),
+                batch_size,
+                sleep,
+            ),
+            self.in_batches(
+                Tombstone.objects.using(db).filter(user_id=user_id),
+                lambda batch: batch.delete()[0],
+                batch_size,
+                sleep,
+            ),
+        )
+
+    def in_batches(self, rows, apply, batch_size, sleep):
+        """
+        Call `apply` on `rows` batch by batch until none are left, which
+        requires `apply` to take the rows out of `rows`.
+        """
+        total = 0
+        while True:
+            ids = list(rows.order_by("id").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return total
+            with transaction.atomic(using=rows.db):
+                total += apply(rows.model.objects.using(rows.db).filter(id__in=ids))
+            if sleep:
+                time.sleep(sleep)
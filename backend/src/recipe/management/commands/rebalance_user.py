@@ -0,0 +1,121 @@
+"""
+Django command to move a user's recipe data to another shard.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from src.core.models import UserShard
+from src.core.sharding import shard_for_user
+
+from ...models import Recipe, Tag, Tombstone
+
+
+RecipeTag = Recipe.tags.through
+
+
+class Command(BaseCommand):
+    """Django command to rebalance a user between shards."""
+
+    help = (
+        "Copy a user's recipes, tags, recipe tags and tombstones to another "
+        "shard under new ids, then point the user at it and delete the old rows. "
+        "The old recipe and tag ids get tombstones, so syncing clients drop them "
+        "and fetch the rows under their new ids. The user is deactivated while "
+        "the data is moved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_id", type=int)
+        parser.add_argument("shard", choices=settings.DATABASE_SHARDS)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user_id, target = options["user_id"], options["shard"]
+        try:
+            user = get_user_model().objects.using(DEFAULT_DB_ALIAS).get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {user_id} does not exist.")
+
+        source = shard_for_user(user_id) or DEFAULT_DB_ALIAS
+        if source == target:
+            self.stdout.write(f"User {user_id} is already on {target}.")
+            return
+
+        was_active = user.is_active
+        self.set_active(user, False)
+        try:
+            counts = self.copy(user_id, source, target)
+            UserShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+                user_id=user_id, defaults={"alias": target}
+            )
+            self.delete(user_id, source)
+        finally:
+            self.set_active(user, was_active)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Moved user {user_id} from {source} to {target}: "
+                "{} recipes, {} tags, {} recipe tags.".format(*counts)
+            )
+        )
+
+    def set_active(self, user, is_active):
+        """Block (or allow) the user's requests while their data moves."""
+        user.is_active = is_active
+        user.save(using=DEFAULT_DB_ALIAS, update_fields=["is_active"])
+
+    def user_rows(self, user_id, alias):
+        """Return querysets of the user's recipes, tags, recipe tags, tombstones."""
+        return (
+            Recipe.objects.using(alias).filter(user_id=user_id),
+            Tag.objects.using(alias).filter(user_id=user_id),
+            RecipeTag.objects.using(alias).filter(recipe__user_id=user_id),
+            Tombstone.objects.using(alias).filter(user_id=user_id),
+        )
+
+    def copy(self, user_id, source, target):
+        """
+        Copy the user's rows from `source` to `target`, where they get new ids:
+        the old ones may be taken by other users' rows there, and inserting
+        explicit ids would leave the target's id sequences behind.
+        """
+        recipes, tags, recipe_tags, tombstones = (
+            list(rows) for rows in self.user_rows(user_id, source)
+        )
+        with transaction.atomic(using=target):
+            # Leftovers of an interrupted move.
+            self.delete(user_id, target)
+            recipe_ids = self.insert(recipes, target)
+            tag_ids = self.insert(tags, target)
+            for recipe_tag in recipe_tags:
+                recipe_tag.recipe_id = recipe_ids[recipe_tag.recipe_id]
+                recipe_tag.tag_id = tag_ids[recipe_tag.tag_id]
+            self.insert(recipe_tags, target)
+            self.insert(tombstones, target)
+            # Syncing clients drop the rows under their old ids.
+            Tombstone.objects.using(target).record(user_id, Recipe, list(recipe_ids))
+            Tombstone.objects.using(target).record(user_id, Tag, list(tag_ids))
+        return len(recipes), len(tags), len(recipe_tags)
+
+    def insert(self, rows, alias):
+        """Insert `rows` on `alias` under new ids, return {old id: new id}."""
+        old_ids = [row.pk for row in rows]
+        for row in rows:
+            row.pk = None
+        if rows and connections[alias].features.can_return_rows_from_bulk_insert:
+            type(rows[0]).objects.using(alias).bulk_create(rows)
+        else:
+            for row in rows:
+                row.save(using=alias, force_insert=True)
+        return dict(zip(old_ids, (row.pk for row in rows)))
+
+    def delete(self, user_id, alias):
+        """Delete the user's rows from `alias`."""
+        recipes, tags, recipe_tags, tombstones = self.user_rows(user_id, alias)
+        with transaction.atomic(using=alias):
+            recipe_tags.delete()
+            recipes.delete()
+            tags.delete()
+            tombstones.delete()
@@ -0,0 +1,70 @@
+"""
+Django command to repair the denormalized recipe counts of tags.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...models import Tag
+from ...sync import sync_atomic
+
+
+class Command(BaseCommand):
+    """Django command to recompute `Tag.recipe_count` in batches."""
+
+    help = (
+        "Recount the recipes of every tag from the recipe tags and fix the "
+        "tags whose stored recipe_count drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            action="append",
+            choices=settings.DATABASE_SHARDS,
+            help="Shard to repair, can be repeated (default: all shards).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of tags checked per query.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the tags that would be fixed.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        for alias in options["database"] or settings.DATABASE_SHARDS:
+            checked, fixed = self.repair(
+                alias, options["batch_size"], options["dry_run"]
+            )
+            verb = "would fix" if options["dry_run"] else "fixed"
+            self.stdout.write(
+                self.style.SUCCESS(f"{alias}: checked {checked} tags, {verb} {fixed}.")
+            )
+
+    def repair(self, alias, batch_size, dry_run):
+        """Compare counts batch by batch and save the ones that differ."""
+        checked = fixed = 0
+        last_id = 0
+        tags = Tag.objects.using(alias).with_actual_recipe_count().order_by("id")
+        while True:
+            batch = list(
+                tags.filter(id__gt=last_id).only("id", "recipe_count")[:batch_size]
+            )
+            if not batch:
+                return checked, fixed
+            last_id = batch[-1].id
+            checked += len(batch)
+            drifted = [
+                tag for tag in batch if tag.recipe_count != tag.actual_recipe_count
+            ]
+            fixed += len(drifted)
+            if drifted and not dry_run:
+                with sync_atomic(using=alias):
+                    Tag.objects.using(alias).filter(
+                        id__in=[tag.id for tag in drifted]
+                    ).recount()
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.4 on 2026-10-19 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0004_user_fk_without_db_constraint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name'], name='recipe_tag_user_name_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.1.4 on 2026-10-19 02:31
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_recipes(apps, schema_editor):
+    Tag = apps.get_model("recipe", "Tag")
+    RecipeTag = apps.get_model("recipe", "Recipe").tags.through
+    recipe_tags = (
+        RecipeTag.objects.filter(tag=OuterRef("pk"))
+        .order_by()
+        .values("tag")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Tag.objects.using(schema_editor.connection.alias).update(
+        recipe_count=Coalesce(Subquery(recipe_tags), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0005_tag_user_name_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_recipes, migrations.RunPython.noop),
+    ]
@@ -1,36 +1,141 @@
 from django.db.models import (
     Model,
+    QuerySet,
+    Count,
+    OuterRef,
+    Subquery,
     IntegerField,
+    PositiveIntegerField,
+    BigIntegerField,
     CharField,
+    DateTimeField,
     TextField,
     DecimalField,
     ForeignKey,
     ManyToManyField,
+    Index,
+    Q,
     SET_NULL,
     CASCADE,
 )
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.conf import settings
 
 
+# Users live on the default database while recipes and tags may live on a
+# shard (see src.core.sharding), so user foreign keys have no DB constraint.
+
+
 class Recipe(Model):
-    user = ForeignKey(get_user_model(), null=True, on_delete=SET_NULL)
+    user = ForeignKey(
+        get_user_model(),
+        null=True,
+        on_delete=SET_NULL,
+        db_constraint=False,
+        db_index=False,
+    )
     title = CharField(max_length=40)
     time_minutes = IntegerField()
     price = DecimalField(decimal_places=2, max_digits=8)
     description = TextField()
     link = CharField(max_length=255, blank=True)
     tags = ManyToManyField("Tag", blank=True)
+    # Also bumped when the recipe's tags change. Queryset updates skip
+    # auto_now, so they set it themselves.
+    updated_at = DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Recipes of deleted users are kept with no user; leave them out
+            # of the index every user-scoped query goes through.
+            Index(
+                fields=["user", "updated_at"],
+                name="recipe_user_updated_idx",
+                condition=Q(user__isnull=False),
+            ),
+        ]
 
     def __str__(self):
-        return f"user.id={self.user.id}, title={self.title}"
+        return f"user.id={self.user_id}, title={self.title}"
+
+
+class TagQuerySet(QuerySet):
+    def with_actual_recipe_count(self):
+        """Annotate the number of recipes counted from the recipe tags."""
+        return self.annotate(actual_recipe_count=_count_recipe_tags())
+
+    def recount(self):
+        """Set `recipe_count` of the tags from their recipe tags."""
+        return self.update(
+            recipe_count=_count_recipe_tags(), updated_at=timezone.now()
+        )
+
+
+def _count_recipe_tags():
+    recipe_tags = (
+        Recipe.tags.through.objects.filter(tag=OuterRef("pk"))
+        .order_by()
+        .values("tag")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return Coalesce(Subquery(recipe_tags), 0)
 
 
 class Tag(Model):
     """Tag for filtering recipes."""
 
-    user = ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE)
+    user = ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, db_constraint=False)
     name = CharField(max_length=255)
+    # Denormalized number of recipes with the tag, kept by the code that
+    # changes recipe tags. `manage.py recount_tags` repairs it.
+    recipe_count = PositiveIntegerField(default=0)
+    updated_at = DateTimeField(auto_now=True)
+
+    objects = TagQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Serves tag autocomplete: `name LIKE 'prefix%'` within one user.
+            # The operator classes only apply on PostgreSQL, where a plain
+            # varchar index can't be used for LIKE outside the C locale.
+            Index(
+                fields=["user", "name"],
+                name="recipe_tag_user_name_idx",
+                opclasses=["int8_ops", "varchar_pattern_ops"],
+            ),
+            Index(fields=["user", "updated_at"], name="recipe_tag_user_updated_idx"),
+        ]
+
+    def __str__(self):
+        return f"user.id={self.user_id}, name={self.name}"
+
+
+class TombstoneQuerySet(QuerySet):
+    def record(self, user_id, model, ids):
+        """Record that the user's `model` rows with `ids` were deleted."""
+        return self.bulk_create(
+            Tombstone(user_id=user_id, model=model._meta.model_name, object_id=id)
+            for id in ids
+        )
+
+
+class Tombstone(Model):
+    """Deleted recipe or tag, for clients syncing changes (see SyncView)."""
+
+    user = ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, db_constraint=False)
+    model = CharField(max_length=20, choices=[("recipe", "recipe"), ("tag", "tag")])
+    object_id = BigIntegerField()
+    deleted_at = DateTimeField(default=timezone.now)
+
+    objects = TombstoneQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            Index(fields=["user", "deleted_at"], name="recipe_tombstone_user_idx"),
+        ]
 
     def __str__(self):
-        return f"user.id={self.user.id}, name={self.name}"
+        return f"user.id={self.user_id}, {self.model}.id={self.object_id}"
@@ -1,16 +1,113 @@
-from rest_framework.serializers import ModelSerializer
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Count, F, OuterRef, Subquery
+from django.utils import timezone
+from rest_framework.serializers import (
+    BooleanField,
+    CharField,
+    DateTimeField,
+    IntegerField,
+    ListField,
+    ModelSerializer,
+    PrimaryKeyRelatedField,
+    Serializer,
+    ValidationError,
+)
 
-from .models import Recipe, Tag
+from src.core.serializers import SparseFieldsetSerializerMixin
+from src.core.sharding import shard_for_user
 
+from .models import Recipe, Tag, Tombstone
+from .sync import sync_atomic
 
-class TagSerializer(ModelSerializer):
+
+RecipeTag = Recipe.tags.through
+
+
+class TagSerializer(SparseFieldsetSerializerMixin, ModelSerializer):
     class Meta:
         model = Tag
         fields = ["id", "name"]
         read_only_fields = ["id"]
 
 
-class RecipeSerializer(ModelSerializer):
+class TagDetailSerializer(TagSerializer):
+    """Tag as the tag endpoints show it, leaving the one nested in recipes as is."""
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ["recipe_count"]
+        read_only_fields = TagSerializer.Meta.read_only_fields + ["recipe_count"]
+
+
+class TagAutocompleteQuerySerializer(Serializer):
+    """Validate the query parameters of tag autocomplete."""
+
+    prefix = CharField(max_length=255, trim_whitespace=False)
+    limit = IntegerField(min_value=1, max_value=50, default=10)
+
+
+# Range of the BigAutoField primary keys, beyond which databases can't
+# even compare ids.
+MAX_ID = 2**63 - 1
+
+
+class RecipeIdsQuerySerializer(Serializer):
+    """Validate the comma-separated `ids` of multi-get."""
+
+    ids = CharField()
+
+    def validate_ids(self, value):
+        try:
+            # Deduplicated, in the requested order.
+            ids = list(dict.fromkeys(int(id) for id in value.split(",") if id))
+        except ValueError:
+            raise ValidationError("Must be comma-separated integers.")
+        if any(not 1 <= id <= MAX_ID for id in ids):
+            raise ValidationError(f"Ids must be between 1 and {MAX_ID}.")
+        if not ids:
+            raise ValidationError("No ids given.")
+        if len(ids) > settings.RECIPE_MULTI_GET_MAX:
+            raise ValidationError(
+                f"At most {settings.RECIPE_MULTI_GET_MAX} ids can be fetched at once."
+            )
+        return ids
+
+
+class TagMergeSerializer(Serializer):
+    """Merge a tag into the `target` tag, chosen from `context["targets"]`."""
+
+    target = PrimaryKeyRelatedField(queryset=Tag.objects.none())
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["target"].queryset = self.context["targets"]
+        return fields
+
+    def update(self, instance, validated_data):
+        """Move the tag's recipe tags to the target, then delete the tag."""
+        target = validated_data["target"]
+        db, now = instance._state.db, timezone.now()
+        recipe_tags = RecipeTag.objects.using(db)
+        with sync_atomic(using=db):
+            Recipe.objects.using(db).filter(
+                id__in=recipe_tags.filter(tag=instance).values("recipe")
+            ).update(updated_at=now)
+            moved = (
+                recipe_tags.filter(tag=instance)
+                .exclude(recipe__in=recipe_tags.filter(tag=target).values("recipe"))
+                .update(tag=target)
+            )
+            Tag.objects.using(db).filter(id=target.id).update(
+                recipe_count=F("recipe_count") + moved, updated_at=now
+            )
+            Tombstone.objects.using(db).record(instance.user_id, Tag, [instance.id])
+            # Deletes the recipe tags left over for recipes having both tags.
+            instance.delete()
+        target.refresh_from_db()
+        return target
+
+
+class RecipeSerializer(SparseFieldsetSerializerMixin, ModelSerializer):
     tags = TagSerializer(many=True, required=False)
 
     class Meta:
@@ -19,34 +116,246 @@ class RecipeSerializer(ModelSerializer):
         read_only_fields = ["id"]
 
     def _get_or_create_tags(self, tags, recipe):
-        """Handle getting or creating tags as needed."""
+        """Handle getting or creating tags as needed, return their ids."""
         auth_user = self.context["request"].user
+        tag_ids = set()
         for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(user=auth_user, **tag)
+            tag_obj, created = Tag.objects.using(recipe._state.db).get_or_create(
+                user=auth_user, **tag
+            )
             recipe.tags.add(tag_obj)
-        return recipe
+            tag_ids.add(tag_obj.id)
+        return tag_ids
+
+    def _recount_tags(self, recipe, tag_ids):
+        """Refresh the recipe counts of tags added to or removed from recipe."""
+        if tag_ids:
+            Tag.objects.using(recipe._state.db).filter(id__in=tag_ids).recount()
 
     def create(self, validated_data):
         """Create a recipe."""
         tags = validated_data.pop("tags", [])
-        recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
+        shard = shard_for_user(self.context["request"].user.id)
+        with sync_atomic(using=shard):
+            recipe = Recipe.objects.using(shard).create(**validated_data)
+            self._recount_tags(recipe, self._get_or_create_tags(tags, recipe))
         return recipe
 
     def update(self, instance, validated_data):
         """Update a recipe."""
         tags = validated_data.pop("tags", None)
-        if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+        with sync_atomic(using=instance._state.db):
+            if tags is not None:
+                old_tag_ids = set(instance.tags.values_list("id", flat=True))
+                instance.tags.clear()
+                new_tag_ids = self._get_or_create_tags(tags, instance)
+                self._recount_tags(instance, old_tag_ids | new_tag_ids)
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
 
-        instance.save()
+            instance.save()
         return instance
 
 
 class RecipeDetailSerializer(RecipeSerializer):
     class Meta(RecipeSerializer.Meta):
         fields = RecipeSerializer.Meta.fields + ["description"]
+
+
+class SyncQuerySerializer(Serializer):
+    """Validate the query parameters of sync."""
+
+    since = DateTimeField(required=False)
+
+
+class SyncDeletedSerializer(Serializer):
+    recipes = ListField(child=IntegerField())
+    tags = ListField(child=IntegerField())
+
+
+class SyncSerializer(Serializer):
+    cursor = DateTimeField()
+    full = BooleanField()
+    recipes = RecipeDetailSerializer(many=True)
+    tags = TagDetailSerializer(many=True)
+    deleted = SyncDeletedSerializer()
+
+
+class RecipeSelectionSerializer(Serializer):
+    """
+    Select recipes by `ids`, by the tag ids they're `tagged` with (any of),
+    or both. Bulk operations take the user's recipes from `context["recipes"]`
+    and the request from `context["request"]`.
+    """
+
+    ids = ListField(
+        child=IntegerField(), required=False, allow_empty=False, max_length=1000
+    )
+    tagged = ListField(
+        child=IntegerField(), required=False, allow_empty=False, max_length=100
+    )
+
+    def validate(self, attrs):
+        if "ids" not in attrs and "tagged" not in attrs:
+            raise ValidationError("Select recipes with `ids` and/or `tagged`.")
+        return attrs
+
+    def selected_ids(self):
+        """Return the ids of the selected recipes, fixed before any changes."""
+        recipes = self.context["recipes"]
+        if "ids" in self.validated_data:
+            recipes = recipes.filter(id__in=self.validated_data["ids"])
+        if "tagged" in self.validated_data:
+            tagged = RecipeTag.objects.filter(tag_id__in=self.validated_data["tagged"])
+            recipes = recipes.filter(id__in=tagged.values("recipe_id"))
+        return list(recipes.order_by().values_list("id", flat=True))
+
+    @property
+    def db(self):
+        recipes = self.context["recipes"]
+        return recipes._db or router.db_for_write(Recipe)
+
+
+class RecipeBulkDeleteSerializer(RecipeSelectionSerializer):
+    def delete(self):
+        """Delete the selected recipes, return how many were deleted."""
+        ids, db = self.selected_ids(), self.db
+        if not ids:
+            return 0
+        recipe_tags = RecipeTag.objects.using(db).filter(recipe_id__in=ids)
+        uncounted = (
+            recipe_tags.filter(tag=OuterRef("pk"))
+            .order_by()
+            .values("tag")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        with sync_atomic(using=db):
+            Tag.objects.using(db).filter(id__in=recipe_tags.values("tag")).update(
+                recipe_count=F("recipe_count") - Subquery(uncounted),
+                updated_at=timezone.now(),
+            )
+            Tombstone.objects.using(db).record(
+                self.context["request"].user.id, Recipe, ids
+            )
+            # The collector fetches the recipes and deletes their recipe tags.
+            _, deleted = Recipe.objects.using(db).filter(id__in=ids).delete()
+            return deleted.get(Recipe._meta.label, 0)
+
+
+class RecipeBulkTagsSerializer(RecipeSelectionSerializer):
+    """Also takes the user's tags as `context["tags"]`."""
+
+    add = ListField(child=IntegerField(), required=False, max_length=100)
+    remove = ListField(child=IntegerField(), required=False, max_length=100)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        tag_ids = set(attrs.get("add", [])) | set(attrs.get("remove", []))
+        if not tag_ids:
+            raise ValidationError("Give tag ids to `add` and/or `remove`.")
+        found = self.context["tags"].filter(id__in=tag_ids).values_list("id", flat=True)
+        missing = tag_ids - set(found)
+        if missing:
+            raise ValidationError(f"Tags {sorted(missing)} do not exist.")
+        return attrs
+
+    def save_tags(self):
+        """Add and remove the tags on the selected recipes, return row counts."""
+        ids, db = self.selected_ids(), self.db
+        add = self.validated_data.get("add", [])
+        remove = self.validated_data.get("remove", [])
+        added = removed = 0
+        if not ids:
+            return added, removed
+        with sync_atomic(using=db):
+            if remove:
+                removed, _ = (
+                    RecipeTag.objects.using(db)
+                    .filter(recipe_id__in=ids, tag_id__in=remove)
+                    .delete()
+                )
+            if add:
+                added = _add_recipe_tags(
+                    db,
+                    Recipe.objects.using(db).filter(id__in=ids),
+                    Tag.objects.using(db).filter(id__in=add),
+                )
+            Tag.objects.using(db).filter(id__in=[*add, *remove]).recount()
+            Recipe.objects.using(db).filter(id__in=ids).update(
+                updated_at=timezone.now()
+            )
+        return added, removed
+
+
+class RecipeDuplicateSerializer(Serializer):
+    count = IntegerField(min_value=1, max_value=50, default=1)
+
+    def duplicate(self):
+        """Copy the recipe and its tags `count` times, return the copies' ids."""
+        db, count = self.instance._state.db, self.validated_data["count"]
+        now = timezone.now()
+        with sync_atomic(using=db):
+            ids = _copy_recipe(db, self.instance.id, count, now)
+            _add_recipe_tags(
+                db,
+                Recipe.objects.using(db).filter(id__in=ids),
+                Tag.objects.using(db).filter(recipe=self.instance),
+            )
+            Tag.objects.using(db).filter(recipe=self.instance).update(
+                recipe_count=F("recipe_count") + count, updated_at=now
+            )
+        return ids
+
+
+def _copy_recipe(db, recipe_id, count, updated_at):
+    """
+    Insert `count` copies of a recipe row with one INSERT ... SELECT and
+    return their ids. Needs INSERT ... RETURNING (PostgreSQL, SQLite 3.35+).
+    """
+    connection = connections[db]
+    quote = connection.ops.quote_name
+    table = quote(Recipe._meta.db_table)
+    pk = quote(Recipe._meta.pk.column)
+    fields = [field for field in Recipe._meta.concrete_fields if not field.primary_key]
+    columns = ", ".join(quote(field.column) for field in fields)
+    values = ", ".join(
+        "%s" if field.name == "updated_at" else quote(field.column) for field in fields
+    )
+    sql = (
+        "WITH RECURSIVE copies(n) AS "
+        "(SELECT 1 UNION ALL SELECT n + 1 FROM copies WHERE n < %s) "
+        f"INSERT INTO {table} ({columns}) "
+        f"SELECT {values} FROM {table} CROSS JOIN copies WHERE {pk} = %s "
+        f"RETURNING {pk}"
+    )
+    updated_at = connection.ops.adapt_datetimefield_value(updated_at)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (count, updated_at, recipe_id))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _add_recipe_tags(db, recipes, tags):
+    """
+    Add every tag to every recipe with one INSERT ... SELECT, skipping the
+    pairs that already exist. Return the number of recipe tags created.
+    """
+    connection = connections[db]
+    quote = connection.ops.quote_name
+    table = quote(RecipeTag._meta.db_table)
+    recipe_id = quote(RecipeTag._meta.get_field("recipe").column)
+    tag_id = quote(RecipeTag._meta.get_field("tag").column)
+    recipes_sql, recipes_params = (
+        recipes.order_by().values("id").query.get_compiler(db).as_sql()
+    )
+    tags_sql, tags_params = tags.order_by().values("id").query.get_compiler(db).as_sql()
+    sql = (
+        f"INSERT INTO {table} ({recipe_id}, {tag_id}) "
+        f"SELECT r.id, t.id FROM ({recipes_sql}) r CROSS JOIN ({tags_sql}) t "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {table} rt "
+        f"WHERE rt.{recipe_id} = r.id AND rt.{tag_id} = t.id)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (*recipes_params, *tags_params))
+        return cursor.rowcount
@@ -0,0 +1,22 @@
+"""Signal handlers for the recipe app."""
+from django.conf import settings
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from src.core.sharding import shard_for_user
+
+from .models import Recipe, Tag, Tombstone
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def delete_sharded_user_data(sender, instance, using, **kwargs):
+    """
+    Apply the user foreign keys' `on_delete` on the user's shard, which
+    Django's deletion collector doesn't see when it isn't the user's database.
+    """
+    shard = shard_for_user(instance.pk)
+    if shard is None or shard == using:
+        return
+    Tag.objects.using(shard).filter(user_id=instance.pk).delete()
+    Tombstone.objects.using(shard).filter(user_id=instance.pk).delete()
+    Recipe.objects.using(shard).filter(user_id=instance.pk).update(user=None)
@@ -0,0 +1,35 @@
+"""
+Writes to the recipes, tags and tombstones clients sync (see SyncView).
+
+Sync hands out the time it ran as the next cursor and then returns the
+changes timed after it, less SYNC_CURSOR_OVERLAP_SECONDS. Changes are timed
+(updated_at, deleted_at) before their transaction commits, so one committing
+longer than that after its time could be missed for good: sync_atomic rolls
+those back instead.
+"""
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from src.core.exceptions import ServiceUnavailable
+
+
+class SyncWriteTooSlow(ServiceUnavailable):
+    default_detail = "The change took too long to be synced safely, try again."
+    default_code = "sync_write_too_slow"
+
+
+@contextmanager
+def sync_atomic(using=None):
+    """
+    Run the block in a transaction, rolled back by raising SyncWriteTooSlow
+    when it ends SYNC_CURSOR_OVERLAP_SECONDS or more after it started. Use it
+    outermost: inside another transaction, the commit waits for that one.
+    """
+    started = time.monotonic()
+    with transaction.atomic(using=using):
+        yield
+        if time.monotonic() - started >= settings.SYNC_CURSOR_OVERLAP_SECONDS:
+            raise SyncWriteTooSlow()
@@ -7,7 +7,10 @@ from ..models import Recipe, Tag
 
 
 RECIPE_LIST_URL = reverse("recipe:recipe-list")
+RECIPE_BULK_DELETE_URL = reverse("recipe:recipe-bulk-delete")
+RECIPE_BULK_TAGS_URL = reverse("recipe:recipe-bulk-tags")
 TAG_LIST_URL = reverse("recipe:tag-list")
+TAG_AUTOCOMPLETE_URL = reverse("recipe:tag-autocomplete")
 
 USER_DEFAULTS = {"email": "test@example.com", "password": "testpass123S"}
 RECIPE_DEFAULTS = {
@@ -25,10 +28,18 @@ def create_tag_detail_url(tag_id):
     return reverse("recipe:tag-detail", args=(tag_id,))
 
 
+def create_tag_merge_url(tag_id):
+    return reverse("recipe:tag-merge", args=(tag_id,))
+
+
 def create_recipe_detail_url(recipe_id):
     return reverse("recipe:recipe-detail", args=(recipe_id,))
 
 
+def create_recipe_duplicate_url(recipe_id):
+    return reverse("recipe:recipe-duplicate", args=(recipe_id,))
+
+
 def create_user(**params):
     defaults = USER_DEFAULTS.copy()
     defaults.update(params)
@@ -0,0 +1,91 @@
+"""
+Tests for the recipe admin.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .services import create_recipe, create_tag, create_user
+
+
+class RecipeAdminTest(TestCase):
+    """Tests the recipe and tag admin pages."""
+
+    def setUp(self):
+        """Creates an admin, two users with recipes and tags, and logs in."""
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@example.com", "testpass123S"
+        )
+        self.client.force_login(self.admin)
+        self.user1 = create_user(email="test1@example.com")
+        self.user2 = create_user(email="test2@example.com")
+        self.tag1 = create_tag(user=self.user1, name="user1-tag")
+        self.tag2 = create_tag(user=self.user2, name="user2-tag")
+        self.recipe = create_recipe(user=self.user1)
+        self.recipe.tags.add(self.tag1)
+
+    def changelist_queries(self, url):
+        """Return the number of queries made to render the changelist."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_changelists_query_count_constant(self):
+        """Test the changelists don't make a query per row."""
+        for url_name, create in (
+            ("admin:recipe_recipe_changelist", create_recipe),
+            ("admin:recipe_tag_changelist", create_tag),
+        ):
+            url = reverse(url_name)
+            queries = self.changelist_queries(url)
+            for _ in range(5):
+                create(user=self.user2)
+            self.assertEqual(self.changelist_queries(url), queries)
+
+    def test_change_form_only_links_user_tags(self):
+        """Test the tags widget neither loads nor offers other users' tags."""
+        url = reverse("admin:recipe_recipe_change", args=(self.recipe.id,))
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "user2-tag")
+        self.assertContains(response, f"user__id__exact={self.user1.id}")
+
+    def test_change_form_rejects_other_users_tags(self):
+        """Test a recipe can't be given another user's tags."""
+        url = reverse("admin:recipe_recipe_change", args=(self.recipe.id,))
+        payload = {
+            "user": self.user1.id,
+            "title": "title",
+            "time_minutes": 5,
+            "price": "1.00",
+            "description": "description",
+            "tags": str(self.tag2.id),
+        }
+
+        response = self.client.post(url, payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.recipe.tags.all()), [self.tag1])
+
+    def test_user_autocomplete(self):
+        """Test the user widget searches users by email prefix."""
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "recipe",
+                "model_name": "recipe",
+                "field_name": "user",
+                "term": "test2",
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["text"] for result in response.json()["results"]],
+            ["test2@example.com"],
+        )
@@ -0,0 +1,118 @@
+"""
+Tests for the async read views.
+"""
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.test import AsyncRequestFactory, override_settings
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from .services import (
+    RECIPE_LIST_URL,
+    TAG_LIST_URL,
+    create_recipe,
+    create_recipe_detail_url,
+    create_tag,
+    create_user,
+)
+from ..models import Recipe
+from ..urls import async_read_urlpatterns
+
+
+ASYNC_VIEWS = {url.name: url.callback for url in async_read_urlpatterns}
+
+
+class AsyncReadViewsTest(APITestCase, APIClient):
+    """Tests GET recipes and tags with the async views."""
+
+    def setUp(self):
+        """Creates client authenticated with a token, user with a tagged recipe."""
+        self.client = APIClient()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.recipe = create_recipe(user=self.user)
+        self.recipe.tags.add(create_tag(user=self.user))
+        create_recipe(user=self.user)
+        create_recipe(user=create_user(email="test2@example.com"))
+        self.factory = AsyncRequestFactory()
+
+    async def get(self, name, path, data=None, token=None, **kwargs):
+        headers = {}
+        if token is not False:
+            headers["Authorization"] = f"Token {token or self.token.key}"
+        request = self.factory.get(path, data, **headers)
+        return await ASYNC_VIEWS[name](request, **kwargs)
+
+    async def assert_same_as_sync(self, name, path, **kwargs):
+        response = await self.get(name, path, **kwargs)
+        expected = await sync_to_async(self.client.get)(path)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response["Content-Type"], expected["Content-Type"])
+        self.assertEqual(response.content, expected.content)
+
+    async def test_recipe_list(self):
+        """Test listing recipes matches the sync view."""
+        await self.assert_same_as_sync("recipe-list", RECIPE_LIST_URL)
+
+    async def test_recipe_detail(self):
+        """Test getting a recipe matches the sync view."""
+        await self.assert_same_as_sync(
+            "recipe-detail", create_recipe_detail_url(self.recipe.id), pk=self.recipe.id
+        )
+
+    async def test_recipe_detail_not_found(self):
+        """Test another user's recipe isn't found."""
+        await self.assert_same_as_sync(
+            "recipe-detail", create_recipe_detail_url(0), pk=0
+        )
+
+    async def test_tag_list(self):
+        """Test listing tags matches the sync view."""
+        await self.assert_same_as_sync("tag-list", TAG_LIST_URL)
+
+    async def test_auth_required(self):
+        """Test missing or invalid tokens are rejected like the sync view does."""
+        for token in (False, "invalid"):
+            response = await self.get("recipe-list", RECIPE_LIST_URL, token=token)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(response["WWW-Authenticate"], "Token")
+
+    @patch("src.core.throttling._stores", {})
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"reads": "1/min"},
+        }
+    )
+    async def test_throttled(self):
+        """Test reads are throttled like the sync view does."""
+        await self.get("tag-list", TAG_LIST_URL)
+
+        response = await self.get("tag-list", TAG_LIST_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "60")
+
+    async def test_fallback_to_sync_view(self):
+        """Test requests with query parameters are served by the sync view."""
+        response = await self.get("recipe-list", RECIPE_LIST_URL, {"fields": "id"})
+        response.render()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data, [{"id": recipe_id} for recipe_id in await self.recipe_ids()]
+        )
+
+    @sync_to_async
+    def recipe_ids(self):
+        return list(
+            Recipe.objects.filter(user=self.user)
+            .order_by("-id")
+            .values_list("id", flat=True)
+        )
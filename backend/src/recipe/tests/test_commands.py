@@ -0,0 +1,105 @@
+"""
+Tests for the recipe management commands.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .services import create_recipe, create_tag, create_user
+from ..models import Recipe, Tag
+
+
+class RecountTagsTests(TestCase):
+    """Test the recount_tags command."""
+
+    def setUp(self):
+        """Creates user and tags, one with a drifted recipe count."""
+        self.user = create_user()
+        self.tag = create_tag(user=self.user)
+        self.unused = create_tag(user=self.user, name="unused")
+        for _ in range(2):
+            create_recipe(user=self.user).tags.add(self.tag)
+        Tag.objects.filter(id=self.unused.id).update(recipe_count=3)
+
+    def test_recount_tags(self):
+        """Test drifted counts are fixed across batches."""
+        out = StringIO()
+
+        call_command("recount_tags", batch_size=1, stdout=out)
+
+        self.assertIn("default: checked 2 tags, fixed 2.", out.getvalue())
+        counts = dict(Tag.objects.values_list("id", "recipe_count"))
+        self.assertEqual(counts, {self.tag.id: 2, self.unused.id: 0})
+
+    def test_recount_tags_dry_run(self):
+        """Test a dry run only reports the drifted tags."""
+        out = StringIO()
+
+        call_command("recount_tags", dry_run=True, stdout=out)
+
+        self.assertIn("default: checked 2 tags, would fix 2.", out.getvalue())
+        self.unused.refresh_from_db()
+        self.assertEqual(self.unused.recipe_count, 3)
+
+
+class PurgeDeletedUsersTests(TestCase):
+    """Test the purge_deleted_users command."""
+
+    def setUp(self):
+        """Creates a deleted user with tagged recipes and a kept user."""
+        self.user = create_user(is_active=False, deleted_at=timezone.now())
+        tags = [create_tag(user=self.user, name=f"tag{i}") for i in range(3)]
+        self.recipes = [create_recipe(user=self.user) for _ in range(3)]
+        for recipe in self.recipes:
+            recipe.tags.add(*tags)
+
+        self.kept = create_user(email="test2@example.com")
+        self.kept_recipe = create_recipe(user=self.kept)
+        self.kept_recipe.tags.add(create_tag(user=self.kept))
+
+    def test_purge_deleted_users(self):
+        """Test the user's data goes in batches and the user is deleted."""
+        out = StringIO()
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command("purge_deleted_users", batch_size=2, stdout=out)
+
+        self.assertIn(
+            f"Purged user {self.user.id}: 9 recipe tags and 3 tags deleted, "
+            "3 recipes orphaned.",
+            out.getvalue(),
+        )
+        self.assertFalse(get_user_model().objects.filter(id=self.user.id).exists())
+        self.assertFalse(Tag.objects.filter(user_id=self.user.id).exists())
+        self.assertEqual(
+            Recipe.objects.filter(user__isnull=True).count(), len(self.recipes)
+        )
+        self.assertEqual(
+            list(Recipe.objects.filter(user=self.kept)), [self.kept_recipe]
+        )
+        self.assertEqual(self.kept_recipe.tags.count(), 1)
+        orphaning = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('UPDATE "recipe_recipe"')
+        ]
+        self.assertEqual(len(orphaning), 2)
+
+    def test_purge_deleted_users_resumes(self):
+        """Test a run picks up the rows an interrupted run left."""
+        Recipe.tags.through.objects.filter(recipe=self.recipes[0]).delete()
+        self.recipes[1].user = None
+        self.recipes[1].save()
+
+        out = StringIO()
+        call_command("purge_deleted_users", stdout=out)
+
+        self.assertIn(
+            "6 recipe tags and 3 tags deleted, 2 recipes orphaned.", out.getvalue()
+        )
+        self.assertFalse(get_user_model().objects.filter(id=self.user.id).exists())
@@ -3,13 +3,19 @@ Tests for the Recipe API.
 """
 from decimal import Decimal
 
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
 from .services import (
     RECIPE_LIST_URL,
+    RECIPE_BULK_DELETE_URL,
+    RECIPE_BULK_TAGS_URL,
     RECIPE_DEFAULTS,
     create_recipe_detail_url,
+    create_recipe_duplicate_url,
     create_user,
     create_recipe,
 )
@@ -123,6 +129,23 @@ class RecipeCreateTest(APITestCase, APIClient):
             ).exists()
             self.assertTrue(exists)
 
+    def test_create_recipe_counts_tags(self):
+        """Test creating a recipe increments the recipe counts of its tags."""
+        tag = create_recipe(user=self.user).tags.create(
+            user=self.user, name="tag-name1", recipe_count=1
+        )
+        payload = RECIPE_DEFAULTS.copy()
+        payload["tags"] = [{"name": "tag-name1"}, {"name": "tag-name2"}]
+        response = self.client.post(RECIPE_LIST_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        counts = dict(Tag.objects.values_list("name", "recipe_count"))
+        self.assertEqual(counts, {tag.name: 2, "tag-name2": 1})
+        # The counts are shown by the tag endpoints, not in recipes.
+        self.assertEqual(
+            [set(tag) for tag in response.data["tags"]], [{"id", "name"}] * 2
+        )
+
 
 class RecipeListNotAuthenticatedAPITest(APITestCase, APIClient):
     """Tests calling endpoint with the unauthenticated user."""
@@ -143,6 +166,137 @@ class RecipeListNotAuthenticatedAPITest(APITestCase, APIClient):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class RecipeSparseFieldsTest(APITestCase, APIClient):
+    """Tests GET recipes with sparse fieldsets."""
+
+    def setUp(self):
+        """Creates client, user and two tagged recipes."""
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name="tag")
+        self.recipes = [create_recipe(user=self.user) for _ in range(2)]
+        for recipe in self.recipes:
+            recipe.tags.add(self.tag)
+
+    def test_list_tags_prefetched(self):
+        """Test listing recipes with their tags doesn't query per recipe."""
+        with self.assertNumQueries(2):
+            response = self.client.get(RECIPE_LIST_URL)
+
+        self.assertEqual(response.data[0]["tags"][0]["name"], "tag")
+
+    def test_list_sparse_fields(self):
+        """Test only the requested columns are read and returned."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(RECIPE_LIST_URL, {"fields": "id,title"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data[0],
+            {"id": self.recipes[1].id, "title": RECIPE_DEFAULTS["title"]},
+        )
+        [query] = queries
+        self.assertNotIn('"price"', query["sql"])
+
+    def test_list_sparse_fields_expand_tags(self):
+        """Test tags are included and prefetched when expanded."""
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                RECIPE_LIST_URL, {"fields": "title", "expand": "tags"}
+            )
+
+        self.assertEqual(set(response.data[0]), {"title", "tags"})
+        self.assertEqual(response.data[0]["tags"][0]["name"], "tag")
+
+    def test_retrieve_sparse_fields(self):
+        """Test a detailed recipe can leave out its description."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                create_recipe_detail_url(self.recipes[0].id), {"fields": "id,price"}
+            )
+
+        self.assertEqual(response.data, {"id": self.recipes[0].id, "price": "100.90"})
+        [query] = queries
+        self.assertNotIn('"description"', query["sql"])
+
+    def test_sparse_fields_unknown(self):
+        """Test unknown fields and relations are rejected."""
+        for params in (
+            {"fields": "id,description"},
+            {"fields": "id", "expand": "title"},
+            {"expand": "user"},
+        ):
+            response = self.client.get(RECIPE_LIST_URL, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sparse_fields_ignored_on_write(self):
+        """Test updates still take and return every field."""
+        response = self.client.patch(
+            create_recipe_detail_url(self.recipes[0].id) + "?fields=id",
+            {"title": "New"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "New")
+        self.assertIn("description", response.data)
+
+
+class RecipeMultiGetTest(APITestCase, APIClient):
+    """Tests GET many recipes by id."""
+
+    def setUp(self):
+        """Creates client, user with three tagged recipes and another user's."""
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(user=self.user, name="tag")
+        self.recipes = [create_recipe(user=self.user) for _ in range(3)]
+        for recipe in self.recipes:
+            recipe.tags.add(tag)
+        self.other = create_recipe(user=create_user(email="test2@example.com"))
+
+    def get_ids(self, ids):
+        return self.client.get(RECIPE_LIST_URL, {"ids": ",".join(map(str, ids))})
+
+    def test_multi_get(self):
+        """Test details come back in the requested order with one tag query."""
+        ids = [self.recipes[2].id, self.recipes[0].id]
+
+        with self.assertNumQueries(2):
+            response = self.get_ids(ids)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            RecipeDetailSerializer([self.recipes[2], self.recipes[0]], many=True).data,
+        )
+        self.assertEqual(response.data["not_found"], [])
+
+    def test_multi_get_not_found(self):
+        """Test missing and other users' ids are reported, not fetched."""
+        response = self.get_ids([self.recipes[1].id, self.other.id, 2**63 - 1])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe["id"] for recipe in response.data["results"]], [self.recipes[1].id]
+        )
+        self.assertEqual(response.data["not_found"], [self.other.id, 2**63 - 1])
+
+    @override_settings(RECIPE_MULTI_GET_MAX=2)
+    def test_multi_get_invalid(self):
+        """Test too many, malformed or out of range ids are rejected."""
+        for ids in (
+            [recipe.id for recipe in self.recipes],
+            ["x"],
+            [""],
+            [0],
+            [10**20],
+        ):
+            response = self.get_ids(ids)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 # ________
 # GET,PUT,PATCH,DELETE /api/recipes/{id}/:
 
@@ -358,6 +512,21 @@ class UpdateDetailedTest(APITestCase, APIClient):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(self.recipe.tags.count(), 0)
 
+    def test_update_recipe_tags_recounted(self):
+        """Test replacing tags updates the recipe counts of old and new tags."""
+        kept = Tag.objects.create(user=self.user, name="kept", recipe_count=1)
+        removed = Tag.objects.create(user=self.user, name="removed", recipe_count=1)
+        self.recipe.tags.add(kept, removed)
+        payload = {"tags": [{"name": "kept"}, {"name": "added"}, {"name": "added"}]}
+
+        response = self.client.patch(
+            create_recipe_detail_url(self.recipe.id), payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counts = dict(Tag.objects.values_list("name", "recipe_count"))
+        self.assertEqual(counts, {"kept": 1, "removed": 0, "added": 1})
+
 
 class DeleteDetailedTest(APITestCase, APIClient):
     """Tests delete detailed recipe."""
@@ -375,6 +544,17 @@ class DeleteDetailedTest(APITestCase, APIClient):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Recipe.objects.filter(id=self.recipe.id).exists())
 
+    def test_delete_recipe_uncounts_tags(self):
+        """Test deleting a recipe decrements the recipe counts of its tags."""
+        tag = Tag.objects.create(user=self.user, name="tag-name", recipe_count=2)
+        self.recipe.tags.add(tag)
+        create_recipe(user=self.user).tags.add(tag)
+
+        self.client.delete(create_recipe_detail_url(self.recipe.id))
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+
     def test_delete_recipe_detailed_does_not_exist(self):
         """Test retrive recipe detailed."""
         user2 = create_user(email="test2@test.com")
@@ -382,3 +562,212 @@ class DeleteDetailedTest(APITestCase, APIClient):
         response = self.client.delete(create_recipe_detail_url(recipe.id))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+
+# ________
+# POST /api/recipes/{id}/duplicate/:
+
+
+class DuplicateTest(APITestCase, APIClient):
+    """Tests duplicating a recipe."""
+
+    def setUp(self):
+        """Creates client, user and a recipe with two tags."""
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user, link="https://example.com")
+        self.tags = [
+            Tag.objects.create(user=self.user, name=name, recipe_count=1)
+            for name in ("tag1", "tag2")
+        ]
+        self.recipe.tags.add(*self.tags)
+
+    def test_duplicate_recipe(self):
+        """Test a copy has the fields and tags of the recipe."""
+        response = self.client.post(create_recipe_duplicate_url(self.recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        [copy_id] = response.data["ids"]
+        self.assertNotEqual(copy_id, self.recipe.id)
+        copy = Recipe.objects.get(id=copy_id)
+        self.assertEqual(
+            RecipeDetailSerializer(copy).data,
+            {**RecipeDetailSerializer(self.recipe).data, "id": copy_id},
+        )
+        self.assertEqual(copy.user, self.user)
+        self.assertGreater(copy.updated_at, self.recipe.updated_at)
+        counts = dict(Tag.objects.values_list("name", "recipe_count"))
+        self.assertEqual(counts, {"tag1": 2, "tag2": 2})
+
+    def test_duplicate_recipe_count(self):
+        """Test making several copies with a constant number of queries."""
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(create_recipe_duplicate_url(self.recipe.id))
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post(
+                create_recipe_duplicate_url(self.recipe.id), {"count": 5}
+            )
+
+        self.assertEqual(len(response.data["ids"]), 5)
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(Recipe.objects.count(), 7)
+        self.assertEqual(Recipe.tags.through.objects.count(), 14)
+        self.assertEqual(Tag.objects.get(name="tag1").recipe_count, 7)
+
+    def test_duplicate_recipe_invalid_count(self):
+        """Test the count must be between 1 and 50."""
+        for count in (0, 51):
+            response = self.client.post(
+                create_recipe_duplicate_url(self.recipe.id), {"count": count}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_duplicate_other_users_recipe(self):
+        """Test another user's recipe can't be duplicated."""
+        user2 = create_user(email="test2@example.com")
+        self.client.force_authenticate(user2)
+
+        response = self.client.post(create_recipe_duplicate_url(self.recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_duplicate_invalid_id(self):
+        """Test an id that isn't a number is not found."""
+        response = self.client.post(create_recipe_duplicate_url("abc"))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+
+# ________
+# POST /api/recipes/bulk-delete/, /api/recipes/bulk-tags/:
+
+
+class BulkTest(APITestCase, APIClient):
+    """Tests bulk deleting and tagging recipes."""
+
+    def setUp(self):
+        """Creates client, user, two tags and three recipes, one tagged."""
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.tag1 = Tag.objects.create(user=self.user, name="tag1")
+        self.tag2 = Tag.objects.create(user=self.user, name="tag2")
+        self.recipes = [create_recipe(user=self.user) for _ in range(3)]
+        self.recipes[0].tags.add(self.tag1)
+        Tag.objects.recount()
+
+        self.other = create_user(email="test2@example.com")
+        self.other_recipe = create_recipe(user=self.other)
+
+    def create_recipes(self, count):
+        """Create tagged recipes, return their ids."""
+        recipes = [create_recipe(user=self.user) for _ in range(count)]
+        for recipe in recipes:
+            recipe.tags.add(self.tag1, self.tag2)
+        Tag.objects.recount()
+        return [recipe.id for recipe in recipes]
+
+    def count_queries(self, url, payload):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_bulk_delete_by_ids(self):
+        """Test deleting by ids only deletes the user's recipes."""
+        ids = [self.recipes[0].id, self.recipes[1].id, self.other_recipe.id]
+
+        response = self.client.post(RECIPE_BULK_DELETE_URL, {"ids": ids}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"deleted": 2})
+        self.assertEqual(
+            list(Recipe.objects.values_list("id", flat=True).order_by("id")),
+            [self.recipes[2].id, self.other_recipe.id],
+        )
+        self.tag1.refresh_from_db()
+        self.assertEqual(self.tag1.recipe_count, 0)
+
+    def test_bulk_delete_by_tag(self):
+        """Test deleting the recipes with a tag."""
+        response = self.client.post(
+            RECIPE_BULK_DELETE_URL, {"tagged": [self.tag1.id]}, format="json"
+        )
+
+        self.assertEqual(response.data, {"deleted": 1})
+        self.assertFalse(Recipe.objects.filter(id=self.recipes[0].id).exists())
+        self.assertFalse(Recipe.tags.through.objects.exists())
+
+    def test_bulk_delete_constant_queries(self):
+        """Test the number of queries doesn't grow with the recipes deleted."""
+        few = self.count_queries(
+            RECIPE_BULK_DELETE_URL, {"ids": self.create_recipes(1)}
+        )
+        many = self.count_queries(
+            RECIPE_BULK_DELETE_URL, {"ids": self.create_recipes(20)}
+        )
+
+        self.assertEqual(many, few)
+        self.assertEqual(Tag.objects.get(id=self.tag2.id).recipe_count, 0)
+
+    def test_bulk_delete_requires_selection(self):
+        """Test nothing is deleted without ids or tags."""
+        response = self.client.post(RECIPE_BULK_DELETE_URL, {}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Recipe.objects.count(), 4)
+
+    def test_bulk_tags(self):
+        """Test adding and removing tags across recipes."""
+        payload = {
+            "ids": [recipe.id for recipe in self.recipes] + [self.other_recipe.id],
+            "add": [self.tag2.id],
+            "remove": [self.tag1.id],
+        }
+
+        response = self.client.post(RECIPE_BULK_TAGS_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"added": 3, "removed": 1})
+        for recipe in self.recipes:
+            self.assertEqual(list(recipe.tags.all()), [self.tag2])
+        self.assertFalse(self.other_recipe.tags.exists())
+        counts = dict(Tag.objects.values_list("name", "recipe_count"))
+        self.assertEqual(counts, {"tag1": 0, "tag2": 3})
+
+    def test_bulk_tags_skips_existing(self):
+        """Test adding a tag recipes already have creates no duplicates."""
+        payload = {"tagged": [self.tag1.id], "add": [self.tag1.id, self.tag2.id]}
+
+        response = self.client.post(RECIPE_BULK_TAGS_URL, payload, format="json")
+
+        self.assertEqual(response.data, {"added": 1, "removed": 0})
+        self.assertEqual(self.recipes[0].tags.count(), 2)
+
+    def test_bulk_tags_constant_queries(self):
+        """Test the number of queries doesn't grow with the recipes tagged."""
+        payload = {"add": [self.tag1.id], "remove": [self.tag2.id]}
+
+        few = self.count_queries(
+            RECIPE_BULK_TAGS_URL, {"ids": self.create_recipes(1), **payload}
+        )
+        many = self.count_queries(
+            RECIPE_BULK_TAGS_URL, {"ids": self.create_recipes(20), **payload}
+        )
+
+        self.assertEqual(many, few)
+        self.assertEqual(Tag.objects.get(id=self.tag1.id).recipe_count, 22)
+
+    def test_bulk_tags_other_users_tag(self):
+        """Test another user's tags can't be added."""
+        tag = Tag.objects.create(user=self.other, name="other")
+        payload = {"ids": [self.recipes[1].id], "add": [tag.id]}
+
+        response = self.client.post(RECIPE_BULK_TAGS_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.recipes[1].tags.exists())
@@ -0,0 +1,201 @@
+"""
+Tests for sharding recipe data by user across SQLite databases.
+"""
+import shutil
+import tempfile
+from io import StringIO
+from itertools import count
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from src.core.models import UserShard
+from src.core.sharding import hashed_shard, shard_for_user
+from .services import (
+    RECIPE_DEFAULTS,
+    RECIPE_LIST_URL,
+    TAG_LIST_URL,
+    create_recipe_detail_url,
+    create_user,
+)
+from ..models import Recipe, Tag, Tombstone
+
+
+SHARDS = ["shard1", "shard2"]
+
+
+@override_settings(DATABASE_SHARDS=SHARDS)
+class ShardedAPITestCase(APITestCase, APIClient):
+    """
+    Runs tests with two SQLite files as shards next to the default database.
+    """
+
+    user_numbers = count()
+
+    @classmethod
+    def setUpClass(cls):
+        # The shards only exist for these tests, so they're registered here
+        # rather than in `databases`, which the runner checks beforehand.
+        cls.shard_dir = tempfile.mkdtemp()
+        default = connections.settings["default"]
+        for alias in SHARDS:
+            connections.settings[alias] = {
+                **default,
+                "NAME": f"{cls.shard_dir}/{alias}.sqlite3",
+                "TEST": {**default["TEST"], "NAME": None, "MIRROR": None},
+            }
+            call_command("migrate", database=alias, verbosity=0)
+        cls.databases = {"default", *SHARDS}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        shutil.rmtree(cls.shard_dir)
+
+    def create_user_on(self, shard):
+        """Create a user whose id hashes to `shard`."""
+        while True:
+            user = create_user(email=f"user{next(self.user_numbers)}@example.com")
+            if hashed_shard(user.id) == shard:
+                return user
+            user.delete()
+
+
+class ShardPlacementTest(ShardedAPITestCase):
+    """Tests recipe data is kept on the user's shard."""
+
+    def setUp(self):
+        """Creates a client and a user on each shard."""
+        self.client = APIClient()
+        self.user1 = self.create_user_on("shard1")
+        self.user2 = self.create_user_on("shard2")
+
+    def test_shard_for_user(self):
+        """Test users are placed by hash unless moved."""
+        self.assertEqual(shard_for_user(self.user1.id), "shard1")
+        self.assertEqual(shard_for_user(self.user2.id), "shard2")
+
+        UserShard.objects.create(user=self.user1, alias="shard2")
+
+        self.assertEqual(shard_for_user(self.user1.id), "shard2")
+
+    def test_create_recipe_with_tags_on_shard(self):
+        """Test recipe, tags and recipe tags are all written to the user's shard."""
+        self.client.force_authenticate(self.user2)
+        payload = {**RECIPE_DEFAULTS, "tags": [{"name": "tag1"}, {"name": "tag2"}]}
+
+        response = self.client.post(RECIPE_LIST_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.using("shard2").get(user=self.user2)
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertEqual(Tag.objects.using("shard2").count(), 2)
+        for alias in ("default", "shard1"):
+            self.assertFalse(Recipe.objects.using(alias).exists())
+            self.assertFalse(Tag.objects.using(alias).exists())
+
+    def test_read_update_delete_on_shard(self):
+        """Test the recipe endpoints work against the user's shard."""
+        self.client.force_authenticate(self.user1)
+        payload = {**RECIPE_DEFAULTS, "tags": [{"name": "tag1"}]}
+        response = self.client.post(RECIPE_LIST_URL, payload, format="json")
+        recipe_id = response.data["id"]
+        url = create_recipe_detail_url(recipe_id)
+
+        self.assertEqual(len(self.client.get(RECIPE_LIST_URL).data), 1)
+        self.assertEqual(len(self.client.get(TAG_LIST_URL).data), 1)
+        response = self.client.patch(
+            url, {"title": "New", "tags": [{"name": "tag2"}]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        recipe = Recipe.objects.using("shard1").get(id=recipe_id)
+        self.assertEqual(recipe.title, "New")
+        self.assertEqual([tag.name for tag in recipe.tags.all()], ["tag2"])
+        self.assertEqual(recipe.user, self.user1)
+
+        self.client.force_authenticate(self.user2)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(self.user1)
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Recipe.objects.using("shard1").exists())
+
+    def test_delete_user_cleans_shard(self):
+        """Test deleting a user deletes their tags and orphans their recipes."""
+        recipe = Recipe.objects.using("shard2").create(
+            user=self.user2, **RECIPE_DEFAULTS
+        )
+        Tag.objects.using("shard2").create(user=self.user2, name="tag")
+
+        self.user2.delete()
+
+        self.assertFalse(Tag.objects.using("shard2").exists())
+        recipe.refresh_from_db()
+        self.assertIsNone(recipe.user_id)
+
+
+class RebalanceUserTest(ShardedAPITestCase):
+    """Tests moving a user between shards."""
+
+    def setUp(self):
+        """Creates a user on shard1 with a tagged recipe."""
+        self.user = self.create_user_on("shard1")
+        self.recipe = Recipe.objects.using("shard1").create(
+            user=self.user, **RECIPE_DEFAULTS
+        )
+        self.tag = Tag.objects.using("shard1").create(user=self.user, name="tag")
+        self.recipe.tags.add(self.tag)
+        Tombstone.objects.using("shard1").record(self.user.id, Recipe, [1])
+
+    def test_rebalance_user(self):
+        """Test the user's rows move under new ids and the user follows."""
+        out = StringIO()
+
+        call_command("rebalance_user", self.user.id, "shard2", stdout=out)
+
+        self.assertIn("1 recipes, 1 tags, 1 recipe tags", out.getvalue())
+        self.assertEqual(shard_for_user(self.user.id), "shard2")
+        self.assertFalse(Recipe.objects.using("shard1").exists())
+        self.assertFalse(Tag.objects.using("shard1").exists())
+        self.assertFalse(Tombstone.objects.using("shard1").exists())
+        recipe = Recipe.objects.using("shard2").get(user=self.user)
+        self.assertEqual([tag.name for tag in recipe.tags.all()], ["tag"])
+        tombstones = Tombstone.objects.using("shard2").filter(user=self.user)
+        self.assertCountEqual(
+            tombstones.values_list("model", "object_id"),
+            [("recipe", 1), ("recipe", self.recipe.id), ("tag", self.tag.id)],
+        )
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(RECIPE_LIST_URL)
+        self.assertEqual([item["id"] for item in response.data], [recipe.id])
+
+    def test_rebalance_user_ids_taken(self):
+        """Test the rows get free ids when the target shard uses theirs."""
+        other = self.create_user_on("shard2")
+        Recipe.objects.using("shard2").create(
+            id=self.recipe.id, user=other, **RECIPE_DEFAULTS
+        )
+        Tag.objects.using("shard2").create(id=self.tag.id, user=other, name="other")
+
+        call_command("rebalance_user", self.user.id, "shard2", stdout=StringIO())
+
+        recipe = Recipe.objects.using("shard2").get(user=self.user)
+        self.assertNotEqual(recipe.id, self.recipe.id)
+        self.assertEqual([tag.name for tag in recipe.tags.all()], ["tag"])
+        other_recipe = Recipe.objects.using("shard2").get(user=other)
+        self.assertEqual(list(other_recipe.tags.all()), [])
+        self.assertEqual(shard_for_user(self.user.id), "shard2")
@@ -0,0 +1,146 @@
+"""
+Tests for the sync API.
+"""
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from .services import (
+    RECIPE_BULK_DELETE_URL,
+    create_recipe,
+    create_recipe_detail_url,
+    create_tag,
+    create_tag_detail_url,
+    create_user,
+)
+from ..models import Recipe, Tag, Tombstone
+
+
+SYNC_URL = reverse("recipe:sync")
+
+
+@override_settings(SYNC_CURSOR_OVERLAP_SECONDS=5, SYNC_TOMBSTONE_DAYS=30)
+class SyncTest(APITestCase, APIClient):
+    """Tests GET the changes since a cursor."""
+
+    def setUp(self):
+        """Creates client, user with a tagged recipe and another user's recipe."""
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        self.tag = create_tag(user=self.user)
+        self.recipe.tags.add(self.tag)
+        Tag.objects.recount()
+        create_recipe(user=create_user(email="test2@example.com"))
+        # Out of the overlap of the cursors handed out by the tests.
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Recipe.objects.update(updated_at=an_hour_ago)
+        Tag.objects.update(updated_at=an_hour_ago)
+
+    def sync(self, cursor=None):
+        params = {} if cursor is None else {"since": cursor}
+        response = self.client.get(SYNC_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_sync_everything(self):
+        """Test the first sync returns all the user's recipes and tags."""
+        data = self.sync()
+
+        self.assertEqual([recipe["id"] for recipe in data["recipes"]], [self.recipe.id])
+        self.assertEqual(data["recipes"][0]["description"], self.recipe.description)
+        self.assertEqual([tag["id"] for tag in data["tags"]], [self.tag.id])
+        self.assertEqual(data["deleted"], {"recipes": [], "tags": []})
+        self.assertTrue(data["full"])
+
+    def test_sync_no_changes(self):
+        """Test a sync with nothing new costs one query."""
+        cursor = self.sync()["cursor"]
+
+        with self.assertNumQueries(1):
+            data = self.sync(cursor)
+
+        self.assertEqual(data["recipes"], [])
+        self.assertEqual(data["tags"], [])
+        self.assertEqual(data["deleted"], {"recipes": [], "tags": []})
+        self.assertFalse(data["full"])
+
+    def test_sync_changes(self):
+        """Test updates and deletions after the cursor are returned."""
+        other = create_recipe(user=self.user)
+        cursor = self.sync()["cursor"]
+
+        self.client.patch(create_recipe_detail_url(other.id), {"title": "New"})
+        self.client.delete(create_tag_detail_url(self.tag.id))
+        data = self.sync(cursor)
+
+        self.assertEqual(
+            [(recipe["id"], recipe["tags"]) for recipe in data["recipes"]],
+            [(self.recipe.id, []), (other.id, [])],
+        )
+        self.assertEqual(data["tags"], [])
+        self.assertEqual(data["deleted"], {"recipes": [], "tags": [self.tag.id]})
+        # Changes within the overlap before a cursor are sent again.
+        self.assertEqual(len(self.sync(data["cursor"])["recipes"]), 2)
+
+    def test_sync_bulk_delete(self):
+        """Test recipes deleted in bulk leave tombstones."""
+        cursor = self.sync()["cursor"]
+
+        self.client.post(
+            RECIPE_BULK_DELETE_URL, {"ids": [self.recipe.id]}, format="json"
+        )
+        data = self.sync(cursor)
+
+        self.assertEqual(data["deleted"], {"recipes": [self.recipe.id], "tags": []})
+        self.assertEqual([tag["recipe_count"] for tag in data["tags"]], [0])
+        self.assertEqual(Tombstone.objects.filter(user=self.user).count(), 1)
+
+    def test_sync_expired_cursor(self):
+        """Test a cursor older than the tombstones kept syncs everything."""
+        cursor = timezone.now() - timedelta(days=31)
+        Tombstone.objects.record(self.user.id, Recipe, [self.recipe.id + 1])
+        Tombstone.objects.update(deleted_at=cursor)
+        call_command("prune_tombstones", stdout=StringIO())
+
+        data = self.sync(cursor)
+
+        self.assertTrue(data["full"])
+        self.assertEqual([recipe["id"] for recipe in data["recipes"]], [self.recipe.id])
+        self.assertEqual([tag["id"] for tag in data["tags"]], [self.tag.id])
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_slow_write_rolled_back(self):
+        """Test a change taking longer than the overlap isn't saved."""
+        url = create_recipe_detail_url(self.recipe.id)
+        with mock.patch("src.recipe.sync.time") as time:
+            time.monotonic.side_effect = [0, 5]
+            response = self.client.patch(url, {"title": "New"})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data["detail"].code, "sync_write_too_slow")
+        self.recipe.refresh_from_db()
+        self.assertNotEqual(self.recipe.title, "New")
+
+    def test_sync_invalid_cursor(self):
+        """Test a cursor that isn't a time is rejected."""
+        response = self.client.get(SYNC_URL, {"since": "yesterday"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sync_auth_required(self):
+        """Test auth is required."""
+        self.client.force_authenticate(None)
+
+        response = self.client.get(SYNC_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
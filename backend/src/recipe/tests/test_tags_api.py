@@ -1,17 +1,22 @@
 # """
 # Tests for the Tags API.
 # """
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
 from .services import (
     create_tag_detail_url,
+    create_tag_merge_url,
     TAG_LIST_URL,
+    TAG_AUTOCOMPLETE_URL,
+    create_recipe,
     create_tag,
     create_user,
 )
 from ..models import Recipe, Tag
-from ..serializers import TagSerializer
+from ..serializers import TagDetailSerializer
 
 
 # ________
@@ -42,7 +47,7 @@ class TagListTest(APITestCase, APIClient):
         tag_query = Tag.objects.all().order_by("-name")
         self.assertEqual(len(response.data), tag_query.count())
 
-        serializer = TagSerializer(tag_query, many=True)
+        serializer = TagDetailSerializer(tag_query, many=True)
         self.assertEqual(response.data, serializer.data)
 
     def test_list_tags_limited_access(self):
@@ -57,9 +62,29 @@ class TagListTest(APITestCase, APIClient):
         tag_query = Tag.objects.filter(user=user2).order_by("-name")
         self.assertEqual(len(response.data), tag_query.count())
 
-        serializer = TagSerializer(tag_query, many=True)
+        serializer = TagDetailSerializer(tag_query, many=True)
         self.assertEqual(response.data, serializer.data)
 
+    def test_list_tags_ordered_by_recipe_count(self):
+        """Test list tags sorted by their recipe count."""
+        tag = create_tag(user=self.user, name="Used")
+        create_recipe(user=self.user).tags.add(tag)
+        Tag.objects.recount()
+
+        response = self.client.get(TAG_LIST_URL, {"ordering": "-recipe_count"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data[0], {"id": tag.id, "name": "Used", "recipe_count": 1}
+        )
+
+    def test_list_tags_sparse_fields(self):
+        """Test list tags with only some fields."""
+        response = self.client.get(TAG_LIST_URL, {"fields": "name"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"name": "Test-tag2"}, {"name": "Test-tag"}])
+
 
 class TagListNotAuthenticatedAPITest(APITestCase, APIClient):
     """Tests calling endpoint with the unauthenticated user."""
@@ -74,6 +99,76 @@ class TagListNotAuthenticatedAPITest(APITestCase, APIClient):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+# ________
+# GET /api/tags/autocomplete/:
+
+
+class TagAutocompleteTest(APITestCase, APIClient):
+    """Tests GET the tags matching a prefix."""
+
+    def setUp(self):
+        """Creates client, user and tags used by a varying number of recipes."""
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+        self.vegan = create_tag(user=self.user, name="vegan")
+        self.veggie = create_tag(user=self.user, name="veggie")
+        self.vegetarian = create_tag(user=self.user, name="vegetarian")
+        create_tag(user=self.user, name="dessert")
+        for _ in range(2):
+            create_recipe(user=self.user).tags.add(self.veggie)
+        create_recipe(user=self.user).tags.add(self.vegan, self.veggie)
+        Tag.objects.recount()
+
+    def test_autocomplete_ranked_by_usage(self):
+        """Test matching tags are ordered by recipe count, then name."""
+        response = self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "veg"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {"id": self.veggie.id, "name": "veggie", "recipe_count": 3},
+                {"id": self.vegan.id, "name": "vegan", "recipe_count": 1},
+                {"id": self.vegetarian.id, "name": "vegetarian", "recipe_count": 0},
+            ],
+        )
+
+    def test_autocomplete_limit(self):
+        """Test only the top `limit` tags are returned."""
+        response = self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "veg", "limit": 1})
+
+        self.assertEqual([tag["name"] for tag in response.data], ["veggie"])
+
+    def test_autocomplete_limited_access(self):
+        """Test other users' tags and recipes are not counted."""
+        user2 = create_user(email="test2@example.com")
+        tag = create_tag(user=user2, name="vegan-other")
+        create_recipe(user=user2).tags.add(tag)
+        Tag.objects.recount()
+
+        response = self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "vegan"})
+
+        self.assertEqual(
+            response.data,
+            [{"id": self.vegan.id, "name": "vegan", "recipe_count": 1}],
+        )
+
+    def test_autocomplete_invalid_query(self):
+        """Test a missing prefix or an out of range limit is rejected."""
+        invalid = ({}, {"prefix": "veg", "limit": 0}, {"prefix": "veg", "limit": 51})
+        for params in invalid:
+            response = self.client.get(TAG_AUTOCOMPLETE_URL, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_not_authenticated(self):
+        """Test auth is required."""
+        self.client.force_authenticate(None)
+        response = self.client.get(TAG_AUTOCOMPLETE_URL, {"prefix": "veg"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
 # ________
 # PUT,PATCH,DELETE /api/tags/{id}/:
 
@@ -220,3 +315,76 @@ class DeleteDetailedTest(APITestCase, APIClient):
         response = self.client.delete(create_tag_detail_url(tag.id))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertTrue(Tag.objects.filter(id=tag.id).exists())
+
+
+# ________
+# POST /api/tags/{id}/merge/:
+
+
+class MergeTagTest(APITestCase, APIClient):
+    """Tests merging a tag into another one."""
+
+    def setUp(self):
+        """Creates client, user, two tags and recipes using one or both."""
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.source = create_tag(user=self.user, name="veggie")
+        self.target = create_tag(user=self.user, name="vegetarian")
+        self.only_source = create_recipe(user=self.user)
+        self.only_source.tags.add(self.source)
+        self.both = create_recipe(user=self.user)
+        self.both.tags.add(self.source, self.target)
+        Tag.objects.recount()
+
+    def merge(self, source, target):
+        return self.client.post(
+            create_tag_merge_url(source.id), {"target": target.id}, format="json"
+        )
+
+    def test_merge_tag_success(self):
+        """Test recipes move to the target without duplicates and source goes."""
+        response = self.merge(self.source, self.target)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {"id": self.target.id, "name": "vegetarian", "recipe_count": 2},
+        )
+        self.assertFalse(Tag.objects.filter(id=self.source.id).exists())
+        for recipe in (self.only_source, self.both):
+            self.assertEqual(list(recipe.tags.all()), [self.target])
+
+    def test_merge_tag_constant_queries(self):
+        """Test the number of queries doesn't grow with the recipes moved."""
+        with CaptureQueriesContext(connection) as few:
+            self.merge(self.source, self.target)
+        source = create_tag(user=self.user, name="veggie")
+        for _ in range(5):
+            create_recipe(user=self.user).tags.add(source)
+
+        with CaptureQueriesContext(connection) as many:
+            response = self.merge(source, self.target)
+
+        self.assertEqual(response.data["recipe_count"], 7)
+        self.assertEqual(len(many), len(few))
+
+    def test_merge_tag_invalid_target(self):
+        """Test merging into itself or another user's tag is rejected."""
+        other = create_tag(user=create_user(email="test2@example.com"))
+
+        for target in (self.source, other):
+            response = self.merge(self.source, target)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertTrue(Tag.objects.filter(id=self.source.id).exists())
+
+    def test_merge_other_users_tag(self):
+        """Test another user's tag can't be merged."""
+        user2 = create_user(email="test2@example.com")
+        self.client.force_authenticate(user2)
+        target = create_tag(user=user2)
+
+        response = self.merge(self.source, target)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
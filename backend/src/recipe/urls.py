@@ -1,8 +1,12 @@
 """URL pappings for the recipe app."""
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import RecipeViewSet, TagViewSet
+from src.core.asyncviews import async_reads
+
+from .asyncviews import recipe_detail, recipe_list, tag_list
+from .views import RecipeViewSet, SyncView, TagViewSet
 
 
 app_name = "recipe"
@@ -11,4 +15,24 @@ router = DefaultRouter()
 router.register("recipes", RecipeViewSet)
 router.register("tags", TagViewSet)
 
-urlpatterns = [path("", include(router.urls))]
+sync_views = {url.name: url.callback for url in router.urls}
+async_read_urlpatterns = [
+    path(
+        "recipes/",
+        async_reads(recipe_list, sync_views["recipe-list"]),
+        name="recipe-list",
+    ),
+    path(
+        "recipes/<int:pk>/",
+        async_reads(recipe_detail, sync_views["recipe-detail"]),
+        name="recipe-detail",
+    ),
+    path("tags/", async_reads(tag_list, sync_views["tag-list"]), name="tag-list"),
+]
+
+urlpatterns = [
+    path("", include(router.urls)),
+    path("sync/", SyncView.as_view(), name="sync"),
+]
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = async_read_urlpatterns + urlpatterns
@@ -1,38 +1,134 @@
 """Views for the recipe API."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+from rest_framework.generics import GenericAPIView, get_object_or_404
 from rest_framework.viewsets import ModelViewSet, GenericViewSet
 from rest_framework.mixins import ListModelMixin, UpdateModelMixin, DestroyModelMixin
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from .models import Recipe, Tag
-from .serializers import RecipeSerializer, RecipeDetailSerializer, TagSerializer
+from src.core.mixins import ReplicaReadMixin, SparseFieldsetMixin
+from src.core.sharding import shard_for_user
+
+from .models import Recipe, Tag, Tombstone
+from .sync import sync_atomic
+from .serializers import (
+    RecipeBulkDeleteSerializer,
+    RecipeBulkTagsSerializer,
+    RecipeDuplicateSerializer,
+    RecipeIdsQuerySerializer,
+    RecipeSerializer,
+    RecipeDetailSerializer,
+    SyncQuerySerializer,
+    SyncSerializer,
+    TagAutocompleteQuerySerializer,
+    TagDetailSerializer,
+    TagMergeSerializer,
+)
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, SparseFieldsetMixin, ModelViewSet):
     """View for manage recipe APIs."""
 
     queryset = Recipe.objects.all()
     serializer_class = RecipeDetailSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    expandable_fields = ["tags"]
 
     def get_queryset(self):
         """Retrive recipes for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by("-id")
+        user = self.request.user
+        queryset = self.queryset.using(shard_for_user(user.id))
+        return queryset.filter(user=user).order_by("-id")
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
-        if self.action == "list":
+        if self.action == "list" and "ids" not in self.request.query_params:
             return RecipeSerializer
         else:
             return self.serializer_class
 
+    def list(self, request, *args, **kwargs):
+        """List recipes, or get the detailed recipes with the given `ids`."""
+        if "ids" not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        query = RecipeIdsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        ids = query.validated_data["ids"]
+        recipes = self.filter_queryset(self.get_queryset()).filter(id__in=ids)
+        # Other users' recipes aren't in get_queryset, so they're not found.
+        found = {recipe.id: recipe for recipe in recipes}
+        return Response(
+            {
+                "results": self.get_serializer(
+                    [found[id] for id in ids if id in found], many=True
+                ).data,
+                "not_found": [id for id in ids if id not in found],
+            }
+        )
+
     def perform_create(self, serializer):
         """Create a new recipe."""
         serializer.save(user=self.request.user)
 
+    @action(detail=True, methods=["post"])
+    def duplicate(self, request, pk=None):
+        """Copy the recipe with its tags, `count` times."""
+        # Only the id is needed, the copy is made in the database.
+        recipe = get_object_or_404(self.get_queryset().only("id"), pk=pk)
+        self.check_object_permissions(request, recipe)
+        serializer = RecipeDuplicateSerializer(recipe, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({"ids": serializer.duplicate()}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_delete(self, request):
+        """Delete the selected recipes of the user."""
+        serializer = RecipeBulkDeleteSerializer(
+            data=request.data,
+            context={"request": request, "recipes": self.get_queryset()},
+        )
+        serializer.is_valid(raise_exception=True)
+        return Response({"deleted": serializer.delete()})
+
+    @action(detail=False, methods=["post"], url_path="bulk-tags")
+    def bulk_tags(self, request):
+        """Add and remove tags of the user on the selected recipes."""
+        shard = shard_for_user(request.user.id)
+        serializer = RecipeBulkTagsSerializer(
+            data=request.data,
+            context={
+                "request": request,
+                "recipes": self.get_queryset(),
+                "tags": Tag.objects.using(shard).filter(user=request.user),
+            },
+        )
+        serializer.is_valid(raise_exception=True)
+        added, removed = serializer.save_tags()
+        return Response({"added": added, "removed": removed})
+
+    def perform_destroy(self, instance):
+        """Delete a recipe, uncounting it from its tags."""
+        db = instance._state.db
+        with sync_atomic(using=db):
+            Tag.objects.using(db).filter(recipe=instance).update(
+                recipe_count=F("recipe_count") - 1, updated_at=timezone.now()
+            )
+            Tombstone.objects.using(db).record(instance.user_id, Recipe, [instance.id])
+            instance.delete()
+
 
 class TagViewSet(
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
     ListModelMixin,
     UpdateModelMixin,
     DestroyModelMixin,
@@ -41,10 +137,114 @@ class TagViewSet(
     """View for manage tag APIs."""
 
     queryset = Tag.objects.all()
-    serializer_class = TagSerializer
+    serializer_class = TagDetailSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    filter_backends = [OrderingFilter]
+    ordering_fields = ["name", "recipe_count"]
 
     def get_queryset(self):
         """Retrive tags for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by("-name")
+        user = self.request.user
+        queryset = self.queryset.using(shard_for_user(user.id))
+        return queryset.filter(user=user).order_by("-name")
+
+    def perform_update(self, serializer):
+        """Rename a tag."""
+        with sync_atomic(using=serializer.instance._state.db):
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        """Delete a tag, touching the recipes it's removed from."""
+        db = instance._state.db
+        with sync_atomic(using=db):
+            Recipe.objects.using(db).filter(tags=instance).update(
+                updated_at=timezone.now()
+            )
+            Tombstone.objects.using(db).record(instance.user_id, Tag, [instance.id])
+            instance.delete()
+
+    @action(detail=False)
+    def autocomplete(self, request):
+        """List the user's tags starting with `prefix`, most used first."""
+        query = TagAutocompleteQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        tags = (
+            self.get_queryset()
+            .filter(name__startswith=query.validated_data["prefix"])
+            .order_by("-recipe_count", "name")[: query.validated_data["limit"]]
+        )
+        return Response(self.get_serializer(tags, many=True).data)
+
+    @action(detail=True, methods=["post"])
+    def merge(self, request, pk=None):
+        """Merge the tag into the `target` tag of the user."""
+        tag = self.get_object()
+        serializer = TagMergeSerializer(
+            tag,
+            data=request.data,
+            context={"targets": self.get_queryset().exclude(id=tag.id)},
+        )
+        serializer.is_valid(raise_exception=True)
+        return Response(self.get_serializer(serializer.save()).data)
+
+
+class SyncView(GenericAPIView):
+    """View for fetching the changes to the user's recipes and tags."""
+
+    serializer_class = SyncSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Return the recipes and tags changed and the ids of those deleted
+        after the `since` cursor, and the next cursor. Without a cursor, or
+        with one older than the tombstones kept, everything is returned with
+        `full` set, for the client to replace what it has. Reads the primary,
+        as a lagging replica could skip changes for good.
+        """
+        query = SyncQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        since = query.validated_data.get("since")
+        user, cursor = request.user, timezone.now()
+        shard = shard_for_user(user.id)
+
+        recipes = Recipe.objects.using(shard).filter(user=user, updated_at__lte=cursor)
+        tags = Tag.objects.using(shard).filter(user=user, updated_at__lte=cursor)
+        tombstones = Tombstone.objects.using(shard).none()
+        if since is not None:
+            # A change saved by a slower transaction can carry a time before
+            # the cursor handed out meanwhile, so recent changes are resent
+            # (src.recipe.sync rolls back the slower ones).
+            since -= timedelta(seconds=settings.SYNC_CURSOR_OVERLAP_SECONDS)
+            if since < cursor - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+                # The tombstones of deletions since may be pruned already.
+                since = None
+        if since is not None:
+            recipes = recipes.filter(updated_at__gt=since)
+            tags = tags.filter(updated_at__gt=since)
+            tombstones = Tombstone.objects.using(shard).filter(
+                user=user, deleted_at__gt=since, deleted_at__lte=cursor
+            )
+            changed = recipes.values("id").union(
+                tags.values("id"), tombstones.values("id")
+            )
+            if not changed.exists():
+                # Empty querysets don't hit the database below.
+                recipes, tags = recipes.none(), tags.none()
+                tombstones = tombstones.none()
+
+        deleted = {"recipe": [], "tag": []}
+        for model, object_id in tombstones.values_list("model", "object_id"):
+            deleted[model].append(object_id)
+        serializer = self.get_serializer(
+            {
+                "cursor": cursor,
+                "full": since is None,
+                "recipes": recipes.prefetch_related("tags").order_by("id"),
+                "tags": tags.order_by("id"),
+                "deleted": {"recipes": deleted["recipe"], "tags": deleted["tag"]},
+            }
+        )
+        return Response(serializer.data)
@@ -3,4 +3,10 @@ from django.contrib import admin
 from .models import User
 
 
-admin.site.register(User)
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    list_display = ("email", "name", "is_active", "is_staff")
+    ordering = ("-id",)
+    # Prefix matches on the unique email index, also used by autocompletes.
+    search_fields = ("email__startswith",)
+    show_full_result_count = False
@@ -0,0 +1,82 @@
+"""
+Django command to create users in bulk from a CSV or NDJSON file.
+"""
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...provisioning import FORMATS, UnreadableRows, provision_users, read_rows
+
+
+class Command(BaseCommand):
+    """Django command to provision users from a file."""
+
+    help = (
+        "Create a user for each row (email, name, password) of a CSV file with "
+        "a header or an NDJSON file, and report the rows that failed. With "
+        "--tokens, write the auth token of each user as email,token lines. "
+        "Rows are created as they're read: a CSV file malformed from some row "
+        "on has the rows before it created."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read, - for stdin.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Format of the file (default: from its extension).",
+        )
+        parser.add_argument(
+            "--tokens",
+            action="store_true",
+            help="Issue auth tokens for the created users.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.USER_PROVISION_CHUNK_SIZE,
+            help="Number of rows validated, hashed and inserted together.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = options["path"]
+        format = options["format"] or path.rpartition(".")[2].lower()
+        if format not in FORMATS:
+            raise CommandError("Can't tell the format of the file, use --format.")
+        if path == "-":
+            report = self.provision(sys.stdin, format, options)
+        else:
+            with open(path, newline="", encoding="utf-8") as lines:
+                report = self.provision(lines, format, options)
+
+        for error in report["errors"]:
+            for field, messages in error["errors"].items():
+                self.stderr.write(f"Row {error['row']}: {field}: {' '.join(messages)}")
+        for token in report.get("tokens", []):
+            self.stdout.write(f"{token['email']},{token['token']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {report['created']} users, {len(report['errors'])} "
+                f"rows failed."
+            )
+        )
+        if self.unreadable:
+            raise CommandError(
+                f"Can't read the rows {self.unreadable}; {report['created']} "
+                f"users were created from those before."
+            )
+
+    def provision(self, lines, format, options):
+        self.unreadable = None
+
+        def rows():
+            try:
+                yield from read_rows(lines, format)
+            except UnreadableRows as exc:
+                self.unreadable = exc
+
+        return provision_users(
+            rows(), issue_tokens=options["tokens"], chunk_size=options["chunk_size"]
+        )
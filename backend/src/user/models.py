@@ -1,13 +1,15 @@
 """
 Database models.
 """
-from django.db.models import EmailField, CharField, BooleanField
+from django.db.models import EmailField, CharField, BooleanField, DateTimeField
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
+from . import passwords
+
 
 class UserManager(BaseUserManager):
     """Manager for users."""
@@ -41,7 +43,29 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = CharField(max_length=255)
     is_active = BooleanField(default=True)
     is_staff = BooleanField(default=False)
+    # Set when the user deletes their account; the purge_deleted_users
+    # command then removes their data in batches and deletes the row.
+    deleted_at = DateTimeField(null=True, blank=True, editable=False)
 
     objects = UserManager()
 
     USERNAME_FIELD = "email"
+
+    def set_password(self, raw_password):
+        """Hash the password in the password pool."""
+        self.password = passwords.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """
+        Verify the password in the password pool, rehashing it if the
+        hasher or its settings changed.
+        """
+
+        def setter(raw_password):
+            self.set_password(raw_password)
+            # Not a password change, see AbstractBaseUser.check_password.
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return passwords.check_password(raw_password, self.password, setter)
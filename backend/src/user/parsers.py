@@ -0,0 +1,33 @@
+"""Parsers of user rows for bulk provisioning."""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .provisioning import UnreadableRows, read_rows
+
+
+class RowsParser(BaseParser):
+    """Parse the body into a list of rows, see provisioning.read_rows."""
+
+    format = None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            text = stream.read().decode(encoding)
+        except UnicodeDecodeError as exc:
+            raise ParseError(f"{self.format.upper()} parse error - {exc}")
+        try:
+            return list(read_rows(text.splitlines(), self.format))
+        except UnreadableRows as exc:
+            raise ParseError(f"{self.format.upper()} parse error - {exc}")
+
+
+class CSVParser(RowsParser):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONParser(RowsParser):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
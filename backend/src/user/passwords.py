@@ -0,0 +1,169 @@
+"""
+Password hashing and verification in a bounded worker pool.
+
+PBKDF2 takes tens of milliseconds of CPU per call. Running it in a pool of
+PASSWORD_POOL_WORKERS threads (hashlib releases the GIL) or processes caps
+how many run at once, and with at most PASSWORD_POOL_QUEUE calls waiting
+for a worker, further ones fail fast with PasswordPoolBusy (a 503 from the
+API) instead of piling up.
+With PASSWORD_POOL_WORKERS=0 passwords are hashed inline.
+
+Sync callers (the views, under WSGI) wait for their hash: the pool bounds
+how many hashes run and wait at once, but their threads stay busy for the
+whole hash, as they would hashing inline. Async callers await it with
+amake_password and acheck_password, leaving the event loop free meanwhile.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from src.core.exceptions import ServiceUnavailable
+
+
+class PasswordPoolBusy(ServiceUnavailable):
+    default_detail = "Too many password checks in progress, try again later."
+    default_code = "password_pool_busy"
+
+
+class PasswordPool:
+    """Executor running at most `workers` calls with `queue` more waiting."""
+
+    def __init__(self, workers, queue, kind="thread"):
+        if kind == "thread":
+            self.executor = ThreadPoolExecutor(workers, thread_name_prefix="password")
+        else:
+            # Forked children would share the parent's database connections.
+            self.executor = ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(workers + queue)
+
+    def submit(self, func, *args):
+        """Schedule `func(*args)`, or raise PasswordPoolBusy when full."""
+        if not self.slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda future: self.slots.release())
+        return future
+
+    def run(self, func, *args):
+        """Call `func(*args)` in the pool and return its result."""
+        return self.submit(func, *args).result()
+
+    async def arun(self, func, *args):
+        """Async `run`, awaiting the result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def map(self, func, iterable):
+        """
+        Call `func(*args)` for each args in `iterable` and return the results.
+        Instead of failing when the pool is full, wait for room, with at most
+        `workers` calls pending so that the queue stays free for `submit`.
+        """
+        window = threading.BoundedSemaphore(self.workers)
+
+        def release(future):
+            self.slots.release()
+            window.release()
+
+        futures = []
+        try:
+            for args in iterable:
+                window.acquire()
+                self.slots.acquire()
+                try:
+                    future = self.executor.submit(func, *args)
+                except BaseException:
+                    release(None)
+                    raise
+                future.add_done_callback(release)
+                futures.append(future)
+            return [future.result() for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process wide pool, or None when hashing inline."""
+    global _pool
+    if _pool is None and settings.PASSWORD_POOL_WORKERS:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordPool(
+                    settings.PASSWORD_POOL_WORKERS,
+                    settings.PASSWORD_POOL_QUEUE,
+                    settings.PASSWORD_POOL,
+                )
+    return _pool
+
+
+def _run(func, *args):
+    pool = get_pool()
+    return func(*args) if pool is None else pool.run(func, *args)
+
+
+async def _arun(func, *args):
+    pool = get_pool()
+    return func(*args) if pool is None else await pool.arun(func, *args)
+
+
+def _verify(password, encoded):
+    """Return whether the password matches and whether to rehash it."""
+    rehash = []
+    correct = hashers.check_password(password, encoded, rehash.append)
+    return correct, bool(rehash)
+
+
+def make_password(password):
+    """`django.contrib.auth.hashers.make_password` run in the pool."""
+    return _run(hashers.make_password, password)
+
+
+async def amake_password(password):
+    """Async `make_password`."""
+    return await _arun(hashers.make_password, password)
+
+
+def make_passwords(passwords):
+    """Hash many passwords in parallel, see PasswordPool.map."""
+    pool = get_pool()
+    if pool is None:
+        return [hashers.make_password(password) for password in passwords]
+    return pool.map(hashers.make_password, ((password,) for password in passwords))
+
+
+def check_password(password, encoded, setter=None):
+    """`django.contrib.auth.hashers.check_password` run in the pool."""
+    if password is None or not hashers.is_password_usable(encoded):
+        return False
+    correct, rehash = _run(_verify, password, encoded)
+    if correct and rehash and setter:
+        setter(password)
+    return correct
+
+
+async def acheck_password(password, encoded, setter=None):
+    """Async `check_password`, awaiting `setter` (an async callable) if given."""
+    if password is None or not hashers.is_password_usable(encoded):
+        return False
+    correct, rehash = await _arun(_verify, password, encoded)
+    if correct and rehash and setter:
+        await setter(password)
+    return correct
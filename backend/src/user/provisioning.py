@@ -0,0 +1,154 @@
+"""
+Bulk creation of users from CSV or NDJSON rows.
+
+Rows are validated like signups, chunk by chunk, with one query per chunk
+for the emails already taken. The passwords of a chunk are hashed in
+parallel in the password pool and its users inserted with one bulk_create.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+
+from .passwords import make_passwords
+from .serializers import UserProvisionSerializer
+
+
+FORMATS = ["csv", "ndjson"]
+
+
+class UnreadableRows(ValueError):
+    """Raised by read_rows for CSV it can't read on from."""
+
+
+def read_rows(lines, format):
+    """
+    Yield the rows of `lines` as dicts, or None for NDJSON lines that
+    aren't valid JSON. CSV needs a header line naming the columns, and
+    raises UnreadableRows where it's malformed (such as a field longer than
+    the csv module allows).
+    """
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        try:
+            yield from reader
+        except csv.Error as exc:
+            raise UnreadableRows(f"after line {reader.line_num}: {exc}")
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def provision_users(rows, issue_tokens=False, chunk_size=None):
+    """
+    Create a user for every valid row (email, name, password) and return
+    a report: {"created": count, "errors": [{"row": number, "errors": ...}],
+    "tokens": [{"email": ..., "token": ...}]}, with tokens if asked for.
+    Rows are numbered from 1.
+    """
+    User = get_user_model()
+    chunk_size = chunk_size or settings.USER_PROVISION_CHUNK_SIZE
+    report = {"created": 0, "errors": []}
+    if issue_tokens:
+        report["tokens"] = []
+    seen = set()
+    numbered = enumerate(rows, 1)
+    for chunk in _chunks(numbered, chunk_size):
+        valid = []
+        for number, row in chunk:
+            if row is None:
+                report["errors"].append(
+                    {"row": number, "errors": {"non_field_errors": ["Invalid JSON."]}}
+                )
+                continue
+            serializer = UserProvisionSerializer(data=row)
+            if not serializer.is_valid():
+                report["errors"].append({"row": number, "errors": serializer.errors})
+                continue
+            data = serializer.validated_data
+            data["email"] = User.objects.normalize_email(data["email"])
+            if data["email"] in seen:
+                report["errors"].append(
+                    {"row": number, "errors": {"email": ["Duplicate email."]}}
+                )
+                continue
+            seen.add(data["email"])
+            valid.append((number, data))
+
+        taken = set(
+            User.objects.filter(
+                email__in=[data["email"] for _, data in valid]
+            ).values_list("email", flat=True)
+        )
+        for number, data in valid:
+            if data["email"] in taken:
+                report["errors"].append(
+                    {
+                        "row": number,
+                        "errors": {"email": ["User with this email already exists."]},
+                    }
+                )
+        valid = [(number, data) for number, data in valid if data["email"] not in taken]
+        if not valid:
+            continue
+
+        hashed = make_passwords(data["password"] for _, data in valid)
+        users = [
+            User(**{**data, "password": password})
+            for (_, data), password in zip(valid, hashed)
+        ]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                if issue_tokens:
+                    tokens = _issue_tokens(users)
+        except IntegrityError:
+            # An email was taken meanwhile, the chunk can be sent again.
+            report["errors"].extend(
+                {"row": number, "errors": {"email": ["Conflicting signup, retry."]}}
+                for number, _ in valid
+            )
+            continue
+        report["created"] += len(users)
+        if issue_tokens:
+            report["tokens"].extend(
+                {"email": user.email, "token": token.key}
+                for user, token in zip(users, tokens)
+            )
+    report["errors"].sort(key=lambda error: error["row"])
+    return report
+
+
+def _issue_tokens(users):
+    """Create auth tokens of newly created users in one insert."""
+    if users[0].pk is None:
+        # The database can't return the ids of bulk inserted rows.
+        ids = dict(
+            get_user_model()
+            .objects.filter(email__in=[user.email for user in users])
+            .values_list("email", "id")
+        )
+        for user in users:
+            user.pk = ids[user.email]
+    return Token.objects.bulk_create(
+        [Token(user=user, key=Token.generate_key()) for user in users]
+    )
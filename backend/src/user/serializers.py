@@ -2,8 +2,12 @@
 from rest_framework.serializers import (
     Serializer,
     ModelSerializer,
+    BooleanField,
+    DictField,
     EmailField,
     CharField,
+    IntegerField,
+    ListField,
     ValidationError,
 )
 from rest_framework.exceptions import ValidationError as DRF_ValidationError
@@ -38,15 +42,45 @@ class UserSerializer(ModelSerializer):
         return get_user_model().objects.create_user(**validated_data)
 
     def update(self, instance, validated_data):
-        """Update and return user."""
+        """Update and return user, writing only the changed columns once."""
         password = validated_data.pop("password", None)
-        user = super().update(instance, validated_data)
-
+        changed = [
+            field
+            for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        for field in changed:
+            setattr(instance, field, validated_data[field])
         if password:
-            user.set_password(password)
-            user.save()
+            # Hashed before the write, which then needs no second save.
+            instance.set_password(password)
+            changed.append("password")
+        if changed:
+            instance.save(update_fields=changed)
+
+        return instance
+
+
+class UserProvisionSerializer(UserSerializer):
+    """Serializer for a row of bulk user provisioning."""
+
+    class Meta(UserSerializer.Meta):
+        # Taken emails are looked up for a whole chunk of rows at once.
+        extra_kwargs = {**UserSerializer.Meta.extra_kwargs, "email": {"validators": []}}
+
+
+class UserProvisionQuerySerializer(Serializer):
+    """Validate the query parameters of bulk user provisioning."""
+
+    tokens = BooleanField(default=False)
+
+
+class UserProvisionReportSerializer(Serializer):
+    """Serializer for the report of bulk user provisioning."""
 
-        return user
+    created = IntegerField()
+    errors = ListField(child=DictField())
+    tokens = ListField(child=DictField(), required=False)
 
 
 class AuthTokenSerializer(Serializer):
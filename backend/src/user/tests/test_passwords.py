@@ -0,0 +1,117 @@
+"""
+Tests for the password hashing pool.
+"""
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password as inline_make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from src.user.passwords import (
+    PasswordPool,
+    PasswordPoolBusy,
+    acheck_password,
+    amake_password,
+)
+
+
+USER_DATA = {"email": "test@example.com", "name": "test", "password": "testPass123"}
+
+
+class PasswordPoolTests(TestCase):
+    """Test the bounded pool."""
+
+    def test_pool_bounds_pending_calls(self):
+        """Test calls beyond the workers and queue are refused until one ends."""
+        pool = PasswordPool(1, 1)
+        release = threading.Event()
+        running = pool.submit(release.wait)
+        waiting = pool.submit(release.wait)
+
+        with self.assertRaises(PasswordPoolBusy):
+            pool.submit(release.wait)
+
+        release.set()
+        running.result()
+        waiting.result()
+        self.assertEqual(pool.run(sum, [1, 2]), 3)
+
+    @override_settings(
+        PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]
+    )
+    async def test_async_hash_and_check(self):
+        """Test async callers await hashes run in the pool."""
+        pool = PasswordPool(1, 0)
+        with patch("src.user.passwords._pool", pool):
+            encoded = await amake_password("testPass123")
+            self.assertTrue(await acheck_password("testPass123", encoded))
+            self.assertFalse(await acheck_password("wrong", encoded))
+
+            release = threading.Event()
+            pool.submit(release.wait)
+            with self.assertRaises(PasswordPoolBusy):
+                await amake_password("testPass123")
+            release.set()
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+            "django.contrib.auth.hashers.UnsaltedMD5PasswordHasher",
+        ]
+    )
+    def test_check_password_rehashes(self):
+        """Test a password hashed with an outdated hasher is upgraded."""
+        user = get_user_model().objects.create_user(**USER_DATA)
+        get_user_model().objects.filter(id=user.id).update(
+            password=inline_make_password(USER_DATA["password"], hasher="unsalted_md5")
+        )
+        user.refresh_from_db()
+
+        self.assertFalse(user.check_password("wrong"))
+        self.assertTrue(user.check_password(USER_DATA["password"]))
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("md5$"))
+
+
+class PasswordPoolBusyApiTests(APITestCase, APIClient):
+    """Test the user API when the pool is saturated."""
+
+    def setUp(self):
+        """Creates client and a pool kept busy."""
+        self.client = APIClient()
+        self.release = threading.Event()
+        pool = PasswordPool(1, 0)
+        pool.submit(self.release.wait)
+        patcher = patch("src.user.passwords._pool", pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.release.set)
+
+    def test_signup_busy(self):
+        """Test signups are refused with a 503."""
+        response = self.client.post(reverse("user:create"), USER_DATA, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data["detail"].code, "password_pool_busy")
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_login_busy(self):
+        """Test logins are refused with a 503."""
+        with override_settings(PASSWORD_POOL_WORKERS=0), patch(
+            "src.user.passwords._pool", None
+        ):
+            get_user_model().objects.create_user(**USER_DATA)
+
+        response = self.client.post(
+            reverse("user:token"),
+            {"email": USER_DATA["email"], "password": USER_DATA["password"]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,158 @@
+"""
+Tests for bulk user provisioning.
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+
+PROVISION_URL = reverse("user:provision")
+
+CSV_ROWS = (
+    "email,name,password\n"
+    "one@Example.com,One,testPass123\n"
+    "two@example.com,Two,t\n"
+    "taken@example.com,Taken,testPass123\n"
+    "three@example.com,Three,testPass123\n"
+    "one@example.com,One again,testPass123\n"
+)
+# Has a field longer than the csv module reads.
+CSV_MALFORMED = CSV_ROWS + f"four@example.com,{'x' * 200000},testPass123\n"
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    USER_PROVISION_CHUNK_SIZE=2,
+)
+class UserProvisionApiTests(APITestCase, APIClient):
+    """Tests POST users in bulk."""
+
+    def setUp(self):
+        """Creates client, staff user and a user whose email is taken."""
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            email="staff@example.com", password="testPass123", is_staff=True
+        )
+        self.client.force_authenticate(self.staff)
+        get_user_model().objects.create_user(
+            email="taken@example.com", password="testPass123"
+        )
+
+    def test_provision_csv(self):
+        """Test valid rows are created and the others reported."""
+        response = self.client.post(PROVISION_URL, CSV_ROWS, content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        errors = response.data["errors"]
+        self.assertEqual(
+            [(error["row"], list(error["errors"])) for error in errors],
+            [(2, ["password"]), (3, ["email"]), (5, ["email"])],
+        )
+        self.assertNotIn("tokens", response.data)
+        user = get_user_model().objects.get(email="one@example.com")
+        self.assertEqual(user.name, "One")
+        self.assertTrue(user.check_password("testPass123"))
+
+    def test_provision_ndjson_with_tokens(self):
+        """Test NDJSON rows are created with auth tokens."""
+        rows = "\n".join(
+            [
+                json.dumps(
+                    {
+                        "email": f"user{i}@example.com",
+                        "name": "User",
+                        "password": "testPass123",
+                    }
+                )
+                for i in range(3)
+            ]
+            + ["{not json", "[]"]
+        )
+
+        response = self.client.post(
+            f"{PROVISION_URL}?tokens=true", rows, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [4, 5])
+        tokens = {token["email"]: token["token"] for token in response.data["tokens"]}
+        self.assertEqual(len(tokens), 3)
+        for email, key in tokens.items():
+            self.assertEqual(Token.objects.get(key=key).user.email, email)
+
+    def test_provision_malformed_csv(self):
+        """Test malformed CSV is rejected, creating nobody."""
+        response = self.client.post(
+            PROVISION_URL, CSV_MALFORMED, content_type="text/csv"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("after line 6: field larger", response.data["detail"])
+        self.assertFalse(get_user_model().objects.filter(name="One").exists())
+
+    def test_provision_staff_only(self):
+        """Test users who aren't staff can't provision users."""
+        self.staff.is_staff = False
+        self.staff.save()
+
+        response = self.client.post(PROVISION_URL, CSV_ROWS, content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(get_user_model().objects.filter(name="One").exists())
+
+    def test_provision_unsupported_format(self):
+        """Test bodies other than CSV or NDJSON are rejected."""
+        response = self.client.post(PROVISION_URL, [], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ProvisionUsersCommandTests(TestCase):
+    """Test the provision_users command."""
+
+    def test_provision_users(self):
+        """Test users of a CSV file are created, with tokens."""
+        get_user_model().objects.create_user(
+            email="taken@example.com", password="testPass123"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "users.csv")
+            with open(path, "w") as file:
+                file.write(CSV_ROWS)
+            out, err = StringIO(), StringIO()
+
+            call_command("provision_users", path, "--tokens", stdout=out, stderr=err)
+
+        self.assertIn("Created 2 users, 3 rows failed.", out.getvalue())
+        self.assertEqual(out.getvalue().count("@example.com,"), 2)
+        self.assertIn(
+            "Row 3: email: User with this email already exists.", err.getvalue()
+        )
+        self.assertEqual(Token.objects.count(), 2)
+
+    def test_provision_users_malformed(self):
+        """Test the rows before malformed CSV are created, saying how many."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "users.csv")
+            with open(path, "w") as file:
+                file.write(CSV_MALFORMED)
+            out = StringIO()
+
+            with self.assertRaisesMessage(CommandError, "3 users were created"):
+                call_command("provision_users", path, stdout=out, stderr=StringIO())
+
+        self.assertIn("Created 3 users, 2 rows failed.", out.getvalue())
+        self.assertEqual(get_user_model().objects.count(), 3)
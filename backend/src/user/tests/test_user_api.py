@@ -3,6 +3,10 @@ Tests for the User API.
 """
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
@@ -155,3 +159,88 @@ class PrivateUserProfileTests(APITestCase, APIClient):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(self.user_queryset.name, data["name"])
         self.assertTrue(self.user_queryset.check_password(data["password"]))
+
+    def test_update_writes_changed_columns_once(self):
+        """Test an update is a single UPDATE of the changed columns."""
+        data = {"name": "Updated name", "password": "newpassword123"}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]["sql"]
+        self.assertTrue(sql.startswith("UPDATE"))
+        self.assertIn('"password"', sql)
+        self.assertIn('"name"', sql)
+        self.assertNotIn('"email"', sql)
+
+        with self.assertNumQueries(0):
+            self.client.patch(self.url, {"name": data["name"]}, format="json")
+
+    def test_retrieve_profile_etag(self):
+        """Test the profile is not sent again while its ETag matches."""
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        self.client.patch(self.url, {"name": "Updated name"}, format="json")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_delete_user_profile(self):
+        """Test deleting the account deactivates the user right away."""
+        response = self.client.delete(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.user_queryset.refresh_from_db()
+        self.assertFalse(self.user_queryset.is_active)
+        self.assertIsNotNone(self.user_queryset.deleted_at)
+
+
+@override_settings(AUTH_TOKEN_CACHE_SECONDS=60)
+class CachedUserProfileTests(APITestCase, APIClient):
+    """Tests the user profile with cached token authentication."""
+
+    def setUp(self):
+        """Creates client authenticated with a token."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.url = reverse("user:me")
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testPass13562", name="Test"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_polling_profile_skips_database(self):
+        """Test polling the profile is served from the cache."""
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.data["name"], "Test")
+
+    def test_cache_dropped_on_change(self):
+        """Test updates, deactivation and token deletion are seen at once."""
+        self.client.get(self.url)
+
+        self.client.patch(self.url, {"name": "Updated"}, format="json")
+        self.assertEqual(self.client.get(self.url).data["name"], "Updated")
+
+        self.client.delete(self.url)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = True
+        self.user.save()
+        self.client.get(self.url)
+        self.token.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
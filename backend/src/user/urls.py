@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import UserCreate, UserToken, ManageUserView
+from .views import UserCreate, UserToken, ManageUserView, UserProvisionView
 
 
 app_name = "user"
@@ -9,4 +9,5 @@ urlpatterns = [
     path("create/", UserCreate.as_view(), name="create"),
     path("token/", UserToken.as_view(), name="token"),
     path("me/", ManageUserView.as_view(), name="me"),
+    path("provision/", UserProvisionView.as_view(), name="provision"),
 ]
@@ -1,16 +1,37 @@
-from rest_framework.generics import CreateAPIView, RetrieveUpdateAPIView
-from rest_framework.permissions import IsAuthenticated
+import hashlib
+import json
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from rest_framework.generics import (
+    CreateAPIView,
+    GenericAPIView,
+    RetrieveUpdateDestroyAPIView,
+)
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
-from .serializers import UserSerializer, AuthTokenSerializer
+from src.core.authentication import CachedTokenAuthentication
+from src.core.throttling import AuthThrottle
+
+from .parsers import CSVParser, NDJSONParser
+from .provisioning import provision_users
+from .serializers import (
+    UserSerializer,
+    AuthTokenSerializer,
+    UserProvisionQuerySerializer,
+    UserProvisionReportSerializer,
+)
 
 
 class UserCreate(CreateAPIView):
     """Create a new user."""
 
     serializer_class = UserSerializer
+    throttle_classes = (AuthThrottle,)
 
 
 class UserToken(ObtainAuthToken):
@@ -18,15 +39,52 @@ class UserToken(ObtainAuthToken):
 
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = (AuthThrottle,)
 
 
-class ManageUserView(RetrieveUpdateAPIView):
+class ManageUserView(RetrieveUpdateDestroyAPIView):
     """Manage the authenticated user."""
 
     serializer_class = UserSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
         """Retrieve and return the authenticated user."""
         return self.request.user
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the user with an ETag, or 304 if the client's is current."""
+        response = super().retrieve(request, *args, **kwargs)
+        content = json.dumps(response.data, sort_keys=True).encode()
+        response["ETag"] = quote_etag(hashlib.md5(content).hexdigest())
+        response["Cache-Control"] = "private, no-cache"
+        return get_conditional_response(
+            request, etag=response["ETag"], response=response
+        )
+
+    def perform_destroy(self, instance):
+        """Deactivate the user, their data is purged later in batches."""
+        instance.is_active = False
+        instance.deleted_at = timezone.now()
+        instance.save(update_fields=["is_active", "deleted_at"])
+
+
+class UserProvisionView(GenericAPIView):
+    """
+    Create users in bulk from CSV (with a header) or NDJSON rows of email,
+    name and password, with auth tokens if `?tokens=true`. Staff only.
+    """
+
+    serializer_class = UserProvisionReportSerializer
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+    parser_classes = (CSVParser, NDJSONParser)
+
+    def post(self, request):
+        query = UserProvisionQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        report = provision_users(
+            request.data, issue_tokens=query.validated_data["tokens"]
+        )
+        return Response(self.get_serializer(report).data)